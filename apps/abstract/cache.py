@@ -0,0 +1,193 @@
+# Django
+from django.core.cache import cache
+
+# Python
+from typing import Any, Callable, Iterable, Optional
+import math
+import random
+import time
+import uuid
+
+
+CACHE_TIMEOUT = 60 * 60
+STALE_TIMEOUT = 60
+NEGATIVE_TIMEOUT = 30
+EARLY_REFRESH_BETA = 1.0
+LOCK_KEY = 'lock:{}'
+LOCK_TIMEOUT = 10
+LOCK_POLL_INTERVAL = 0.05
+TAG_VERSION_KEY = '{}_version'
+CATALOG_TAG = 'catalog'
+
+
+def user_tag(user_id: int) -> str:
+    return f'user:{user_id}'
+
+
+def skin_tag(skin_id: int) -> str:
+    return f'skin:{skin_id}'
+
+
+def get_tag_versions(
+    tags: Iterable[str],
+    versions: Optional[dict] = None
+) -> dict[str, int]:
+    """Current versions of tags, missing ones are started.
+    Versions already read by caller are passed by key."""
+
+    keys = {TAG_VERSION_KEY.format(tag): tag for tag in tags}
+    if versions is None:
+        versions = cache.get_many(list(keys))
+    for key in keys.keys() - versions.keys():
+        # Start from a timestamp, so a lost key never
+        # matches an entry stored before it was lost.
+        cache.add(key, time.time_ns(), timeout=None)
+        versions[key] = cache.get(key)
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def invalidate_tags(*tags: str) -> None:
+    """Make every entry carrying one of tags outdated."""
+
+    for tag in tags:
+        key = TAG_VERSION_KEY.format(tag)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+class CachedRows:
+    """Primary keys and serialized rows of one cached list,
+    rows are plain data, so a hit needs no query."""
+
+    def __init__(self, ids: list, rows: list[dict]):
+        self.ids = ids
+        self.rows = rows
+
+    @classmethod
+    def from_serializer(
+        cls,
+        serializer_class: Any,
+        queryset: Any
+    ) -> 'CachedRows':
+        objects = list(queryset)
+        data = serializer_class(objects, many=True).data
+        return cls(
+            ids=[obj.pk for obj in objects],
+            rows=[dict(row) for row in data]
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __bool__(self) -> bool:
+        return bool(self.ids)
+
+
+def cached(
+    key: str,
+    compute: Callable[[], Any],
+    tags: Iterable[str] = (),
+    timeout: int = CACHE_TIMEOUT,
+    stale_timeout: int = STALE_TIMEOUT,
+    negative_timeout: int = NEGATIVE_TIMEOUT,
+    beta: float = EARLY_REFRESH_BETA
+) -> Any:
+    """Cached value of key, computed by one caller at a time.
+
+    Entry is fresh for timeout, refreshed a bit earlier at
+    random, served stale for stale_timeout while one caller
+    recomputes it. Empty values live for negative_timeout.
+    Entry whose tags were invalidated is not served."""
+
+    tags = list(tags)
+    found = cache.get_many(
+        [key] + [TAG_VERSION_KEY.format(tag) for tag in tags]
+    )
+    entry = found.pop(key, None)
+    versions = get_tag_versions(tags, found)
+
+    if entry is not None and entry['tags'] == versions:
+        if not should_refresh(entry, beta):
+            return entry['value']
+        # Stale or early: one caller refreshes, others do not wait.
+        token = acquire_lock(key)
+        if token is None:
+            if entry['expires_at'] + stale_timeout > time.time():
+                return entry['value']
+        else:
+            return compute_entry(
+                key, compute, versions, token,
+                timeout, stale_timeout, negative_timeout
+            )
+
+    token = acquire_lock(key)
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while token is None and time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None and entry['tags'] == versions:
+            return entry['value']
+        token = acquire_lock(key)
+    return compute_entry(
+        key, compute, versions, token,
+        timeout, stale_timeout, negative_timeout
+    )
+
+
+def should_refresh(entry: dict, beta: float) -> bool:
+    """Probabilistic early expiration: callers refresh sooner
+    when recompute is slow, so the entry rarely expires."""
+
+    early = entry['delta'] * beta * -math.log(1.0 - random.random())
+    return time.time() + early >= entry['expires_at']
+
+
+def acquire_lock(key: str) -> Optional[str]:
+    """Short lease on recompute of key, token or None."""
+
+    token = uuid.uuid4().hex
+    if cache.add(LOCK_KEY.format(key), token, timeout=LOCK_TIMEOUT):
+        return token
+    return None
+
+
+def release_lock(key: str, token: str) -> None:
+    lock_key = LOCK_KEY.format(key)
+    if cache.get(lock_key) == token:
+        cache.delete(lock_key)
+
+
+def compute_entry(
+    key: str,
+    compute: Callable[[], Any],
+    versions: dict[str, int],
+    token: Optional[str],
+    timeout: int,
+    stale_timeout: int,
+    negative_timeout: int
+) -> Any:
+    """Compute value and store it, lock is released after.
+    Versions are read before compute, so invalidation
+    racing with it leaves the stored entry outdated."""
+
+    try:
+        started = time.time()
+        value = compute()
+        finished = time.time()
+        fresh_for = timeout if value else negative_timeout
+        cache.set(
+            key,
+            {
+                'value': value,
+                'tags': versions,
+                'delta': finished - started,
+                'expires_at': finished + fresh_for,
+            },
+            timeout=fresh_for + stale_timeout
+        )
+        return value
+    finally:
+        if token is not None:
+            release_lock(key, token)
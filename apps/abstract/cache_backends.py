@@ -0,0 +1,318 @@
+# Django
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+# Third-Party
+from django_redis.cache import RedisCache
+
+# Python
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from fnmatch import fnmatchcase
+from typing import Any, Iterable, Iterator, Optional
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+LOCAL_MAX_ENTRIES = 1024
+LOCAL_TIMEOUT = 30
+INVALIDATION_CHANNEL = 'cache-invalidation'
+RESUBSCRIBE_DELAY = 1
+
+
+class LocalCache:
+    """Bounded LRU with TTL, one per process.
+
+    Generation grows on every invalidation, so a value read
+    from Redis while it was invalidated is not stored."""
+
+    def __init__(
+        self,
+        max_entries: int = LOCAL_MAX_ENTRIES,
+        timeout: float = LOCAL_TIMEOUT
+    ):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self.lock = threading.Lock()
+        self.generation = 0
+
+    def get(self, key: str) -> Any:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return MISSING
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self.entries[key]
+                return MISSING
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, generation: int) -> None:
+        with self.lock:
+            if generation != self.generation:
+                return
+            self.entries[key] = (time.monotonic() + self.timeout, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, keys: Iterable[str] = (), pattern: str = '') -> None:
+        with self.lock:
+            self.generation += 1
+            for key in keys:
+                self.entries.pop(key, None)
+            if pattern:
+                for key in [key for key in self.entries
+                            if fnmatchcase(key, pattern)]:
+                    del self.entries[key]
+
+    def clear(self) -> None:
+        with self.lock:
+            self.generation += 1
+            self.entries.clear()
+
+
+class TwoTierCache(RedisCache):
+    """Redis cache with process local LRU in front of it.
+
+    Only keys matching LOCAL_KEYS patterns are kept locally.
+    Writes publish changed keys, every process drops its copy,
+    LOCAL_TIMEOUT bounds staleness if a message is lost.
+    Local values are shared between requests, treat them as
+    read only."""
+
+    def __init__(self, server: str, params: dict):
+        options = dict(params.get('OPTIONS', {}))
+        self.local_keys = tuple(options.pop('LOCAL_KEYS', ()))
+        self.channel = options.pop(
+            'INVALIDATION_CHANNEL',
+            INVALIDATION_CHANNEL
+        )
+        self.local = LocalCache(
+            max_entries=options.pop('LOCAL_MAX_ENTRIES', LOCAL_MAX_ENTRIES),
+            timeout=options.pop('LOCAL_TIMEOUT', LOCAL_TIMEOUT)
+        )
+        super().__init__(server, {**params, 'OPTIONS': options})
+        self.stats = Counter()
+        self.sender = ''
+        self.listener_lock = threading.Lock()
+        self.listener: Optional[threading.Thread] = None
+        self.listener_pid: Optional[int] = None
+
+    def get_local_key(
+        self,
+        key: str,
+        version: Optional[int]
+    ) -> Optional[str]:
+        """Local key, None when key is not kept locally."""
+
+        if not any(
+            fnmatchcase(key, pattern) for pattern in self.local_keys
+        ):
+            return None
+        self.ensure_listener()
+        return self.make_key(key, version)
+
+    def get_stats(self) -> dict[str, int]:
+        """Hits and misses per tier of this process."""
+
+        return {
+            name: self.stats[name] for name in (
+                'local_hits', 'local_misses', 'remote_hits', 'remote_misses'
+            )
+        }
+
+    @contextmanager
+    def remote_only(self) -> Iterator[None]:
+        """Bypass local tier, for benchmarks."""
+
+        local_keys, self.local_keys = self.local_keys, ()
+        try:
+            yield
+        finally:
+            self.local_keys = local_keys
+
+    def count_remote(self, found: bool) -> None:
+        self.stats['remote_hits' if found else 'remote_misses'] += 1
+
+    def get(
+        self,
+        key: str,
+        default: Any = None,
+        version: Optional[int] = None,
+        **kwargs: Any
+    ) -> Any:
+        local_key = self.get_local_key(key, version)
+        if local_key is not None:
+            value = self.local.get(local_key)
+            if value is not MISSING:
+                self.stats['local_hits'] += 1
+                return value
+            self.stats['local_misses'] += 1
+            generation = self.local.generation
+
+        value = super().get(key, MISSING, version, **kwargs)
+        self.count_remote(value is not MISSING)
+        if value is MISSING:
+            return default
+        if local_key is not None:
+            self.local.set(local_key, value, generation)
+        return value
+
+    def get_many(
+        self,
+        keys: Iterable[str],
+        version: Optional[int] = None,
+        **kwargs: Any
+    ) -> dict:
+        found = {}
+        remote = {}
+        for key in keys:
+            local_key = self.get_local_key(key, version)
+            if local_key is not None:
+                value = self.local.get(local_key)
+                if value is not MISSING:
+                    self.stats['local_hits'] += 1
+                    found[key] = value
+                    continue
+                self.stats['local_misses'] += 1
+            remote[key] = local_key
+        if not remote:
+            return found
+
+        generation = self.local.generation
+        values = super().get_many(list(remote), version, **kwargs)
+        for key, local_key in remote.items():
+            self.count_remote(key in values)
+            if key in values and local_key is not None:
+                self.local.set(local_key, values[key], generation)
+        found.update(values)
+        return found
+
+    def set(self, key: str, *args: Any, **kwargs: Any) -> Any:
+        result = super().set(key, *args, **kwargs)
+        self.invalidate([key], kwargs.get('version'))
+        return result
+
+    def add(self, key: str, *args: Any, **kwargs: Any) -> Any:
+        added = super().add(key, *args, **kwargs)
+        if added:
+            self.invalidate([key], kwargs.get('version'))
+        return added
+
+    def set_many(
+        self,
+        data: dict,
+        timeout: Any = DEFAULT_TIMEOUT,
+        version: Optional[int] = None,
+        **kwargs: Any
+    ) -> Any:
+        result = super().set_many(data, timeout, version, **kwargs)
+        self.invalidate(data, version)
+        return result
+
+    def delete(self, key: str, version: Optional[int] = None,
+               **kwargs: Any) -> Any:
+        result = super().delete(key, version, **kwargs)
+        self.invalidate([key], version)
+        return result
+
+    def delete_many(self, keys: Iterable[str], version: Optional[int] = None,
+                    **kwargs: Any) -> Any:
+        keys = list(keys)
+        result = super().delete_many(keys, version, **kwargs)
+        self.invalidate(keys, version)
+        return result
+
+    def incr(self, key: str, delta: int = 1, version: Optional[int] = None,
+             **kwargs: Any) -> int:
+        value = super().incr(key, delta, version, **kwargs)
+        self.invalidate([key], version)
+        return value
+
+    def delete_pattern(self, pattern: str, version: Optional[int] = None,
+                       **kwargs: Any) -> int:
+        count = super().delete_pattern(pattern, version, **kwargs)
+        if self.local_keys:
+            self.publish({'pattern': self.make_key(pattern, version)})
+        return count
+
+    def clear(self) -> Any:
+        result = super().clear()
+        self.publish({'clear': True})
+        return result
+
+    def invalidate(self, keys: Iterable[str], version: Optional[int]) -> None:
+        """Drop local copies of keys here and in other processes."""
+
+        local_keys = [
+            local_key for local_key in (
+                self.get_local_key(key, version) for key in keys
+            ) if local_key is not None
+        ]
+        if local_keys:
+            self.publish({'keys': local_keys})
+
+    def publish(self, message: dict) -> None:
+        self.ensure_listener()
+        self.handle_message(message)
+        try:
+            self.client.get_client(write=True).publish(
+                self.channel,
+                json.dumps({**message, 'sender': self.sender})
+            )
+        except Exception as error:
+            logger.warning(f'Cache invalidation not published: {error}')
+
+    def handle_message(self, message: dict) -> None:
+        if message.get('clear'):
+            self.local.clear()
+        else:
+            self.local.delete(
+                message.get('keys', ()),
+                message.get('pattern', '')
+            )
+
+    def ensure_listener(self) -> None:
+        """Start invalidation listener, again after fork."""
+
+        if self.listener_pid == os.getpid():
+            return
+        with self.listener_lock:
+            if self.listener_pid == os.getpid():
+                return
+            self.local.clear()
+            self.sender = uuid.uuid4().hex
+            self.listener = threading.Thread(
+                target=self.listen,
+                name='cache-invalidation',
+                daemon=True
+            )
+            self.listener.start()
+            self.listener_pid = os.getpid()
+
+    def listen(self) -> None:
+        while True:
+            try:
+                pubsub = self.client.get_client(write=False).pubsub(
+                    ignore_subscribe_messages=True
+                )
+                pubsub.subscribe(self.channel)
+                # Messages may be lost while unsubscribed.
+                self.local.clear()
+                for raw in pubsub.listen():
+                    message = json.loads(raw['data'])
+                    if message.get('sender') != self.sender:
+                        self.handle_message(message)
+            except Exception as error:
+                logger.warning(f'Cache invalidation listener: {error}')
+                self.local.clear()
+                time.sleep(RESUBSCRIBE_DELAY)
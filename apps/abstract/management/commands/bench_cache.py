@@ -0,0 +1,79 @@
+# Django Rest Framework
+from rest_framework.test import APIRequestFactory
+
+# Django
+from django.core.cache import cache
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+    CommandParser,
+)
+
+# Python
+from contextlib import nullcontext
+from statistics import quantiles
+from time import perf_counter
+from typing import Any, Callable
+
+# Local
+from skins.models import Skins
+from skins.views import CategoryViewSet, SkinsViewSet
+
+
+class Command(BaseCommand):
+    """Benchmark hot catalog reads with and without local tier."""
+
+    help = 'p50/p99 of categories list and skin retrieve on warm cache.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--requests', type=int, default=2000)
+
+    def measure(self, view: Callable, path: str, count: int,
+                **kwargs: Any) -> tuple[float, float]:
+        """Latency percentiles of view in ms, first call warms up."""
+
+        factory = APIRequestFactory()
+        view(factory.get(path), **kwargs)
+        timings = []
+        for _ in range(count):
+            started = perf_counter()
+            view(factory.get(path), **kwargs).render()
+            timings.append((perf_counter() - started) * 1000)
+        percentiles = quantiles(timings, n=100)
+        return percentiles[49], percentiles[98]
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """Handles benchmark run."""
+
+        skin = Skins.objects.order_by('id').first()
+        if skin is None:
+            raise CommandError('No skins, run generate_data first.')
+
+        views = (
+            (
+                'categories list',
+                CategoryViewSet.as_view({'get': 'list'}),
+                '/api/v1/categories/',
+                {},
+            ),
+            (
+                'skin retrieve',
+                SkinsViewSet.as_view({'get': 'retrieve'}),
+                f'/api/v1/items/{skin.id}/',
+                {'pk': str(skin.id)},
+            ),
+        )
+        local = hasattr(cache, 'remote_only')
+        modes = [('redis only', cache.remote_only)] if local else []
+        modes.append(('two tier' if local else 'default', nullcontext))
+
+        for mode, context in modes:
+            for name, view, path, kwargs in views:
+                with context():
+                    p50, p99 = self.measure(
+                        view, path, options['requests'], **kwargs
+                    )
+                print(f'{mode:<10} {name:<16} '
+                      f'p50 {p50:.3f} ms, p99 {p99:.3f} ms')
+        if local:
+            print(f'Cache stats: {cache.get_stats()}')
@@ -0,0 +1,87 @@
+# Django
+from django.core.management.base import BaseCommand, CommandParser
+
+# Third-Party
+from openpyxl import Workbook
+
+# Python
+from datetime import datetime
+from time import perf_counter
+from typing import Any
+import logging
+import os
+import tempfile
+
+# Local
+from settings.logger import QueueFileHandler, compact_logs
+
+
+class LegacyExcelHandler(logging.Handler):
+    """Old handler, saves whole workbook on every record."""
+
+    def __init__(self, filepath):
+        super().__init__(logging.INFO)
+        self.filepath = filepath
+        self.workbook = Workbook()
+
+    def emit(self, record):
+        created = datetime.fromtimestamp(record.created)
+        self.workbook.active.append([
+            record.levelname,
+            created.strftime("%Y-%m-%d"),
+            created.strftime("%H:%M:%S"),
+            self.format(record)
+        ])
+        self.workbook.save(self.filepath)
+
+
+class Command(BaseCommand):
+    """Benchmark logging cost inside request."""
+
+    help = 'Compare per-record excel saves and queued JSON lines.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--lines', type=int, default=10_000)
+
+    def measure(self, name: str, handler: logging.Handler, lines: int):
+        logger = logging.getLogger(f'bench.{name}')
+        logger.propagate = False
+        logger.addHandler(handler)
+        timings = []
+        try:
+            for num in range(lines):
+                started = perf_counter()
+                logger.info(f'Request {num} handled')
+                timings.append((perf_counter() - started) * 1000)
+        finally:
+            logger.removeHandler(handler)
+            handler.close()
+
+        timings.sort()
+        print(f'{name:<7} p50 {timings[len(timings) // 2]:.3f} ms, '
+              f'p99 {timings[int(len(timings) * 0.99)]:.3f} ms, '
+              f'total {sum(timings) / 1000:.2f} s')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """Handles benchmark run."""
+
+        lines = options['lines']
+        with tempfile.TemporaryDirectory() as folder:
+            self.measure(
+                'excel',
+                LegacyExcelHandler(os.path.join(folder, 'legacy.xlsx')),
+                lines
+            )
+
+            source = os.path.join(folder, 'logs.jsonl')
+            self.measure('queue', QueueFileHandler(source), lines)
+
+            start: datetime = datetime.now()
+            compact_logs(
+                source=source,
+                export=os.path.join(folder, 'logs.xlsx')
+            )
+            print(
+                f'Compacted {lines} lines in: '
+                f'{(datetime.now()-start).total_seconds()} seconds.'
+            )
@@ -0,0 +1,105 @@
+# Django Rest Framework
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+# Django
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection, transaction
+
+# Python
+from datetime import datetime
+from time import perf_counter
+from typing import Any
+from urllib.parse import parse_qs, urlparse
+import random
+
+# Local
+from abstract.paginators import AbstractPaginator
+from skins.models import Skins
+
+
+class Command(BaseCommand):
+    """Benchmark page number against cursor pagination."""
+
+    help = 'Compare page 1 and deep page latency on generated skins.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--rows', type=int, default=1_000_000)
+        parser.add_argument('--page', type=int, default=1000)
+        parser.add_argument('--size', type=int, default=25)
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Keep generated rows instead of rolling back.'
+        )
+
+    def generate_skins(self, rows: int) -> None:
+        """Insert synthetic skins with bulk_create."""
+
+        batch = 10_000
+        for start in range(0, rows, batch):
+            Skins.objects.bulk_create(
+                Skins(
+                    title=f'Bench {num}',
+                    name=f'Bench hero {num % 500}',
+                    grade='Mythical',
+                    rating=num % 6,
+                    category=num % 9,
+                    priceWithoutSale=random.randint(100, 5000),
+                    sale=0,
+                    realPrice=random.randint(100, 5000),
+                )
+                for num in range(start, min(start + batch, rows))
+            )
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Skins._meta.db_table}')
+
+    def timed_page(self, params: dict) -> tuple[float, dict]:
+        """Paginate one page, return latency in ms and pagination."""
+
+        paginator = AbstractPaginator()
+        request = Request(
+            APIRequestFactory().get('/api/v1/items/', params)
+        )
+        queryset = Skins.objects.order_by('realPrice')
+        started = perf_counter()
+        page = paginator.paginate_queryset(queryset, request)
+        response = paginator.get_paginated_response(
+            [skin.id for skin in page],
+            200
+        )
+        elapsed = (perf_counter() - started) * 1000
+        return elapsed, response.data['pagination']
+
+    def benchmark(self, page: int, size: int) -> None:
+        """Measure page number and cursor modes."""
+
+        first, _ = self.timed_page({'page': 1, 'size': size})
+        deep, _ = self.timed_page({'page': page, 'size': size})
+        print(f'page number: page 1 {first:.2f} ms, '
+              f'page {page} {deep:.2f} ms')
+
+        first, pagination = self.timed_page({'cursor': '', 'size': size})
+        deep = first
+        for _ in range(page - 1):
+            query = parse_qs(urlparse(pagination['next']).query)
+            cursor = query['cursor'][0]
+            deep, pagination = self.timed_page(
+                {'cursor': cursor, 'size': size}
+            )
+        print(f'cursor:      page 1 {first:.2f} ms, '
+              f'page {page} {deep:.2f} ms')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """Handles benchmark run."""
+
+        start: datetime = datetime.now()
+        with transaction.atomic():
+            self.generate_skins(options['rows'])
+            print(
+                f'Generated {options["rows"]} rows in: '
+                f'{(datetime.now()-start).total_seconds()} seconds.'
+            )
+            self.benchmark(options['page'], options['size'])
+            if not options['keep']:
+                transaction.set_rollback(True)
@@ -0,0 +1,98 @@
+# Django
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection
+
+# Python
+from time import perf_counter
+from typing import Any, Callable
+import threading
+import time
+
+# Local
+from abstract.cache import CachedRows, cached
+from skins.models import Categories
+from skins.serializers import CategorySerializer
+
+
+BENCH_KEY = 'bench_stampede_categories'
+
+
+class Command(BaseCommand):
+    """Load test of cache expiry under concurrent clients."""
+
+    help = 'DB queries per second at expiry, cache-aside vs cached().'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--clients', type=int, default=200)
+        parser.add_argument('--requests', type=int, default=20)
+        parser.add_argument(
+            '--compute-delay',
+            type=float,
+            default=0.05,
+            help='Extra seconds of recompute, like a slow query.'
+        )
+
+    def compute(self) -> CachedRows:
+        time.sleep(self.delay)
+        return CachedRows.from_serializer(
+            CategorySerializer,
+            Categories.objects.all()
+        )
+
+    def cache_aside(self) -> Any:
+        """Old views shape: every miss recomputes."""
+
+        value = cache.get(BENCH_KEY)
+        if not value:
+            value = self.compute()
+            cache.set(BENCH_KEY, value, timeout=60)
+        return value
+
+    def with_cached(self) -> Any:
+        return cached(BENCH_KEY, self.compute, timeout=60)
+
+    def run(self, read: Callable, clients: int, requests: int) -> None:
+        """All clients start together right after expiry."""
+
+        queries = []
+        lock = threading.Lock()
+        barrier = threading.Barrier(clients)
+
+        def count(execute, sql, params, many, context):
+            with lock:
+                queries.append(perf_counter())
+            return execute(sql, params, many, context)
+
+        def client():
+            try:
+                with connection.execute_wrapper(count):
+                    barrier.wait()
+                    for _ in range(requests):
+                        read()
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=client) for _ in range(clients)]
+        started = perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = perf_counter() - started
+
+        first_second = sum(1 for at in queries if at - started < 1)
+        print(
+            f'{read.__name__:<12} {len(queries)} queries in '
+            f'{elapsed:.2f} s, {first_second} in first second, '
+            f'{len(queries) / elapsed:.1f} queries/s'
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """Handles load test run."""
+
+        self.delay = options['compute_delay']
+        for read in (self.cache_aside, self.with_cached):
+            cache.delete(BENCH_KEY)
+            self.run(read, options['clients'], options['requests'])
+        cache.delete(BENCH_KEY)
@@ -0,0 +1,28 @@
+# Django
+from django.core.management.base import BaseCommand
+
+# Python
+from datetime import datetime
+from typing import Any
+
+# Local
+from settings.logger import compact_logs
+
+
+class Command(BaseCommand):
+    """Move collected log lines to excel export."""
+
+    help = 'Compact serv_logs.jsonl into rotated xlsx exports.'
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """Handles compaction."""
+
+        start: datetime = datetime.now()
+        moved = compact_logs()
+        if moved is None:
+            print('Logs are compacted by another process.')
+            return
+        print(
+            f'Moved {moved} lines in: '
+            f'{(datetime.now()-start).total_seconds()} seconds.'
+        )
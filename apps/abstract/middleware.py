@@ -0,0 +1,60 @@
+# Django
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+
+# Python
+from time import perf_counter
+from typing import Callable
+import logging
+
+# Local
+from .query_budget import REPEAT_THRESHOLD, QueryRecorder
+
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetMiddleware:
+    """Logs SQL queries count and time per view, warns about
+    requests over QUERY_BUDGET and repeated query shapes."""
+
+    def __init__(self, get_response: Callable):
+        self.get_response = get_response
+        self.budget = getattr(settings, 'QUERY_BUDGET', 30)
+        self.threshold = getattr(
+            settings,
+            'QUERY_REPEAT_THRESHOLD',
+            REPEAT_THRESHOLD
+        )
+
+    def get_view_name(self, request: HttpRequest) -> str:
+        match = request.resolver_match
+        if match is None:
+            return request.path
+        return match.view_name or match._func_path
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        started = perf_counter()
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+        elapsed = (perf_counter() - started) * 1000
+
+        view = f'{request.method} {self.get_view_name(request)}'
+        logger.info(
+            f'{view}: {recorder.count} queries, '
+            f'{recorder.duration * 1000:.1f} ms in db, '
+            f'{elapsed:.1f} ms total'
+        )
+        if recorder.count > self.budget:
+            logger.warning(
+                f'{view}: {recorder.count} queries, '
+                f'budget is {self.budget}'
+            )
+        repeated = recorder.get_repeated(self.threshold)
+        if repeated:
+            logger.warning(f'{view}: N+1 suspected {repeated}')
+
+        if settings.DEBUG:
+            response['X-Query-Count'] = str(recorder.count)
+            response['X-Query-Time'] = f'{recorder.duration * 1000:.1f}'
+        return response
@@ -34,6 +34,12 @@ class ResponseMixin:
             status=STATUS_CODES[status]
         )
 
+    def get_paginator(self, paginator: Any) -> Any:
+        """New paginator for one request, the one set on
+        view class is shared by all requests of the worker."""
+
+        return type(paginator)()
+
     def response_with_exception(
         self,
         key_name: str = 'exception',
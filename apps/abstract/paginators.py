@@ -1,34 +1,248 @@
 # Django Rest Framework
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 from rest_framework.utils.serializer_helpers import ReturnList
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+# Django
+from django.core.exceptions import FieldDoesNotExist
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q, QuerySet
+
+# Python
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from typing import Any, Optional
+import json
+import math
 
 
 class AbstractPaginator(PageNumberPagination):
-    """Paginator maybe for all."""
+    """Paginator maybe for all.
+
+    Works by page number, or by cursor when request has
+    `cursor` query param (empty value means first page).
+    Cursor mode pages by (sort column, id) without OFFSET
+    and counts pages only with `count=true`."""
 
     page_size_query_param: str = 'size'
     page_query_param: str = 'page'
+    cursor_query_param: str = 'cursor'
+    count_query_param: str = 'count'
     max_page_size: int = 50
     page_size: int = 25
 
+    def paginate_queryset(
+        self,
+        queryset: Any,
+        request: Any,
+        view: Any = None
+    ) -> Optional[list]:
+
+        self.cursor_mode = \
+            self.cursor_query_param in request.query_params
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.num_pages = None
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(
+            request.query_params.get(self.cursor_query_param)
+        )
+        if request.query_params.get(self.count_query_param) in (
+            'true', '1'
+        ):
+            total = len(queryset) \
+                if isinstance(queryset, list) else queryset.count()
+            # Same meaning as count of page mode.
+            self.num_pages = max(math.ceil(total / page_size), 1)
+
+        if isinstance(queryset, QuerySet):
+            return self.paginate_by_keyset(queryset, cursor, page_size)
+        return self.paginate_by_position(queryset, cursor, page_size)
+
+    def paginate_by_position(
+        self,
+        objects: list,
+        cursor: Optional[dict],
+        page_size: int
+    ) -> list:
+        """Cursor over in-memory list, it keeps position only."""
+
+        offset = cursor.get('o', 0) if cursor else 0
+        if not isinstance(offset, int) or offset < 0:
+            raise NotFound('Invalid cursor.')
+        page = objects[offset:offset + page_size]
+
+        self.next_cursor = {'o': offset + page_size} \
+            if offset + page_size < len(objects) else None
+        self.previous_cursor = {'o': max(offset - page_size, 0)} \
+            if offset > 0 else None
+        return page
+
+    def paginate_by_keyset(
+        self,
+        queryset: QuerySet,
+        cursor: Optional[dict],
+        page_size: int
+    ) -> list:
+        """Cursor over QuerySet, filters by last seen key."""
+
+        field, descending = self.get_sort_field(queryset)
+        reverse = bool(cursor and cursor.get('r'))
+        if reverse:
+            descending = not descending
+
+        direction = '-' if descending else ''
+        ordering = [f'{direction}pk'] if field == 'pk' \
+            else [f'{direction}{field}', f'{direction}pk']
+        queryset = queryset.order_by(*ordering)
+
+        if cursor:
+            if 'id' not in cursor:
+                raise NotFound('Invalid cursor.')
+            queryset = queryset.filter(
+                self.get_keyset_filter(
+                    queryset,
+                    field,
+                    descending,
+                    cursor.get('v'),
+                    cursor['id']
+                )
+            )
+
+        page = list(queryset[:page_size + 1])
+        has_more = len(page) > page_size
+        page = page[:page_size]
+        if reverse:
+            page.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, bool(cursor)
+
+        self.next_cursor = self.get_item_cursor(page[-1], field) \
+            if page and has_next else None
+        self.previous_cursor = None
+        if page and has_previous:
+            self.previous_cursor = {
+                **self.get_item_cursor(page[0], field),
+                'r': True
+            }
+        return page
+
+    def get_sort_field(self, queryset: QuerySet) -> tuple[str, bool]:
+        """Return first ordering column and its direction."""
+
+        ordering = queryset.query.order_by \
+            or queryset.model._meta.ordering
+        field = ordering[0] if ordering else 'pk'
+        if not isinstance(field, str) or field.lstrip('-') == '?':
+            field = 'pk'
+
+        descending = field.startswith('-')
+        field = field.lstrip('-')
+        if field == queryset.model._meta.pk.name:
+            field = 'pk'
+        return field, descending
+
+    def get_keyset_filter(
+        self,
+        queryset: QuerySet,
+        field: str,
+        descending: bool,
+        value: Any,
+        pk: Any
+    ) -> Q:
+        """Build rows-after-cursor condition, NULLs are placed
+        like PostgreSQL does: last on ASC, first on DESC."""
+
+        lookup = 'lt' if descending else 'gt'
+        after_pk = Q(**{f'pk__{lookup}': pk})
+        if field == 'pk':
+            return after_pk
+
+        try:
+            nullable = queryset.model._meta.get_field(field).null
+        except FieldDoesNotExist:
+            nullable = False
+
+        if value is None:
+            condition = Q(**{f'{field}__isnull': True}) & after_pk
+            if descending:
+                condition |= Q(**{f'{field}__isnull': False})
+            return condition
+
+        condition = Q(**{f'{field}__{lookup}': value}) \
+            | (Q(**{field: value}) & after_pk)
+        if nullable and not descending:
+            condition |= Q(**{f'{field}__isnull': True})
+        return condition
+
+    def get_item_cursor(self, item: Any, field: str) -> dict:
+        """Cursor pointing at given item."""
+
+        cursor = {'id': item.pk}
+        if field != 'pk':
+            value = item
+            for part in field.split('__'):
+                value = getattr(value, part, None)
+            cursor['v'] = value
+        return cursor
+
+    def encode_cursor(self, cursor: dict) -> str:
+        data = json.dumps(cursor, cls=DjangoJSONEncoder)
+        return urlsafe_b64encode(data.encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, encoded: Optional[str]) -> Optional[dict]:
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            if not isinstance(cursor, dict):
+                raise ValueError(cursor)
+            return cursor
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound('Invalid cursor.')
+
+    def get_cursor_link(self, cursor: Optional[dict]) -> Optional[str]:
+        if cursor is None:
+            return None
+        url = remove_query_param(
+            self.request.build_absolute_uri(),
+            self.page_query_param
+        )
+        return replace_query_param(
+            url,
+            self.cursor_query_param,
+            self.encode_cursor(cursor)
+        )
+
     def get_paginated_response(
         self,
         data: ReturnList,
         status
     ) -> Response:
 
+        if getattr(self, 'cursor_mode', False):
+            pagination = {
+                'next': self.get_cursor_link(self.next_cursor),
+                'previous': self.get_cursor_link(self.previous_cursor),
+                'count': self.num_pages
+            }
+        else:
+            pagination = {
+                'next': self.get_next_link(),
+                'previous': self.get_previous_link(),
+                'count': self.page.paginator.num_pages
+            }
+
         response: Response = \
             Response(
                 {
-                    'pagination': {
-                        'next': self.get_next_link(),
-                        'previous': self.get_previous_link(),
-                        'count': self.page.paginator.num_pages
-                    },
+                    'pagination': pagination,
                     'items': data,
                 },
                 status=status
             )
         return response
-
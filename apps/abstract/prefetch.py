@@ -0,0 +1,79 @@
+# Django Rest Framework
+from rest_framework.serializers import ListSerializer, ModelSerializer
+
+# Django
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch, QuerySet
+
+# Python
+from typing import Any, Iterable
+
+
+class PrefetchPlan:
+    """select_related, prefetch_related and only() of a view,
+    so its page renders in constant number of queries."""
+
+    def __init__(
+        self,
+        select_related: Iterable[str] = (),
+        prefetch_related: Iterable[Any] = (),
+        only: Iterable[str] = ()
+    ):
+        self.select_related = tuple(select_related)
+        self.prefetch_related = tuple(prefetch_related)
+        self.only = tuple(only)
+
+    def apply(self, queryset: QuerySet) -> QuerySet:
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        if self.only:
+            queryset = queryset.only(*self.only)
+        return queryset
+
+    @classmethod
+    def for_serializer(
+        cls,
+        serializer_class: type[ModelSerializer],
+        only: Iterable[str] = ()
+    ) -> 'PrefetchPlan':
+        """Plan matching fields of serializer: nested serializers
+        become joins or prefetches, model fields go to only().
+        Method fields need their columns passed in `only`."""
+
+        plan = cls(only=only)
+        plan.add_serializer(serializer_class(), '')
+        return plan
+
+    def add_serializer(self, serializer: ModelSerializer, prefix: str):
+        model = serializer.Meta.model
+        for field in serializer.fields.values():
+            source = field.source
+            if source == '*' or '.' in source:
+                continue
+            path = f'{prefix}{source}'
+
+            if isinstance(field, ListSerializer) \
+                    and isinstance(field.child, ModelSerializer):
+                relation = model._meta.get_field(source)
+                child = self.for_serializer(
+                    type(field.child),
+                    only=(relation.field.name,)
+                )
+                self.prefetch_related += (Prefetch(
+                    path,
+                    queryset=child.apply(
+                        field.child.Meta.model.objects.all()
+                    )
+                ),)
+            elif isinstance(field, ModelSerializer):
+                self.select_related += (path,)
+                self.only += (path,)
+                self.add_serializer(field, f'{path}__')
+            else:
+                try:
+                    model._meta.get_field(source)
+                except FieldDoesNotExist:
+                    continue
+                self.only += (path,)
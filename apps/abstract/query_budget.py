@@ -0,0 +1,137 @@
+# Django
+from django.db import connections
+
+# Python
+from collections import Counter
+from contextlib import ExitStack
+from time import perf_counter
+from typing import Any, Callable, Optional
+import re
+
+
+REPEAT_THRESHOLD = 5
+
+PLACEHOLDERS_RE = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+LITERALS_RE = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+
+def get_query_shape(sql: str) -> str:
+    """SQL without values, IN lists of any length look the same."""
+
+    sql = PLACEHOLDERS_RE.sub('(%s, ...)', sql)
+    return LITERALS_RE.sub('?', sql)
+
+
+class QueryRecorder:
+    """Counts SQL queries and their time on all connections."""
+
+    def __init__(self):
+        self.queries: list[tuple[str, float]] = []
+        # Single statements with params, to plan them later.
+        self.statements: list[tuple[str, Any]] = []
+        self.stack = ExitStack()
+
+    def __call__(
+        self,
+        execute: Callable,
+        sql: str,
+        params: Any,
+        many: bool,
+        context: dict
+    ) -> Any:
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, perf_counter() - started))
+            if not many:
+                self.statements.append((sql, params))
+
+    def __enter__(self) -> 'QueryRecorder':
+        for connection in connections.all():
+            self.stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stack.close()
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    @property
+    def duration(self) -> float:
+        return sum(duration for _, duration in self.queries)
+
+    def get_repeated(
+        self,
+        threshold: int = REPEAT_THRESHOLD
+    ) -> dict[str, int]:
+        """Query shapes run at least threshold times, N+1 suspects."""
+
+        shapes = Counter(get_query_shape(sql) for sql, _ in self.queries)
+        return {
+            shape: count for shape, count in shapes.items()
+            if count >= threshold
+        }
+
+
+class QueryBudgetMixin:
+    """Query count assertions for TestCase."""
+
+    def assertMaxQueries(
+        self,
+        num: int,
+        func: Optional[Callable] = None,
+        *args: Any,
+        **kwargs: Any
+    ) -> Any:
+        """Like assertNumQueries, but fails only above num and
+        reports repeated query shapes. Works as context manager
+        when func is not given."""
+
+        context = _MaxQueriesContext(self, num)
+        if func is None:
+            return context
+        with context:
+            return func(*args, **kwargs)
+
+    def assertNoRepeatedQueries(
+        self,
+        func: Callable,
+        *args: Any,
+        threshold: int = REPEAT_THRESHOLD,
+        **kwargs: Any
+    ) -> Any:
+        with QueryRecorder() as recorder:
+            result = func(*args, **kwargs)
+        repeated = recorder.get_repeated(threshold)
+        if repeated:
+            self.fail(f'Repeated queries (N+1): {repeated}')
+        return result
+
+
+class _MaxQueriesContext:
+
+    def __init__(self, test_case: Any, num: int):
+        self.test_case = test_case
+        self.num = num
+        self.recorder = QueryRecorder()
+
+    def __enter__(self) -> QueryRecorder:
+        return self.recorder.__enter__()
+
+    def __exit__(self, exc_type: Any, *exc_info: Any) -> None:
+        self.recorder.__exit__(exc_type, *exc_info)
+        if exc_type is not None:
+            return
+        if self.recorder.count > self.num:
+            queries = '\n'.join(
+                f'{num}. {sql}'
+                for num, (sql, _) in enumerate(self.recorder.queries, 1)
+            )
+            self.test_case.fail(
+                f'{self.recorder.count} queries executed, '
+                f'{self.num} allowed, repeated: '
+                f'{self.recorder.get_repeated(2)}\n{queries}'
+            )
@@ -0,0 +1,106 @@
+# Django
+from django.db import connection
+from django.db.models import QuerySet
+
+# Python
+from typing import Any, Callable, Iterable, Optional
+
+# Local
+from .query_budget import QueryRecorder
+
+
+EXPLAINABLE = ('SELECT', 'WITH', 'UPDATE', 'DELETE')
+
+
+def explain_sql(sql: str, params: Any = None) -> dict:
+    """PostgreSQL plan of SQL statement as dict."""
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    return plan[0]['Plan']
+
+
+def explain(queryset: QuerySet) -> dict:
+    """PostgreSQL plan of queryset as dict."""
+
+    return explain_sql(*queryset.query.sql_with_params())
+
+
+def get_seq_scans(plan: dict, tables: Optional[Iterable[str]] = None) -> list:
+    """Tables read by sequential scan anywhere in plan."""
+
+    tables = set(tables) if tables is not None else None
+    found = []
+    nodes = [plan]
+    while nodes:
+        node = nodes.pop()
+        relation = node.get('Relation Name')
+        if node.get('Node Type') == 'Seq Scan' and (
+            tables is None or relation in tables
+        ):
+            found.append(relation)
+        nodes.extend(node.get('Plans', []))
+    return found
+
+
+class QueryPlanMixin:
+    """Assertions on query plans for TestCase.
+
+    Sequential scans are disabled while planning, so small test
+    data still gives a seq scan only when no index can serve."""
+
+    def get_plan(self, sql: str, params: Any = None) -> dict:
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        try:
+            return explain_sql(sql, params)
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = on')
+
+    def assertNoSeqScan(
+        self,
+        queryset: QuerySet,
+        tables: Optional[Iterable[str]] = None
+    ) -> None:
+        seq_scans = get_seq_scans(
+            self.get_plan(*queryset.query.sql_with_params()),
+            tables
+        )
+        if seq_scans:
+            self.fail(
+                f'Sequential scan on {", ".join(seq_scans)}:\n'
+                f'{queryset.query}'
+            )
+
+    def assertNoSeqScanIn(
+        self,
+        func: Callable,
+        *args: Any,
+        tables: Optional[Iterable[str]] = None,
+        **kwargs: Any
+    ) -> Any:
+        """Run func, then plan every query it sent to database.
+        Fails on a sequential scan, or if func sent no query."""
+
+        with QueryRecorder() as recorder:
+            result = func(*args, **kwargs)
+
+        statements = [
+            (sql, params) for sql, params in recorder.statements
+            if sql.lstrip().upper().startswith(EXPLAINABLE)
+        ]
+        if not statements:
+            self.fail('No queries to explain')
+
+        failed = []
+        for sql, params in statements:
+            seq_scans = get_seq_scans(self.get_plan(sql, params), tables)
+            if seq_scans:
+                failed.append(
+                    f'Sequential scan on {", ".join(seq_scans)}:\n{sql}'
+                )
+        if failed:
+            self.fail('\n\n'.join(failed))
+        return result
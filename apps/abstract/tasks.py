@@ -0,0 +1,12 @@
+# Local
+from settings.celery import app
+from settings.logger import compact_logs
+
+
+@app.task(
+    name='compact-logs'
+)
+def compact_server_logs():
+    """Task for move collected log lines to excel export."""
+
+    compact_logs()
@@ -1,3 +1,758 @@
-from django.test import TestCase
+# Django Rest Framework
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
 
-# Create your tests here.
+# Django
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings, tag
+
+# Third-Party
+from openpyxl import load_workbook
+
+# Python
+from unittest import mock, skipUnless
+import logging
+import threading
+import time
+import os
+import tempfile
+
+# Local
+from settings.logger import QueueFileHandler, compact_logs
+from auths.friends import make_friends
+from auths.models import Client, Invites
+from basket.models import BasketItem, SkinsBasket
+from messenger import crypto
+from messenger.models import ChatRoom, Messages
+from skins.models import Reviews, Skins, UserSkins
+from skins.tasks import send_mail_about_new_skins
+from .cache_backends import MISSING, LocalCache
+from .mixins import ResponseMixin
+from .cache import (
+    LOCK_KEY,
+    CachedRows,
+    cached,
+    invalidate_tags,
+    skin_tag,
+    user_tag,
+)
+from .paginators import AbstractPaginator
+from .query_budget import QueryBudgetMixin, QueryRecorder, get_query_shape
+from .query_plans import QueryPlanMixin, get_seq_scans
+
+
+class AbstractPaginatorCursorTestCase(TestCase):
+    """Tests for cursor mode of paginator."""
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.paginator = AbstractPaginator()
+        self.objects = list(range(1, 61))
+
+
+    def get_request(self, **params):
+        return Request(self.factory.get('/api/v1/items/', params))
+
+
+    def test_first_page_without_count(self):
+        request = self.get_request(cursor='', size=25)
+        page = self.paginator.paginate_queryset(self.objects, request)
+        response = self.paginator.get_paginated_response(page, 200)
+
+        self.assertEqual(page, list(range(1, 26)))
+        self.assertIsNone(response.data['pagination']['count'])
+        self.assertIsNone(response.data['pagination']['previous'])
+        self.assertIn('cursor=', response.data['pagination']['next'])
+
+
+    def test_next_page_with_count(self):
+        cursor = self.paginator.encode_cursor({'o': 50})
+        request = self.get_request(cursor=cursor, size=25, count='true')
+        page = self.paginator.paginate_queryset(self.objects, request)
+        response = self.paginator.get_paginated_response(page, 200)
+
+        self.assertEqual(page, list(range(51, 61)))
+        self.assertEqual(response.data['pagination']['count'], 3)
+        self.assertIsNone(response.data['pagination']['next'])
+
+
+    def test_cursor_roundtrip(self):
+        cursor = {'v': 100, 'id': 7, 'r': True}
+        self.assertEqual(
+            self.paginator.decode_cursor(
+                self.paginator.encode_cursor(cursor)
+            ),
+            cursor
+        )
+
+
+    def test_invalid_cursor(self):
+        request = self.get_request(cursor='not-a-cursor')
+        with self.assertRaises(NotFound):
+            self.paginator.paginate_queryset(self.objects, request)
+
+
+    def test_paginator_per_request(self):
+        shared = AbstractPaginator()
+        paginator = ResponseMixin().get_paginator(shared)
+        paginator.paginate_queryset(self.objects, self.get_request(cursor=''))
+
+        self.assertIsInstance(paginator, AbstractPaginator)
+        self.assertTrue(paginator.cursor_mode)
+        self.assertFalse(hasattr(shared, 'cursor_mode'))
+
+
+    def test_page_mode_is_default(self):
+        request = self.get_request(page=2, size=25)
+        page = self.paginator.paginate_queryset(self.objects, request)
+        response = self.paginator.get_paginated_response(page, 200)
+
+        self.assertEqual(list(page), list(range(26, 51)))
+        self.assertEqual(response.data['pagination']['count'], 3)
+
+
+class AbstractPaginatorKeysetTestCase(TestCase):
+    """Tests for cursor mode over QuerySet."""
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.prices = {}
+        for num, price in enumerate([300, None, 100, 200, None, 100]):
+            skin = Skins.objects.create(
+                title=f'Skin {num}',
+                name=f'Skin {num}',
+                grade='Mythical',
+                rating=0,
+                category=1,
+                priceWithoutSale=100,
+                sale=0
+            )
+            Skins.objects.filter(id=skin.id).update(realPrice=price)
+            self.prices[skin.id] = price
+
+
+    def get_page(self, queryset, cursor=None):
+        paginator = AbstractPaginator()
+        params = {'cursor': '', 'size': 2}
+        if cursor is not None:
+            params['cursor'] = paginator.encode_cursor(cursor)
+        request = Request(self.factory.get('/api/v1/items/', params))
+        page = paginator.paginate_queryset(queryset, request)
+        return (
+            [skin.id for skin in page],
+            paginator.next_cursor,
+            paginator.previous_cursor
+        )
+
+
+    def get_all_pages(self, queryset):
+        ids, cursor, _ = self.get_page(queryset)
+        while cursor is not None:
+            page, cursor, _ = self.get_page(queryset, cursor)
+            ids += page
+        return ids
+
+
+    def test_nulls_last_ascending(self):
+        ids = self.get_all_pages(Skins.objects.order_by('realPrice'))
+
+        self.assertEqual(ids, sorted(
+            self.prices,
+            key=lambda pk: (self.prices[pk] is None, self.prices[pk], pk)
+        ))
+
+
+    def test_nulls_first_descending(self):
+        ids = self.get_all_pages(Skins.objects.order_by('-realPrice'))
+
+        self.assertEqual(ids, sorted(
+            self.prices,
+            key=lambda pk: (
+                self.prices[pk] is not None,
+                -(self.prices[pk] or 0),
+                -pk
+            )
+        ))
+
+
+    def test_previous_cursor_returns_previous_page(self):
+        queryset = Skins.objects.order_by('realPrice')
+        first, cursor, _ = self.get_page(queryset)
+        second, cursor, previous = self.get_page(queryset, cursor)
+        back, _, before_first = self.get_page(queryset, previous)
+
+        self.assertEqual(back, first)
+        self.assertIsNone(before_first)
+
+        _, _, previous = self.get_page(queryset, cursor)
+        self.assertEqual(self.get_page(queryset, previous)[0], second)
+
+
+class QueueFileHandlerTestCase(TestCase):
+    """Tests for queued logging and excel compaction."""
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.folder.name, 'logs.jsonl')
+        self.export = os.path.join(self.folder.name, 'logs.xlsx')
+        self.logger = logging.getLogger('tests.queue')
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+
+    def write_logs(self, count):
+        handler = QueueFileHandler(self.source)
+        self.logger.addHandler(handler)
+        for num in range(count):
+            self.logger.info(f'info {num}')
+        self.logger.warning('warning')
+        self.logger.removeHandler(handler)
+        handler.close()
+
+
+    def test_records_are_written_as_json_lines(self):
+        self.write_logs(3)
+
+        with open(self.source, encoding='utf-8') as file:
+            lines = file.readlines()
+        self.assertEqual(len(lines), 4)
+        self.assertIn('"message": "info 0"', lines[0])
+
+
+    def test_compaction_moves_lines_and_rotates(self):
+        self.write_logs(3)
+        self.assertEqual(
+            compact_logs(self.source, self.export, max_rows=4, backups=2),
+            4
+        )
+        self.write_logs(1)
+        compact_logs(self.source, self.export, max_rows=4, backups=2)
+
+        workbook = load_workbook(self.export)
+        rotated = load_workbook(self.export.replace('.xlsx', '.1.xlsx'))
+        self.assertEqual(os.path.getsize(self.source), 0)
+        self.assertEqual(rotated['INFO'].max_row, 3)
+        self.assertEqual(rotated['WARNING'].max_row, 1)
+        self.assertEqual(workbook['INFO']['D1'].value, 'info 0')
+
+
+LARGE_TABLES = [
+    model._meta.db_table
+    for model in (Skins, Reviews, Invites, Messages, ChatRoom)
+]
+
+
+@tag('explain')
+@skipUnless(connection.vendor == 'postgresql', 'EXPLAIN needs PostgreSQL')
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+})
+class QueryPlanTestCase(QueryPlanMixin, TestCase):
+    """Queries sent by views and tasks must be served by indexes.
+    Run alone with `manage.py test --tag explain`."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            Client.objects.create_user(
+                username=f'user{num}',
+                email=f'user{num}@example.com',
+                password='password',
+                cash=0
+            )
+            for num in range(3)
+        ]
+        cls.skins = Skins.objects.bulk_create(
+            Skins(
+                title=f'Skin {num}',
+                name='Skin',
+                grade='Mythical',
+                rating=0,
+                category=num % 5,
+                priceWithoutSale=100 + num,
+                sale=0,
+                realPrice=100 + num
+            )
+            for num in range(200)
+        )
+        Reviews.objects.bulk_create(
+            Reviews(user=user, skin=skin, rating=5)
+            for user in cls.users for skin in cls.skins[:50]
+        )
+        Invites.objects.create(
+            from_user=cls.users[0],
+            to_user=cls.users[1]
+        )
+        cls.chat = ChatRoom.objects.create(
+            title='chat',
+            members=[user.id for user in cls.users[:2]]
+        )
+        Messages.objects.bulk_create(
+            Messages(chat=cls.chat, sender=cls.users[0], content=str(num))
+            for num in range(100)
+        )
+        with connection.cursor() as cursor:
+            for table in LARGE_TABLES:
+                cursor.execute(f'ANALYZE {table}')
+
+
+    def test_seq_scan_is_found(self):
+        plan = {
+            'Node Type': 'Limit',
+            'Plans': [{'Node Type': 'Seq Scan', 'Relation Name': 'big'}],
+        }
+
+        self.assertEqual(get_seq_scans(plan), ['big'])
+        self.assertEqual(get_seq_scans(plan, ['other']), [])
+
+
+    def test_view_queries_are_planned(self):
+        with self.assertRaises(AssertionError):
+            self.assertNoSeqScanIn(lambda: None, tables=LARGE_TABLES)
+
+
+    def get(self, url, user=None):
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user)
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+
+    def paginate(self, queryset):
+        """First and second page, as keyset pagination reads them."""
+
+        factory = APIRequestFactory()
+        paginator = AbstractPaginator()
+        paginator.paginate_queryset(
+            queryset,
+            Request(factory.get('/api/v1/items/', {'cursor': ''}))
+        )
+        cursor = paginator.encode_cursor(paginator.next_cursor)
+        return AbstractPaginator().paginate_queryset(
+            queryset,
+            Request(factory.get('/api/v1/items/', {'cursor': cursor}))
+        )
+
+
+    def test_skins_listing(self):
+        self.assertNoSeqScanIn(self.get, '/api/v1/items/?category=1',
+                               tables=LARGE_TABLES)
+        self.assertNoSeqScanIn(
+            self.paginate,
+            Skins.objects.filter(category=1).order_by('realPrice'),
+            tables=LARGE_TABLES
+        )
+        self.assertNoSeqScanIn(
+            self.paginate,
+            Skins.objects.order_by('-realPrice'),
+            tables=LARGE_TABLES
+        )
+
+
+    def test_skins_by_rating_and_reviews(self):
+        for ordering in ('-rating_average', '-reviews_count'):
+            self.assertNoSeqScanIn(
+                self.paginate,
+                Skins.objects.order_by(ordering),
+                tables=LARGE_TABLES
+            )
+
+
+    def test_skin_info(self):
+        self.assertNoSeqScanIn(self.get, f'/api/v1/items/{self.skins[0].id}/',
+                               tables=LARGE_TABLES)
+
+
+    def test_new_skins(self):
+        with mock.patch('skins.tasks.start_mailing'):
+            self.assertNoSeqScanIn(send_mail_about_new_skins,
+                                   tables=LARGE_TABLES)
+
+
+    def test_skin_reviews(self):
+        self.assertNoSeqScanIn(
+            self.get,
+            f'/api/v1/reviews/{self.skins[0].id}/',
+            self.users[0],
+            tables=LARGE_TABLES
+        )
+
+
+    def test_invites(self):
+        self.assertNoSeqScanIn(self.get, '/api/v1/invites/', self.users[1],
+                               tables=LARGE_TABLES)
+
+
+    def test_chats_and_history(self):
+        self.assertNoSeqScanIn(self.get, '/api/v1/chats/', self.users[0],
+                               tables=LARGE_TABLES)
+        with mock.patch.object(
+            crypto,
+            'decrypt_messages',
+            side_effect=lambda chat, messages: [''] * len(messages)
+        ):
+            self.assertNoSeqScanIn(
+                self.get,
+                f'/api/v1/chats/{self.chat.id}/',
+                self.users[0],
+                tables=LARGE_TABLES
+            )
+
+
+class QueryBudgetTestCase(QueryBudgetMixin, TestCase):
+    """Tests for query counting helpers."""
+
+    def setUp(self):
+        self.users = [
+            Client.objects.create_user(
+                username=f'user{num}',
+                email=f'user{num}@example.com',
+                password='password',
+                cash=0
+            )
+            for num in range(5)
+        ]
+
+
+    def load_one_by_one(self):
+        return [
+            Client.objects.filter(id=user.id).first()
+            for user in self.users
+        ]
+
+
+    def test_query_shape(self):
+        self.assertEqual(
+            get_query_shape('SELECT * FROM t WHERE id IN (%s, %s, %s)'),
+            get_query_shape('SELECT * FROM t WHERE id IN (%s, %s)')
+        )
+        self.assertEqual(
+            get_query_shape("SELECT * FROM t2 WHERE a = 'x' LIMIT 21"),
+            'SELECT * FROM t2 WHERE a = ? LIMIT ?'
+        )
+
+
+    def test_recorder_finds_repeated_shapes(self):
+        with QueryRecorder() as recorder:
+            self.load_one_by_one()
+            list(Client.objects.filter(id__in=[1, 2]))
+
+        self.assertEqual(recorder.count, 6)
+        self.assertEqual(list(recorder.get_repeated().values()), [5])
+
+
+    def test_max_queries(self):
+        with self.assertMaxQueries(1):
+            list(Client.objects.all())
+
+        with self.assertRaises(AssertionError):
+            self.assertMaxQueries(4, self.load_one_by_one)
+
+
+    def test_no_repeated_queries(self):
+        self.assertNoRepeatedQueries(
+            lambda: list(Client.objects.filter(id__in=[1, 2, 3]))
+        )
+        with self.assertRaises(AssertionError):
+            self.assertNoRepeatedQueries(self.load_one_by_one)
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+})
+class ViewQueryBudgetTestCase(QueryBudgetMixin, TestCase):
+    """Pages of views render in constant number of queries."""
+
+    ROWS = 10
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            Client.objects.create_user(
+                username=f'user{num}',
+                email=f'user{num}@example.com',
+                password='password',
+                cash=0
+            )
+            for num in range(cls.ROWS + 1)
+        ]
+        cls.user, others = cls.users[0], cls.users[1:]
+        for user in others:
+            make_friends(cls.user.id, user.id)
+        cls.skins = Skins.objects.bulk_create(
+            Skins(
+                title=f'Skin {num}',
+                name='Skin',
+                grade='Mythical',
+                rating=0,
+                category=1,
+                priceWithoutSale=100,
+                sale=0,
+                realPrice=100
+            )
+            for num in range(cls.ROWS)
+        )
+        UserSkins.objects.bulk_create(
+            UserSkins(user=cls.user, skin=skin) for skin in cls.skins
+        )
+        basket = SkinsBasket.objects.create(user=cls.user)
+        BasketItem.objects.bulk_create(
+            BasketItem(basket=basket, skin=skin, price=100, totalPrice=100)
+            for skin in cls.skins
+        )
+        Reviews.objects.bulk_create(
+            Reviews(user=user, skin=cls.skins[0], rating=5)
+            for user in others
+        )
+        Invites.objects.bulk_create(
+            Invites(from_user=user, to_user=cls.user) for user in others
+        )
+        cls.chats = ChatRoom.objects.bulk_create(
+            ChatRoom(title=f'chat {user.id}', members=[cls.user.id, user.id])
+            for user in others
+        )
+        Messages.objects.bulk_create(
+            Messages(chat=cls.chats[0], sender=user, content='')
+            for user in others
+        )
+
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+
+    def assertPageQueries(self, url, num):
+        with self.assertMaxQueries(num) as recorder:
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(recorder.get_repeated(), {})
+
+
+    def test_collection(self):
+        self.assertPageQueries('/api/v1/collection/', 3)
+
+
+    def test_basket(self):
+        self.assertPageQueries('/api/v1/basket/', 2)
+
+
+    def test_skin_reviews(self):
+        self.assertPageQueries(f'/api/v1/reviews/{self.skins[0].id}/', 2)
+
+
+    def test_invites(self):
+        self.assertPageQueries('/api/v1/invites/', 3)
+
+
+    def test_friends(self):
+        self.assertPageQueries('/api/v1/friends/', 2)
+
+
+    def test_chats(self):
+        self.assertPageQueries('/api/v1/chats/', 4)
+
+
+    def test_chat_messages(self):
+        with mock.patch.object(
+            crypto,
+            'decrypt_messages',
+            side_effect=lambda chat, messages: [''] * len(messages)
+        ):
+            self.assertPageQueries(f'/api/v1/chats/{self.chats[0].id}/', 2)
+
+
+@override_settings(CACHES={
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tagged-cache-tests',
+    }
+})
+class TaggedCacheTestCase(QueryBudgetMixin, TestCase):
+    """Tests for tag invalidated cache."""
+
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+        self.user = Client.objects.create_user(
+            username='owner',
+            email='owner@example.com',
+            password='password',
+            cash=0
+        )
+        self.skin = Skins.objects.create(
+            title='Skin',
+            name='Skin',
+            grade='Mythical',
+            rating=0,
+            category=1,
+            priceWithoutSale=100,
+            sale=0,
+            realPrice=100
+        )
+
+
+    def compute(self):
+        self.calls += 1
+        return self.calls
+
+
+    def test_hit_until_tag_invalidated(self):
+        tags = [user_tag(1), 'catalog']
+        self.assertEqual(cached('key', self.compute, tags), 1)
+        self.assertEqual(cached('key', self.compute, tags), 1)
+
+        invalidate_tags(user_tag(2))
+        self.assertEqual(cached('key', self.compute, tags), 1)
+
+        invalidate_tags(user_tag(1))
+        self.assertEqual(cached('key', self.compute, tags), 2)
+
+
+    def test_cached_rows_are_plain_data(self):
+        rows = CachedRows(ids=[1], rows=[{'id': 1}])
+        self.assertTrue(rows)
+        self.assertFalse(CachedRows(ids=[], rows=[]))
+
+        cached('rows', lambda: rows)
+        self.assertEqual(cached('rows', self.compute).rows, [{'id': 1}])
+
+
+    def test_single_flight(self):
+        started = threading.Barrier(20)
+
+        def compute():
+            time.sleep(0.2)
+            return self.compute()
+
+        def read():
+            started.wait()
+            results.append(cached('slow', compute))
+
+        results = []
+        threads = [threading.Thread(target=read) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, [1] * 20)
+
+
+    def test_stale_is_served_while_refreshing(self):
+        cached('key', self.compute, stale_timeout=60)
+        entry = cache.get('key')
+        cache.set('key', {**entry, 'expires_at': time.time() - 1})
+        cache.add(LOCK_KEY.format('key'), 'other')
+
+        self.assertEqual(cached('key', self.compute), 1)
+        cache.delete(LOCK_KEY.format('key'))
+        self.assertEqual(cached('key', self.compute), 2)
+
+
+    def test_early_refresh(self):
+        cached('key', self.compute)
+        entry = cache.get('key')
+        cache.set('key', {**entry, 'delta': 10 ** 9})
+
+        self.assertEqual(cached('key', self.compute), 2)
+
+
+    def test_empty_value_is_cached_shortly(self):
+        self.assertIsNone(cached('none', lambda: None, negative_timeout=5))
+        self.assertIsNone(cached('none', self.compute))
+
+        self.assertEqual(self.calls, 0)
+        self.assertLessEqual(cache.get('none')['expires_at'], time.time() + 5)
+
+
+    def test_collection_is_served_from_cache(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = '/api/v1/collection/'
+
+        self.assertEqual(client.get(url).data['error']['message'],
+                         'you have no items')
+        with self.captureOnCommitCallbacks(execute=True):
+            UserSkins.objects.create(user=self.user, skin=self.skin)
+
+        response = client.get(url)
+        self.assertEqual(len(response.data['items']), 1)
+        with self.assertMaxQueries(0):
+            self.assertEqual(client.get(url).data, response.data)
+
+
+    def test_skin_info_is_served_from_cache(self):
+        client = APIClient()
+        url = f'/api/v1/items/{self.skin.id}/'
+
+        response = client.get(url)
+        self.assertEqual(response.data['item']['title'], 'Skin')
+        self.assertIsInstance(cache.get(f'skin_{self.skin.id}_info')['value'],
+                              dict)
+        with self.assertMaxQueries(0):
+            self.assertEqual(client.get(url).data, response.data)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.skin.title = 'New Skin'
+            self.skin.save()
+        self.assertEqual(client.get(url).data['item']['title'], 'New Skin')
+
+        Skins.objects.filter(id=self.skin.id).update(title='Old Skin')
+        invalidate_tags(skin_tag(self.skin.id))
+        self.assertEqual(client.get(url).data['item']['title'], 'Old Skin')
+
+
+class LocalCacheTestCase(TestCase):
+    """Tests for process local tier of two tier cache."""
+
+    def setUp(self):
+        self.local = LocalCache(max_entries=2, timeout=60)
+
+
+    def test_least_recently_used_is_evicted(self):
+        generation = self.local.generation
+        self.local.set('a', 1, generation)
+        self.local.set('b', 2, generation)
+        self.local.get('a')
+        self.local.set('c', 3, generation)
+
+        self.assertEqual(self.local.get('a'), 1)
+        self.assertIs(self.local.get('b'), MISSING)
+        self.assertEqual(self.local.get('c'), 3)
+
+
+    def test_entries_expire(self):
+        self.local.timeout = 0
+        self.local.set('a', 1, self.local.generation)
+
+        self.assertIs(self.local.get('a'), MISSING)
+
+
+    def test_invalidation_by_key_and_pattern(self):
+        generation = self.local.generation
+        self.local.set(':1:skin_1_info', 1, generation)
+        self.local.set(':1:categories', 2, generation)
+
+        self.local.delete(pattern=':1:skin_*_info')
+        self.assertIs(self.local.get(':1:skin_1_info'), MISSING)
+        self.local.delete([':1:categories'])
+        self.assertIs(self.local.get(':1:categories'), MISSING)
+
+
+    def test_value_read_during_invalidation_is_not_stored(self):
+        generation = self.local.generation
+        self.local.delete(['a'])
+        self.local.set('a', 'stale', generation)
+
+        self.assertIs(self.local.get('a'), MISSING)
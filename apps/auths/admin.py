@@ -3,7 +3,13 @@ from django.contrib import admin
 from django.contrib.auth.hashers import make_password
 
 # Local
-from .models import Client, Invites
+from .models import (
+    Client,
+    Friendships,
+    Invites,
+    MailDeliveries,
+    Mailings,
+)
 
 
 class ClientAdmin(admin.ModelAdmin):
@@ -16,6 +22,7 @@ class ClientAdmin(admin.ModelAdmin):
         'last_name', 
         'email', 
         'cash',
+        'friends_count',
         'is_active', 
         'is_superuser', 
         'is_staff'
@@ -41,6 +48,45 @@ class InvitesAdmin(admin.ModelAdmin):
     )
 
 
+class FriendshipsAdmin(admin.ModelAdmin):
+    """Admin panel for friendships."""
+
+    model = Friendships
+    list_display = (
+        'user',
+        'friend',
+        'created_at'
+    )
+    raw_id_fields = ('user', 'friend')
+
+
+class MailingsAdmin(admin.ModelAdmin):
+    """Admin panel for mailings."""
+
+    model = Mailings
+    list_display = (
+        'subject',
+        'created_at'
+    )
+
+
+class MailDeliveriesAdmin(admin.ModelAdmin):
+    """Admin panel for mailing deliveries."""
+
+    model = MailDeliveries
+    list_display = (
+        'mailing',
+        'email',
+        'status',
+        'attempts',
+        'sent_at'
+    )
+    list_filter = ('status',)
+    raw_id_fields = ('mailing', 'user')
+
+
 admin.site.register(Client, ClientAdmin)
 admin.site.register(Invites, InvitesAdmin)
-
+admin.site.register(Friendships, FriendshipsAdmin)
+admin.site.register(Mailings, MailingsAdmin)
+admin.site.register(MailDeliveries, MailDeliveriesAdmin)
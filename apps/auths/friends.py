@@ -0,0 +1,98 @@
+# Django
+from django.db import connection, transaction
+from django.db.models import Count, OuterRef, QuerySet, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+# Python
+from typing import Iterable, Optional
+
+# Local
+from .models import Client, Friendships
+from abstract.cache import invalidate_tags, user_tag
+
+
+def change_friendships(sql: str, params: list) -> int:
+    """Run edge statement, it shifts friends_count of users whose
+    edges it returned. One statement, so concurrent accept and
+    remove of the same pair never lose an update."""
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        user_ids = [user_id for user_id, in cursor.fetchall()]
+        transaction.on_commit(lambda: invalidate_tags(
+            *[user_tag(user_id) for user_id in user_ids]
+        ))
+    return len(user_ids)
+
+
+def make_friends(user_id: int, friend_id: int) -> bool:
+    """Add both edges, False when users were friends already."""
+
+    if user_id == friend_id:
+        raise ValueError('User can not be own friend')
+
+    qn = connection.ops.quote_name
+    now = timezone.now()
+    return bool(change_friendships(
+        f'''
+        WITH created AS (
+            INSERT INTO {qn(Friendships._meta.db_table)}
+                (user_id, friend_id, created_at)
+            VALUES (%s, %s, %s), (%s, %s, %s)
+            ON CONFLICT (user_id, friend_id) DO NOTHING
+            RETURNING user_id
+        )
+        UPDATE {qn(Client._meta.db_table)}
+        SET friends_count = friends_count + 1
+        WHERE id IN (SELECT user_id FROM created)
+        RETURNING id
+        ''',
+        [user_id, friend_id, now, friend_id, user_id, now]
+    ))
+
+
+def remove_friends(user_id: int, friend_id: int) -> bool:
+    """Delete both edges, False when users were not friends."""
+
+    qn = connection.ops.quote_name
+    return bool(change_friendships(
+        f'''
+        WITH deleted AS (
+            DELETE FROM {qn(Friendships._meta.db_table)}
+            WHERE (user_id = %s AND friend_id = %s)
+               OR (user_id = %s AND friend_id = %s)
+            RETURNING user_id
+        )
+        UPDATE {qn(Client._meta.db_table)}
+        SET friends_count = GREATEST(friends_count - 1, 0)
+        WHERE id IN (SELECT user_id FROM deleted)
+        RETURNING id
+        ''',
+        [user_id, friend_id, friend_id, user_id]
+    ))
+
+
+def get_friends(user_id: int) -> QuerySet:
+    """Friends of user ordered by id, keyset paginated by
+    unique (user, friend) index."""
+
+    return Client.objects.filter(friend_of__user_id=user_id).order_by('id')
+
+
+def recount_friends(user_ids: Optional[Iterable[int]] = None) -> int:
+    """Rewrite friends_count from edges with one UPDATE."""
+
+    clients = Client.objects.all()
+    if user_ids is not None:
+        clients = clients.filter(id__in=list(user_ids))
+    return clients.order_by().update(friends_count=Coalesce(
+        Subquery(
+            Friendships.objects.filter(user=OuterRef('pk'))
+            .order_by()
+            .values('user')
+            .annotate(total=Count('id'))
+            .values('total')
+        ),
+        0
+    ))
@@ -0,0 +1,111 @@
+# Django
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import F, QuerySet
+from django.utils import timezone
+
+# Python
+from typing import Iterator, Optional
+
+# Local
+from .models import Client, MailDeliveries, Mailings
+from skins.catalog_io import iter_batches
+
+
+CHUNK_SIZE = 100
+MAILS_PER_SECOND = 20
+# Chunks are started this many seconds apart, so the whole
+# mailing stays under the provider limit on any number of workers.
+CHUNK_INTERVAL = CHUNK_SIZE / MAILS_PER_SECOND
+MAX_RETRIES = 3
+RETRY_DELAY = 60
+
+
+def get_retry_delay(retries: int) -> int:
+    return RETRY_DELAY * 2 ** retries
+
+
+def create_deliveries(
+    mailing: Mailings,
+    recipients: Optional[QuerySet] = None,
+    chunk_size: int = CHUNK_SIZE
+) -> Iterator[list[int]]:
+    """Pending delivery per recipient, ids yielded by chunk.
+    Recipients are streamed, all emails are never in memory.
+    Safe to run again: existing deliveries are kept, only
+    not yet sent ones are yielded."""
+
+    if recipients is None:
+        recipients = Client.objects.all()
+    rows = recipients.exclude(email='').order_by('id') \
+        .values_list('id', 'email').iterator(chunk_size=chunk_size)
+    for chunk in iter_batches(rows, chunk_size):
+        MailDeliveries.objects.bulk_create(
+            [
+                MailDeliveries(mailing=mailing, user_id=user_id, email=email)
+                for user_id, email in chunk
+            ],
+            ignore_conflicts=True
+        )
+        delivery_ids = list(
+            MailDeliveries.objects.filter(
+                mailing=mailing,
+                user_id__in=[user_id for user_id, _ in chunk]
+            ).exclude(status=MailDeliveries.SENT)
+            .order_by('id').values_list('id', flat=True)
+        )
+        if delivery_ids:
+            yield delivery_ids
+
+
+def build_message(delivery: MailDeliveries) -> EmailMessage:
+    """Personal message, recipient sees only own address."""
+
+    return EmailMessage(
+        subject=delivery.mailing.subject,
+        body=f'Hello, {delivery.user.username}.\n\n'
+             f'{delivery.mailing.message}',
+        from_email=settings.EMAIL_HOST_USER,
+        to=[delivery.email]
+    )
+
+
+def send_chunk(delivery_ids: list[int]) -> list[int]:
+    """Send not yet sent deliveries over one connection,
+    failed ids are returned. Error of one address fails only
+    its delivery, failed connection raises for the chunk."""
+
+    deliveries = list(
+        MailDeliveries.objects.filter(id__in=delivery_ids)
+        .exclude(status=MailDeliveries.SENT)
+        .select_related('mailing', 'user')
+    )
+    if not deliveries:
+        return []
+
+    sent = []
+    failed = []
+    with get_connection(fail_silently=False) as connection:
+        for delivery in deliveries:
+            try:
+                connection.send_messages([build_message(delivery)])
+            except Exception as error:
+                delivery.status = MailDeliveries.FAILED
+                delivery.error = str(error)
+                failed.append(delivery)
+            else:
+                sent.append(delivery.id)
+
+    MailDeliveries.objects.filter(id__in=sent).update(
+        status=MailDeliveries.SENT,
+        attempts=F('attempts') + 1,
+        error='',
+        sent_at=timezone.now()
+    )
+    for delivery in failed:
+        delivery.attempts += 1
+    MailDeliveries.objects.bulk_update(
+        failed,
+        ['status', 'error', 'attempts']
+    )
+    return [delivery.id for delivery in failed]
@@ -0,0 +1,82 @@
+# Django
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+
+# Python
+from datetime import datetime
+from typing import Any
+
+# Local
+from auths.friends import recount_friends
+from auths.models import Client, Friendships
+from abstract.cache import invalidate_tags, user_tag
+from skins.catalog_io import iter_batches
+
+
+class Command(BaseCommand):
+    """Command to move Client.friends arrays to Friendships."""
+
+    help = 'Copy friends arrays to edge table by batches, rerun is safe.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--batch', type=int, default=1000)
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Empty migrated arrays.'
+        )
+
+    def move_batch(self, rows: list[tuple[int, list[int]]]) -> int:
+        """Create edges of batch users in both directions."""
+
+        friend_ids = {friend for _, friends in rows for friend in friends}
+        existing = set(
+            Client.objects.filter(id__in=friend_ids)
+            .values_list('id', flat=True)
+        )
+        edges = {
+            pair
+            for user_id, friends in rows
+            for friend_id in friends
+            if friend_id in existing and friend_id != user_id
+            for pair in ((user_id, friend_id), (friend_id, user_id))
+        }
+        with transaction.atomic():
+            Friendships.objects.bulk_create(
+                [
+                    Friendships(user_id=user_id, friend_id=friend_id)
+                    for user_id, friend_id in edges
+                ],
+                ignore_conflicts=True
+            )
+            user_ids = {user_id for pair in edges for user_id in pair}
+            recount_friends(user_ids)
+            transaction.on_commit(lambda: invalidate_tags(
+                *[user_tag(user_id) for user_id in user_ids]
+            ))
+            if self.clear:
+                Client.objects.filter(
+                    id__in=[user_id for user_id, _ in rows]
+                ).update(friends=[])
+        return len(edges)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """Handles friends migration."""
+
+        start: datetime = datetime.now()
+        self.clear = options['clear']
+        rows = Client.objects.exclude(friends=[]).order_by('id') \
+            .values_list('id', 'friends') \
+            .iterator(chunk_size=options['batch'])
+
+        users = 0
+        edges = 0
+        for batch in iter_batches(rows, options['batch']):
+            users += len(batch)
+            edges += self.move_batch(batch)
+            print(f'Users: {users}, edges: {edges}')
+
+        print(
+            f'Friends migrated in: '
+            f'{(datetime.now()-start).total_seconds()} seconds.'
+        )
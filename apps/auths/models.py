@@ -6,7 +6,7 @@ from django.contrib.auth.models import (
 )
 from django.contrib.postgres.fields import ArrayField
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 
 # Python
@@ -121,11 +121,16 @@ class Client(AbstractBaseUser, PermissionsMixin):
         null=True,
         blank=True
     )
+    # Legacy storage, moved to Friendships by migrate_friends.
     friends = ArrayField(
         models.IntegerField(),
         blank=True,
         default=list
     )
+    friends_count = models.PositiveIntegerField(
+        verbose_name='количество друзей',
+        default=0
+    )
     
     USERNAME_FIELD = 'username'
     REQUIRED_FIELDS = ['email']
@@ -161,16 +166,26 @@ class InviteManager(models.Manager):
     def accept_invite(self, invite):
         """Method for accept invite to friends list."""
 
-        from_user = invite.from_user
-        to_user = invite.to_user
-        invite.status = True
-
-        from_user.friends.append(to_user.id)
-        to_user.friends.append(from_user.id)
+        from abstract.cache import invalidate_tags, user_tag
+        from .friends import make_friends
+        from .tasks import accept_invite_message
 
-        from_user.save(update_fields=['friends'])
-        to_user.save(update_fields=['friends'])
-        invite.save(update_fields=['status'])
+        with transaction.atomic():
+            accepted = self.filter(pk=invite.pk).exclude(
+                status=True
+            ).update(status=True)
+            if accepted:
+                make_friends(invite.from_user_id, invite.to_user_id)
+                # Update sends no post_save, so do what
+                # signals of Invites do on accept.
+                tag = user_tag(invite.to_user_id)
+                transaction.on_commit(lambda: invalidate_tags(tag))
+                transaction.on_commit(
+                    lambda: accept_invite_message.apply_async(
+                        args=(invite.pk,)
+                    )
+                )
+        invite.status = True
 
     def reject_invite(self, invite):
         """Method for reject invite to friends list."""
@@ -208,8 +223,164 @@ class Invites(models.Model):
         unique_together = ['from_user', 'to_user']
         verbose_name = 'приглашение'
         verbose_name_plural = 'приглашения'
+        indexes = [
+            models.Index(
+                fields=['to_user', 'status'],
+                name='invites_to_user_status'
+            ),
+        ]
 
     def __str__(self) -> str:
         return f'{self.from_user} | {self.to_user} | {self.status}'
     
-    
\ No newline at end of file
+    
+
+class Friendships(models.Model):
+    """Friendship edge, stored for both users."""
+
+    user = models.ForeignKey(
+        to=Client,
+        related_name='friendships',
+        on_delete=models.CASCADE,
+        verbose_name='пользователь'
+    )
+    friend = models.ForeignKey(
+        to=Client,
+        related_name='friend_of',
+        on_delete=models.CASCADE,
+        verbose_name='друг'
+    )
+    created_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='дата добавления'
+    )
+
+    class Meta:
+        ordering = ('id',)
+        verbose_name = 'дружба'
+        verbose_name_plural = 'дружбы'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'friend'),
+                name='unique_friendship'
+            ),
+            models.CheckConstraint(
+                check=~models.Q(user=models.F('friend')),
+                name='friendship_not_self'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['friend'],
+                name='friendships_friend_id'
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.user} | {self.friend}'
+
+
+class Mailings(models.Model):
+    """Mail to many clients, sent in chunks."""
+
+    subject = models.CharField(
+        verbose_name='тема',
+        max_length=200
+    )
+    message = models.TextField(
+        verbose_name='сообщение'
+    )
+    created_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='дата создания'
+    )
+
+    class Meta:
+        ordering = ('-id',)
+        verbose_name = 'рассылка'
+        verbose_name_plural = 'рассылки'
+
+    def __str__(self) -> str:
+        return self.subject
+
+    def get_stats(self) -> dict[str, int]:
+        """Deliveries count per status."""
+
+        stats = dict.fromkeys(
+            (status for status, _ in MailDeliveries.STATUSES), 0
+        )
+        stats.update(
+            self.deliveries.values_list('status')
+            .annotate(count=models.Count('id'))
+            .order_by()
+        )
+        return stats
+
+
+class MailDeliveries(models.Model):
+    """Delivery of mailing to one client."""
+
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'ожидает'),
+        (SENT, 'отправлено'),
+        (FAILED, 'ошибка'),
+    )
+
+    mailing = models.ForeignKey(
+        to=Mailings,
+        related_name='deliveries',
+        on_delete=models.CASCADE,
+        verbose_name='рассылка'
+    )
+    user = models.ForeignKey(
+        to=Client,
+        related_name='mail_deliveries',
+        on_delete=models.CASCADE,
+        verbose_name='получатель'
+    )
+    email = models.EmailField(
+        verbose_name='почта'
+    )
+    status = models.CharField(
+        verbose_name='статус',
+        max_length=10,
+        choices=STATUSES,
+        default=PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='попытки',
+        default=0
+    )
+    error = models.TextField(
+        verbose_name='ошибка',
+        blank=True,
+        default=''
+    )
+    sent_at = models.DateTimeField(
+        verbose_name='отправлено',
+        null=True,
+        blank=True
+    )
+
+    class Meta:
+        ordering = ('id',)
+        verbose_name = 'доставка рассылки'
+        verbose_name_plural = 'доставки рассылки'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('mailing', 'user'),
+                name='unique_mailing_user'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['mailing', 'status'],
+                name='mail_deliveries_status'
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.mailing} | {self.email}'
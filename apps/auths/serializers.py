@@ -14,6 +14,7 @@ import logging
 # Local
 from .models import Client, Invites
 from settings.config.config import VALIDATE_PATTERN
+from abstract.prefetch import PrefetchPlan
 
 
 logger = logging.getLogger(__name__)
@@ -191,22 +192,13 @@ class OneFriendSerializer(serializers.ModelSerializer):
         )
 
 
-class FriendsSerializer(serializers.Serializer):
-    """Serializer for viewing friends."""
+FRIENDS_PLAN = PrefetchPlan.for_serializer(OneFriendSerializer)
 
-    friends = serializers.SerializerMethodField()
 
-    class Meta:
-        model = Client
-        fields = ('friends',)
-
-    def get_friends(self, obj):
-        """Method for get user friends."""
+class FriendsSerializer(serializers.Serializer):
+    """Serializer for viewing friends."""
 
-        friend_ids = obj
-        friends = Client.objects.filter(id__in=friend_ids)
-        serializer = OneFriendSerializer(friends, many=True)
-        return serializer.data
+    friends = OneFriendSerializer(many=True)
 
 
 class PersonalSerializer(serializers.ModelSerializer):
@@ -221,7 +213,9 @@ class PersonalSerializer(serializers.ModelSerializer):
             'email',
             'username',
             'cash',
+            'friends_count',
         )
+        read_only_fields = ('friends_count',)
 
 
 class UserSerializerForReviews(serializers.ModelSerializer):
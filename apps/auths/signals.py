@@ -1,9 +1,11 @@
 # Django
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 # Local
 from auths.models import Client, Invites
+from abstract.cache import invalidate_tags, user_tag
 from .tasks import (
     sending_activate_link, 
     send_invite_message,
@@ -76,5 +78,34 @@ def reject_accept_invite(
                 args=(instance.id,)
             )
             return
-        
-        
\ No newline at end of file
+
+
+@receiver(
+    [post_delete, post_save],
+    sender=Client
+)
+def invalidate_user_cache(
+    sender: Client,
+    instance: Client,
+    **kwargs: Any
+) -> None:
+    """Signal for drop cached data of changed user."""
+
+    tag = user_tag(instance.id)
+    transaction.on_commit(lambda: invalidate_tags(tag))
+
+
+@receiver(
+    [post_delete, post_save],
+    sender=Invites
+)
+def invalidate_invites_cache(
+    sender: Invites,
+    instance: Invites,
+    **kwargs: Any
+) -> None:
+    """Signal for drop cached invites of invited user."""
+
+    tag = user_tag(instance.to_user_id)
+    transaction.on_commit(lambda: invalidate_tags(tag))
+
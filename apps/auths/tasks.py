@@ -3,6 +3,7 @@ from django.core.mail import send_mail
 from django.conf import settings
 
 # Python
+from smtplib import SMTPException
 import logging
 
 # Third-Party
@@ -10,7 +11,14 @@ from decouple import config
 
 # Local
 from settings.celery import app
-from .models import Invites
+from .models import Invites, Mailings
+from .mailing import (
+    CHUNK_INTERVAL,
+    MAX_RETRIES,
+    create_deliveries,
+    get_retry_delay,
+    send_chunk,
+)
 
 
 logger = logging.getLogger(__name__)
@@ -122,4 +130,49 @@ def send_password_reset_email(email, password):
     )
     print('MESSAGE: Password was changed')
 
-    
\ No newline at end of file
+
+@app.task(
+    name='start-mailing'
+)
+def start_mailing(mailing_id):
+    """Task for split mailing recipients into chunks,
+    chunks are sent one by one at a limited rate.
+    Run again, it queues only not yet sent deliveries."""
+
+    mailing = Mailings.objects.get(id=mailing_id)
+    chunks = 0
+    for number, delivery_ids in enumerate(create_deliveries(mailing)):
+        send_mailing_chunk.apply_async(
+            args=(mailing_id, delivery_ids),
+            countdown=number * CHUNK_INTERVAL
+        )
+        chunks += 1
+    logger.info(f'Mailing {mailing_id} split into {chunks} chunks')
+
+
+@app.task(
+    name='send-mailing-chunk',
+    bind=True,
+    max_retries=MAX_RETRIES
+)
+def send_mailing_chunk(self, mailing_id, delivery_ids):
+    """Task for send one chunk of mailing,
+    failed deliveries are retried with backoff."""
+
+    try:
+        failed = send_chunk(delivery_ids)
+    except (SMTPException, OSError) as error:
+        raise self.retry(
+            exc=error,
+            countdown=get_retry_delay(self.request.retries)
+        )
+
+    if failed and self.request.retries < self.max_retries:
+        raise self.retry(
+            args=(mailing_id, failed),
+            countdown=get_retry_delay(self.request.retries)
+        )
+    if failed:
+        logger.warning(
+            f'Mailing {mailing_id}: {len(failed)} deliveries failed'
+        )
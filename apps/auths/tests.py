@@ -1,8 +1,18 @@
 # Django
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
 from django.test import TestCase
 
+# Python
+from io import StringIO
+from smtplib import SMTPRecipientsRefused
+from unittest import mock
+
 # Local
-from .models import Client, Invites
+from .friends import get_friends, make_friends, remove_friends
+from .mailing import create_deliveries, send_chunk
+from .models import Client, Friendships, Invites, MailDeliveries, Mailings
 
 
 class TestClientModel(TestCase):
@@ -65,11 +75,13 @@ class TestInvites(TestCase):
             email='from@example.com',
             username='fromuser',
             password='frompassword',
+            cash=0
         )
         self.to_user = Client.objects.create_user(
             email='to@example.com',
             username='touser',
             password='topassword',
+            cash=0
         )
         self.invite = Invites.objects.create(
             from_user=self.from_user,
@@ -81,8 +93,31 @@ class TestInvites(TestCase):
         Invites.objects.accept_invite(self.invite)
         self.invite.refresh_from_db()
         self.assertTrue(self.invite.status)
-        self.assertEqual(self.from_user.friends, [self.to_user.id])
-        self.assertEqual(self.to_user.friends, [self.from_user.id])
+        self.assertEqual(
+            list(get_friends(self.from_user.id)),
+            [self.to_user]
+        )
+        self.assertEqual(
+            list(get_friends(self.to_user.id)),
+            [self.from_user]
+        )
+
+        Invites.objects.accept_invite(self.invite)
+        self.to_user.refresh_from_db()
+        self.assertEqual(self.to_user.friends_count, 1)
+
+
+    def test_accept_invite_message(self):
+        with mock.patch(
+            'auths.tasks.accept_invite_message.apply_async'
+        ) as send:
+            with self.captureOnCommitCallbacks(execute=True):
+                Invites.objects.accept_invite(self.invite)
+            send.assert_called_once_with(args=(self.invite.id,))
+
+            with self.captureOnCommitCallbacks(execute=True):
+                Invites.objects.accept_invite(self.invite)
+            send.assert_called_once()
 
 
     def test_reject_invite(self):
@@ -121,4 +156,146 @@ class TestInvites(TestCase):
         self.invite.save()
         self.assertFalse(self.invite.status)
 
-        
\ No newline at end of file
+        
+
+
+class FriendshipsTestCase(TestCase):
+    """Tests for friendship edges."""
+
+    def setUp(self):
+        self.users = [
+            Client.objects.create_user(
+                username=f'user{num}',
+                email=f'user{num}@example.com',
+                password='password',
+                cash=0
+            )
+            for num in range(3)
+        ]
+        self.first, self.second, self.third = self.users
+
+
+    def get_counts(self):
+        return list(
+            Client.objects.filter(id__in=[user.id for user in self.users])
+            .order_by('id').values_list('friends_count', flat=True)
+        )
+
+
+    def test_make_and_remove(self):
+        self.assertTrue(make_friends(self.first.id, self.second.id))
+        self.assertFalse(make_friends(self.second.id, self.first.id))
+        self.assertEqual(Friendships.objects.count(), 2)
+        self.assertEqual(self.get_counts(), [1, 1, 0])
+
+        self.assertTrue(remove_friends(self.second.id, self.first.id))
+        self.assertFalse(remove_friends(self.first.id, self.second.id))
+        self.assertEqual(Friendships.objects.count(), 0)
+        self.assertEqual(self.get_counts(), [0, 0, 0])
+
+
+    def test_not_own_friend(self):
+        with self.assertRaises(ValueError):
+            make_friends(self.first.id, self.first.id)
+
+
+    def test_friends_ordered_by_id(self):
+        make_friends(self.first.id, self.third.id)
+        make_friends(self.first.id, self.second.id)
+
+        self.assertEqual(
+            list(get_friends(self.first.id)),
+            sorted([self.second, self.third], key=lambda user: user.id)
+        )
+
+
+    def test_migrate_friends(self):
+        Client.objects.filter(id=self.first.id).update(
+            friends=[self.second.id, self.third.id, 999_999]
+        )
+        Client.objects.filter(id=self.second.id).update(
+            friends=[self.first.id]
+        )
+
+        for _ in range(2):
+            call_command(
+                'migrate_friends', '--batch', '1', '--clear',
+                stdout=StringIO()
+            )
+            self.assertEqual(Friendships.objects.count(), 4)
+            self.assertEqual(self.get_counts(), [2, 1, 1])
+        self.assertFalse(Client.objects.exclude(friends=[]).exists())
+
+
+class MailingTestCase(TestCase):
+    """Tests for chunked mailing."""
+
+    def setUp(self):
+        for num in range(5):
+            Client.objects.create_user(
+                email=f'user{num}@example.com',
+                username=f'user{num}',
+                password='password',
+                cash=0
+            )
+        self.mailing = Mailings.objects.create(
+            subject='New Skins',
+            message='We have a new skins.'
+        )
+
+
+    def test_personal_message_per_recipient(self):
+        chunks = list(create_deliveries(self.mailing, chunk_size=2))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+
+        for chunk in chunks:
+            self.assertEqual(send_chunk(chunk), [])
+
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(mail.outbox[0].to, ['user0@example.com'])
+        self.assertIn('Hello, user0.', mail.outbox[0].body)
+        self.assertEqual(
+            self.mailing.get_stats(),
+            {'pending': 0, 'sent': 5, 'failed': 0}
+        )
+
+
+    def test_failed_address_is_retried(self):
+        send_messages = EmailBackend.send_messages
+
+        def refuse_user1(backend, messages):
+            if messages[0].to == ['user1@example.com']:
+                raise SMTPRecipientsRefused({})
+            return send_messages(backend, messages)
+
+        chunk, = create_deliveries(self.mailing)
+        with mock.patch.object(EmailBackend, 'send_messages', refuse_user1):
+            failed = send_chunk(chunk)
+
+        self.assertEqual(len(failed), 1)
+        self.assertEqual(len(mail.outbox), 4)
+        self.assertEqual(
+            MailDeliveries.objects.get(id=failed[0]).status,
+            MailDeliveries.FAILED
+        )
+
+        self.assertEqual(send_chunk(chunk), [])
+        self.assertEqual(len(mail.outbox), 5)
+        delivery = MailDeliveries.objects.get(id=failed[0])
+        self.assertEqual(delivery.status, MailDeliveries.SENT)
+        self.assertEqual(delivery.attempts, 2)
+
+
+    def test_run_again_sends_only_unsent(self):
+        first, second = create_deliveries(self.mailing, chunk_size=3)
+        send_chunk(first)
+
+        self.assertEqual(
+            list(create_deliveries(self.mailing, chunk_size=3)),
+            [second]
+        )
+        self.assertEqual(self.mailing.deliveries.count(), 5)
+
+        send_chunk(second)
+        self.assertEqual(list(create_deliveries(self.mailing)), [])
+        self.assertEqual(len(mail.outbox), 5)
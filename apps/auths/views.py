@@ -16,13 +16,13 @@ from rest_framework_simplejwt.exceptions import TokenError
 # Django
 from django.db.models.query import QuerySet
 from django.shortcuts import get_object_or_404
-from django.core.cache import cache
 
 # Python
 import os
 
 # Local
 from .models import Client, Invites
+from .friends import get_friends, remove_friends
 from .tasks import send_password_reset_email
 from auths.models import Client
 from skins.models import UserSkins
@@ -30,14 +30,22 @@ from .serializers import (
     ClientSerializer,
     ChangePasswordSerializer,
     PersonalSerializer,
+    FRIENDS_PLAN,
     FriendsSerializer,
     InvitesSerializer,
     AuthSerializer,
 )
 from skins.serializers import CollectionSerializer
+from abstract.cache import (
+    CATALOG_TAG,
+    CachedRows,
+    cached,
+    user_tag,
+)
 from abstract.mixins import ResponseMixin
 from abstract.validators import APIValidator
 from abstract.paginators import AbstractPaginator
+from abstract.prefetch import PrefetchPlan
 
 
 @permission_classes([AllowAny])
@@ -246,11 +254,11 @@ class PersonalCabView(ResponseMixin, APIView):
         """GET Method for view personal info."""
 
         user = request.user
-        cache_key = f'{user.username}_info'
-        data = cache.get(key=cache_key)
-        if not data:
-            data = PersonalSerializer(user).data
-            cache.set(key=cache_key, value=data)
+        data = cached(
+            key=f'user_{user.id}_info',
+            compute=lambda: dict(PersonalSerializer(user).data),
+            tags=[user_tag(user.id)]
+        )
 
         return self.get_json_response(
             key_name='user',
@@ -270,8 +278,6 @@ class PersonalCabView(ResponseMixin, APIView):
         serializer.is_valid(raise_exception=True)
         serializer.save()
 
-        cache.delete(key=f'{user.username}_info')
-
         return self.get_json_response(
             key_name='success',
             data={'updated': 'Информация успешно обновлена'},
@@ -284,8 +290,6 @@ class PersonalCabView(ResponseMixin, APIView):
         user = request.user
         user.delete()
 
-        cache.delete(key=f'{user.username}_info')
-
         return self.get_json_response(
             key_name='success',
             data={'deleted': 'Аккаунт удален'},
@@ -304,18 +308,14 @@ class FriendsView(ResponseMixin, APIView):
         """GET Method for view friends list."""
 
         user = request.user
-        cache_key = f'{user.username}_friends'
-        friends = cache.get(key=cache_key)
-        if not friends:
-            friends = user.friends
-            cache.set(key=cache_key, value=friends)
+        friends = FRIENDS_PLAN.apply(get_friends(user.id))
 
         paginator = self.pagination_class
         objects = paginator.paginate_queryset(
             friends,
             request
         )
-        serializer = FriendsSerializer(objects)
+        serializer = FriendsSerializer({'friends': objects})
         return self.get_json_response(
             key_name='friends',
             data=serializer.data,
@@ -328,17 +328,8 @@ class FriendsView(ResponseMixin, APIView):
 
         user = request.user
         friend_id = request.data.get('friend_id')
-        if friend_id in user.friends:
-            friend = Client.objects.get(id=friend_id)
-            user.friends.remove(friend_id)
-            user.save(update_fields=['friends'])
-            friend.friends.remove(user.id)
-            friend.save(update_fields=['friends'])
-
-            cache.delete_many([
-                f'{user.username}_friends',
-                f'{friend.username}_friends'
-            ])
+        if str(friend_id).isdigit() \
+                and remove_friends(user.id, int(friend_id)):
             return self.get_json_response(
                 key_name='success',
                 data='Друг удален',
@@ -358,35 +349,36 @@ class InvitesView(ResponseMixin, APIView):
 
     authentication_classes = [JWTAuthentication]
     paginator_class = AbstractPaginator()
+    prefetch_plan = PrefetchPlan.for_serializer(InvitesSerializer)
 
     def get(self, request: Request) -> Response:
         """GET Method for view invites."""
 
         user = request.user
-        cache_key = f'{user.username}_invites'
-        invites = cache.get(key=cache_key)
-        if not invites:
-            invites = Invites.objects.filter(
-                to_user=user, 
-                status=None
-            )
-            cache.set(key=cache_key, value=invites)
+        invites: CachedRows = cached(
+            key=f'user_{user.id}_invites',
+            compute=lambda: CachedRows.from_serializer(
+                InvitesSerializer,
+                self.prefetch_plan.apply(
+                    Invites.objects.filter(
+                        to_user=user, 
+                        status=None
+                    )
+                )
+            ),
+            tags=[user_tag(user.id)]
+        )
 
-        if invites.exists():
-            paginator = self.paginator_class
+        if invites:
+            paginator = self.get_paginator(self.paginator_class)
             objects = paginator.paginate_queryset(
-                invites,
+                invites.rows,
                 request
             )
-            serializer: InvitesSerializer = \
-                InvitesSerializer(
-                    objects,
-                    many=True
-                )
 
             return self.get_json_response(
                 key_name='invites',
-                data=serializer.data,
+                data=objects,
                 paginator=paginator,
                 status='200'
             )
@@ -417,8 +409,6 @@ class InvitesView(ResponseMixin, APIView):
                 to_user=friend
             )
 
-            cache.delete(key=f'{friend.username}_invites')
-
             return self.get_json_response(
                 key_name='success',
                 data={'message': 'Пользователь приглашен'},
@@ -444,13 +434,6 @@ class InvitesView(ResponseMixin, APIView):
             )
             if action == 'accept':
                 Invites.objects.accept_invite(invite)
-                cache.delete(key=f'{friend.username}_invites')
-                cache.delete_many([
-                    f'{friend.username}_invites',
-                    f'{user.username}_invites',
-                    f'{user.username}_friends',
-                    f'{friend.username}_friends'
-                ])
                 return self.get_json_response(
                     key_name='success',
                     data={'message': 'Invite accepted'},
@@ -459,7 +442,6 @@ class InvitesView(ResponseMixin, APIView):
 
             elif action == 'reject':
                 Invites.objects.reject_invite(invite)
-                cache.delete(key=f'{friend.username}_invites')
 
                 return self.get_json_response(
                     key_name='success',
@@ -483,31 +465,32 @@ class CollectionView(ResponseMixin, APIView):
 
     authentication_classes = [JWTAuthentication]
     pagination_class = AbstractPaginator()
+    prefetch_plan = PrefetchPlan.for_serializer(CollectionSerializer)
 
     def get(self, request: Request) -> Response:
         """GET Method for view user's items."""
 
         user = request.user
-        cache_key = f'{user.username}_skins'
-        skins = cache.get(key=cache_key)
-        if not skins:
-            skins: QuerySet = UserSkins.objects.filter(user=user)
-            cache.set(key=cache_key, value=skins)
+        skins: CachedRows = cached(
+            key=f'user_{user.id}_skins',
+            compute=lambda: CachedRows.from_serializer(
+                CollectionSerializer,
+                self.prefetch_plan.apply(
+                    UserSkins.objects.filter(user=user)
+                )
+            ),
+            tags=[user_tag(user.id), CATALOG_TAG]
+        )
 
-        if skins.exists():
+        if skins:
             paginator = self.pagination_class
             objects = paginator.paginate_queryset(
-                skins,
+                skins.rows,
                 request
             )
-            serializer: CollectionSerializer = \
-                CollectionSerializer(
-                    objects,
-                    many=True
-                )
             return self.get_json_response(
                 key_name='my_items',
-                data=serializer.data,
+                data=objects,
                 paginator=paginator,
                 status='200'
             )
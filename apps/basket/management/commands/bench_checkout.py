@@ -0,0 +1,121 @@
+# Django
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+# Python
+from time import perf_counter
+from typing import Any, Callable
+import os
+
+# Local
+from auths.models import Client
+from basket.models import SkinsBasket, BasketItem
+from basket.services import checkout
+from skins.models import Skins, UserSkins
+
+
+class Command(BaseCommand):
+    """Benchmark checkout of big baskets."""
+
+    help = 'Compare per-item and set-based checkout of N-item baskets.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--items', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=10)
+
+    def fill_basket(self, user: Client, skins: list[Skins]) -> SkinsBasket:
+        basket = SkinsBasket.objects.create(user=user)
+        BasketItem.objects.bulk_create(
+            BasketItem(
+                basket=basket,
+                skin=skin,
+                quantity=1,
+                price=skin.realPrice,
+                totalPrice=skin.realPrice
+            )
+            for skin in skins
+        )
+        return basket
+
+    def legacy_checkout(self, user_id: int) -> None:
+        """Per-item loop the basket view used before."""
+
+        user = Client.objects.get(id=user_id)
+        basket = SkinsBasket.objects.get(user=user)
+        with transaction.atomic():
+            for item in basket.basket_items.all():
+                user_skin, created = UserSkins.objects.get_or_create(
+                    user=user,
+                    skin=item.skin,
+                    defaults={'quantity': item.quantity}
+                )
+                if not created:
+                    user_skin.quantity += item.quantity
+                    user_skin.save(update_fields=['quantity'])
+            Client.objects.filter(id=user_id).update(
+                cash=user.cash - basket.total_price
+            )
+            basket.delete()
+
+    def measure(
+        self,
+        name: str,
+        run: Callable,
+        user: Client,
+        skins: list[Skins],
+        repeat: int
+    ) -> None:
+        timings = []
+        queries = 0
+        for _ in range(repeat):
+            self.fill_basket(user, skins)
+            with CaptureQueriesContext(connection) as captured:
+                started = perf_counter()
+                run(user.id)
+                timings.append((perf_counter() - started) * 1000)
+            queries = len(captured)
+
+        timings.sort()
+        print(f'{name:<10} median {timings[len(timings) // 2]:.2f} ms, '
+              f'{queries} queries')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """Handles benchmark run."""
+
+        with transaction.atomic():
+            suffix = os.urandom(4).hex()
+            user = Client.objects.create(
+                username=f'bench{suffix}',
+                email=f'bench{suffix}@example.com',
+                password='benchpassword',
+                cash=10 ** 9
+            )
+            skins = Skins.objects.bulk_create(
+                Skins(
+                    title=f'Bench {num}',
+                    name='Bench',
+                    grade='Mythical',
+                    rating=0,
+                    category=1,
+                    priceWithoutSale=100,
+                    sale=0,
+                    realPrice=100
+                )
+                for num in range(options['items'])
+            )
+            self.measure(
+                'per-item',
+                self.legacy_checkout,
+                user,
+                skins,
+                options['repeat']
+            )
+            self.measure(
+                'set-based',
+                checkout,
+                user,
+                skins,
+                options['repeat']
+            )
+            transaction.set_rollback(True)
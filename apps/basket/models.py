@@ -37,6 +37,12 @@ class SkinsBasket(models.Model):
         ordering = ('id',)
         verbose_name = 'покупка скинов'
         verbose_name_plural = 'покупка скинов'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user',),
+                name='unique_user_basket'
+            ),
+        ]
 
     def __str__(self) -> str:
         return f'{self.user.username} | {self.create}'
@@ -75,6 +81,20 @@ class BasketItem(models.Model):
     class Meta:
         verbose_name = 'элемент корзины'
         verbose_name_plural = 'элементы корзины'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('basket', 'skin'),
+                name='unique_basket_skin'
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember stored total for basket total deltas."""
+
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_total = instance.__dict__.get('totalPrice')
+        return instance
 
     def __str__(self) -> str:
         return f'{self.basket} | {self.skin} | {self.quantity}'
@@ -1,5 +1,11 @@
 # Django Rest Framework
-from rest_framework.serializers import ModelSerializer
+from rest_framework.serializers import (
+    ModelSerializer,
+    Serializer,
+    IntegerField,
+    ListField,
+    ValidationError,
+)
 
 # Local
 from .models import SkinsBasket, BasketItem
@@ -33,3 +39,29 @@ class BasketSerializer(ModelSerializer):
             'total_price'
         )
 
+
+class AddItemSerializer(Serializer):
+    """Serializer for one skin added to basket."""
+
+    skin_id = IntegerField(min_value=1)
+    qty = IntegerField(min_value=1, max_value=100, default=1)
+
+
+class AddItemsSerializer(Serializer):
+    """Serializer for add one skin or set of skins to basket."""
+
+    skin_id = IntegerField(min_value=1, required=False)
+    items = ListField(
+        child=AddItemSerializer(),
+        required=False,
+        max_length=100
+    )
+
+    def validate(self, attrs):
+        items = list(attrs.get('items', []))
+        if attrs.get('skin_id'):
+            items.append({'skin_id': attrs['skin_id'], 'qty': 1})
+        if not items:
+            raise ValidationError('skin_id or items required')
+        attrs['items'] = [(item['skin_id'], item['qty']) for item in items]
+        return attrs
@@ -0,0 +1,208 @@
+# Django
+from django.db import connection, transaction
+from django.utils import timezone
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, Greatest
+
+# Python
+from collections import Counter
+from typing import Iterable
+
+# Local
+from .models import SkinsBasket, BasketItem
+from auths.models import Client
+from skins.models import Skins, UserSkins
+from abstract.cache import invalidate_tags, user_tag
+
+
+# Stays far below PositiveSmallIntegerField limit of quantity.
+MAX_ITEM_QUANTITY = 1000
+
+
+class InsufficientFunds(Exception):
+    """User cash is less than basket total."""
+
+
+class QuantityLimitExceeded(Exception):
+    """Item quantity would grow over MAX_ITEM_QUANTITY."""
+
+
+def change_basket_total(basket_id: int, delta: int) -> None:
+    """Shift basket total in current transaction."""
+
+    if not delta:
+        return
+    SkinsBasket.objects.filter(pk=basket_id).update(
+        total_price=Greatest(F('total_price') + delta, 0)
+    )
+
+
+def get_items_total_subquery() -> Subquery:
+    """Sum of item totals for outer basket."""
+
+    return Coalesce(
+        Subquery(
+            BasketItem.objects.filter(basket=OuterRef('pk'))
+            .order_by()
+            .values('basket')
+            .annotate(total=Sum('totalPrice'))
+            .values('total')
+        ),
+        0
+    )
+
+
+def recompute_basket_total(basket_id: int) -> None:
+    """Set basket total from its items with one UPDATE."""
+
+    SkinsBasket.objects.filter(pk=basket_id).update(
+        total_price=get_items_total_subquery()
+    )
+
+
+def add_to_basket(
+    user_id: int,
+    items: Iterable[tuple[int, int]]
+) -> int:
+    """Add (skin_id, quantity) pairs to user's basket: basket and
+    items are upserted by one statement, then the total is summed
+    from items. Unit price is the one of first add, so total of
+    item stays price * quantity. Item is never made larger than
+    MAX_ITEM_QUANTITY, nothing is added then. Return new basket total."""
+
+    wanted = Counter()
+    for skin_id, quantity in items:
+        wanted[skin_id] += quantity
+    if not wanted:
+        raise ValueError('No items to add')
+
+    qn = connection.ops.quote_name
+    baskets = qn(SkinsBasket._meta.db_table)
+    basket_items = qn(BasketItem._meta.db_table)
+    skins = qn(Skins._meta.db_table)
+    values = ', '.join(['(%s::bigint, %s::integer)'] * len(wanted))
+    params = [value for pair in wanted.items() for value in pair]
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Basket row stays locked until commit, so the sum below
+        # sees every item added by concurrent calls before it.
+        cursor.execute(
+            f'''
+            WITH wanted (skin_id, qty) AS (VALUES {values}),
+            priced AS (
+                SELECT s.id AS skin_id, w.qty,
+                    COALESCE(s."realPrice", s."priceWithoutSale") AS price
+                FROM wanted w JOIN {skins} s ON s.id = w.skin_id
+            ),
+            basket AS (
+                INSERT INTO {baskets} (user_id, "create", total_price)
+                VALUES (%s, %s, 0)
+                ON CONFLICT (user_id) DO UPDATE
+                SET total_price = {baskets}.total_price
+                RETURNING id
+            ),
+            added AS (
+                INSERT INTO {basket_items}
+                    (basket_id, skin_id, quantity, price, "totalPrice")
+                SELECT basket.id, p.skin_id, p.qty, p.price, p.price * p.qty
+                FROM basket, priced p
+                WHERE p.qty <= %s
+                ON CONFLICT (basket_id, skin_id) DO UPDATE
+                SET quantity = {basket_items}.quantity + EXCLUDED.quantity,
+                    "totalPrice" = {basket_items}.price
+                        * ({basket_items}.quantity + EXCLUDED.quantity)
+                WHERE {basket_items}.quantity + EXCLUDED.quantity <= %s
+                RETURNING skin_id
+            )
+            SELECT
+                (SELECT id FROM basket),
+                ARRAY(SELECT skin_id FROM priced),
+                ARRAY(SELECT skin_id FROM added)
+            ''',
+            params + [
+                user_id,
+                timezone.now(),
+                MAX_ITEM_QUANTITY,
+                MAX_ITEM_QUANTITY,
+            ]
+        )
+        basket_id, priced, added = cursor.fetchone()
+
+        missing = set(wanted) - set(priced)
+        if missing:
+            raise Skins.DoesNotExist(
+                f'Skins with id {sorted(missing)} do not exist.'
+            )
+        too_many = set(priced) - set(added)
+        if too_many:
+            raise QuantityLimitExceeded(
+                f'Skins with id {sorted(too_many)} would exceed '
+                f'{MAX_ITEM_QUANTITY} items.'
+            )
+
+        cursor.execute(
+            f'''
+            UPDATE {baskets}
+            SET total_price = (
+                SELECT COALESCE(SUM("totalPrice"), 0)
+                FROM {basket_items} WHERE basket_id = %s
+            )
+            WHERE id = %s
+            RETURNING total_price
+            ''',
+            [basket_id, basket_id]
+        )
+        total, = cursor.fetchone()
+    return total
+
+
+def upsert_user_skins(basket_id: int, user_id: int) -> None:
+    """Add all basket items to user's collection with one
+    INSERT ... ON CONFLICT, quantities of owned skins grow."""
+
+    user_skins = UserSkins._meta.db_table
+    basket_items = BasketItem._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'''
+            INSERT INTO {user_skins} (user_id, skin_id, quantity)
+            SELECT %s, skin_id, SUM(quantity)
+            FROM {basket_items}
+            WHERE basket_id = %s
+            GROUP BY skin_id
+            ON CONFLICT (user_id, skin_id) DO UPDATE
+            SET quantity = {user_skins}.quantity + EXCLUDED.quantity
+            ''',
+            [user_id, basket_id]
+        )
+
+
+def checkout(user_id: int) -> int:
+    """Buy everything in user's basket, return paid total.
+
+    User row and basket are locked, so concurrent checkouts
+    of one basket are serialized and only first one pays."""
+
+    with transaction.atomic():
+        Client.objects.select_for_update().only('id').get(pk=user_id)
+        basket = SkinsBasket.objects.select_for_update().get(
+            user_id=user_id
+        )
+
+        total = BasketItem.objects.filter(basket=basket).aggregate(
+            total=Coalesce(Sum('totalPrice'), 0)
+        )['total']
+
+        debited = Client.objects.filter(
+            pk=user_id,
+            cash__gte=total
+        ).update(cash=F('cash') - total)
+        if not debited:
+            raise InsufficientFunds(
+                f'User {user_id} can not pay {total}'
+            )
+
+        upsert_user_skins(basket.id, user_id)
+        basket.delete()
+        transaction.on_commit(lambda: invalidate_tags(user_tag(user_id)))
+    return total
@@ -6,30 +6,54 @@ from django.db.models.signals import (
 from django.dispatch import receiver
 
 # Python
+from typing import Any
 import logging
 
 # Local
-from .models import BasketItem
-from .tasks import update_total_basket_price
+from .models import BasketItem, SkinsBasket
+from .services import change_basket_total, recompute_basket_total
 
 
 logger = logging.getLogger(__name__)
 
 
 @receiver(
-    [post_delete, post_save], 
+    post_save, 
     sender=BasketItem
 )
 def update_basket_total_price(
-    sender=BasketItem,
-    instance=BasketItem,
-    **kwargs
+    sender: BasketItem,
+    instance: BasketItem,
+    created: bool,
+    **kwargs: Any
 ) -> None:
     """Signal for update basket total price."""
-    
-    update_total_basket_price.apply_async(
-        args=(instance.basket.user.id,)
-    )
-    logger.info(f'Total price in {instance.basket.user} updated')
 
-    
\ No newline at end of file
+    if not created and not hasattr(instance, '_loaded_total'):
+        recompute_basket_total(instance.basket_id)
+    else:
+        old_total = 0 if created else instance._loaded_total
+        change_basket_total(
+            instance.basket_id,
+            instance.totalPrice - old_total
+        )
+    instance._loaded_total = instance.totalPrice
+    logger.info(f'Total price in basket {instance.basket_id} updated')
+
+
+@receiver(
+    post_delete, 
+    sender=BasketItem
+)
+def remove_basket_total_price(
+    sender: BasketItem,
+    instance: BasketItem,
+    origin: Any = None,
+    **kwargs: Any
+) -> None:
+    """Signal for update basket total price after item removed."""
+
+    if isinstance(origin, SkinsBasket):
+        return
+    old_total = getattr(instance, '_loaded_total', instance.totalPrice)
+    change_basket_total(instance.basket_id, -old_total)
@@ -1,21 +1,33 @@
 # Python
+import logging
+
+# Local
 from settings.celery import app
-from .models import BasketItem, SkinsBasket
+from .models import SkinsBasket
+from .services import get_items_total_subquery
 
 # Django
-from django.db.models import Sum
+from django.db.models import F
+
+
+logger = logging.getLogger(__name__)
 
 
-@app.task
-def update_total_basket_price(user_id):
-    """Task for update basket total price."""
+@app.task(
+    name='verify-basket-totals'
+)
+def verify_basket_totals():
+    """Task for find and fix baskets whose total price
+    differs from sum of their items."""
 
-    basket = SkinsBasket.objects.get(user_id=user_id)
-    total_price = BasketItem.objects.filter(
-        basket=basket
-    ).aggregate(sum_price=Sum('totalPrice'))
-    sum_price = total_price['sum_price'] or 0
-        
-    basket.total_price = sum_price
-    basket.save(update_fields=['total_price'])
+    drifted = SkinsBasket.objects.annotate(
+        items_total=get_items_total_subquery()
+    ).exclude(total_price=F('items_total'))
 
+    basket_ids = list(drifted.values_list('id', flat=True))
+    if basket_ids:
+        logger.warning(f'Basket totals drifted: {basket_ids}')
+        SkinsBasket.objects.filter(id__in=basket_ids).update(
+            total_price=get_items_total_subquery()
+        )
+    return len(basket_ids)
@@ -1,8 +1,24 @@
+# Django Rest Framework
+from rest_framework.test import APIClient
+
 # Django
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+
+# Python
+import threading
 
 # Local
 from .models import SkinsBasket, BasketItem, Client, Skins
+from .services import (
+    MAX_ITEM_QUANTITY,
+    add_to_basket,
+    checkout,
+    InsufficientFunds,
+    QuantityLimitExceeded,
+)
+from .tasks import verify_basket_totals
+from skins.models import UserSkins
 
 
 class SkinsBasketModelTestCase(TestCase):
@@ -14,7 +30,16 @@ class SkinsBasketModelTestCase(TestCase):
             email='test@example.com',
             password='testpassword'
         )
-        self.skin = Skins.objects.create(name='Skin 1', price=100)
+        self.skin = Skins.objects.create(
+            title='Skin 1',
+            name='Skin 1',
+            grade='Grade A',
+            rating=0,
+            category=1,
+            priceWithoutSale=100,
+            sale=0,
+            realPrice=100
+        )
         self.basket = SkinsBasket.objects.create(user=self.client)
 
 
@@ -29,11 +54,13 @@ class SkinsBasketModelTestCase(TestCase):
             basket=self.basket, 
             skin=self.skin, 
             quantity=2, 
-            price=200
+            price=200,
+            totalPrice=400
         )
         self.assertIn(item, self.basket.basket_items.all())
         self.assertIn(self.skin, self.basket.items.all())
         self.assertEqual(item.totalPrice, item.quantity * item.price)
+        self.basket.refresh_from_db()
         self.assertEqual(self.basket.total_price, item.totalPrice)
 
 
@@ -42,10 +69,269 @@ class SkinsBasketModelTestCase(TestCase):
             basket=self.basket, 
             skin=self.skin, 
             quantity=2, 
-            price=200
+            price=200,
+            totalPrice=400
         )
         item.delete()
         self.assertNotIn(item, self.basket.basket_items.all())
         self.assertNotIn(self.skin, self.basket.items.all())
+        self.basket.refresh_from_db()
         self.assertEqual(self.basket.total_price, 0)
 
+
+class BasketTotalTestCase(TestCase):
+    """Tests for basket total kept in item transaction."""
+
+    def setUp(self):
+        self.user = Client.objects.create(
+            username='totaluser',
+            email='total@example.com',
+            password='testpassword'
+        )
+        self.skin = Skins.objects.create(
+            title='Skin 1',
+            name='Skin Name',
+            grade='Grade A',
+            rating=0,
+            category=1,
+            priceWithoutSale=150,
+            sale=0,
+            realPrice=150
+        )
+        self.basket = SkinsBasket.objects.create(user=self.user)
+
+
+    def test_total_follows_items(self):
+        item = BasketItem.objects.create(
+            basket=self.basket,
+            skin=self.skin,
+            quantity=2,
+            price=150,
+            totalPrice=300
+        )
+        self.basket.refresh_from_db()
+        self.assertEqual(self.basket.total_price, 300)
+
+        item = BasketItem.objects.get(id=item.id)
+        item.quantity = 1
+        item.totalPrice = 150
+        item.save(update_fields=['quantity', 'totalPrice'])
+        self.basket.refresh_from_db()
+        self.assertEqual(self.basket.total_price, 150)
+
+        item.delete()
+        self.basket.refresh_from_db()
+        self.assertEqual(self.basket.total_price, 0)
+
+
+    def test_patch_changes_total(self):
+        BasketItem.objects.create(
+            basket=self.basket,
+            skin=self.skin,
+            quantity=2,
+            price=150,
+            totalPrice=300
+        )
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        client.patch(
+            '/api/v1/basket/',
+            {'skin_id': self.skin.id, 'action': 'decrease'},
+            format='json'
+        )
+        self.basket.refresh_from_db()
+        self.assertEqual(self.basket.total_price, 150)
+
+        client.patch(
+            '/api/v1/basket/',
+            {'skin_id': self.skin.id, 'action': 'remove'},
+            format='json'
+        )
+        self.assertFalse(SkinsBasket.objects.filter(user=self.user).exists())
+
+
+    def test_verify_fixes_drift(self):
+        BasketItem.objects.create(
+            basket=self.basket,
+            skin=self.skin,
+            quantity=1,
+            price=150,
+            totalPrice=150
+        )
+        SkinsBasket.objects.filter(id=self.basket.id).update(total_price=7)
+
+        self.assertEqual(verify_basket_totals(), 1)
+        self.basket.refresh_from_db()
+        self.assertEqual(self.basket.total_price, 150)
+
+
+class AddToBasketTestCase(TestCase):
+    """Tests for single statement add-to-basket."""
+
+    def setUp(self):
+        self.user = Client.objects.create(
+            username='adduser',
+            email='add@example.com',
+            password='testpassword'
+        )
+        self.skins = [
+            Skins.objects.create(
+                title=f'Skin {price}',
+                name='Skin Name',
+                grade='Grade A',
+                rating=0,
+                category=1,
+                priceWithoutSale=price,
+                sale=0,
+                realPrice=price
+            )
+            for price in (100, 250)
+        ]
+
+
+    def test_add_set_and_repeat(self):
+        first, second = self.skins
+        total = add_to_basket(
+            self.user.id,
+            [(first.id, 1), (second.id, 2), (first.id, 1)]
+        )
+        self.assertEqual(total, 700)
+
+        total = add_to_basket(self.user.id, [(first.id, 1)])
+        self.assertEqual(total, 800)
+
+        item = BasketItem.objects.get(basket__user=self.user, skin=first)
+        self.assertEqual(item.quantity, 3)
+        self.assertEqual(item.totalPrice, 300)
+        self.assertEqual(
+            SkinsBasket.objects.get(user=self.user).total_price,
+            800
+        )
+
+
+    def test_unit_price_of_first_add_is_kept(self):
+        first = self.skins[0]
+        add_to_basket(self.user.id, [(first.id, 1)])
+        Skins.objects.filter(id=first.id).update(realPrice=150)
+
+        total = add_to_basket(self.user.id, [(first.id, 2)])
+
+        item = BasketItem.objects.get(basket__user=self.user, skin=first)
+        self.assertEqual((item.price, item.totalPrice), (100, 300))
+        self.assertEqual(total, item.price * item.quantity)
+
+
+    def test_quantity_limit(self):
+        first, second = self.skins
+        add_to_basket(self.user.id, [(first.id, MAX_ITEM_QUANTITY - 1)])
+
+        with self.assertRaises(QuantityLimitExceeded):
+            add_to_basket(self.user.id, [(second.id, 1), (first.id, 2)])
+        self.assertEqual(
+            BasketItem.objects.get(basket__user=self.user, skin=first)
+            .quantity,
+            MAX_ITEM_QUANTITY - 1
+        )
+        self.assertFalse(BasketItem.objects.filter(skin=second).exists())
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.put(
+            '/api/v1/basket/',
+            {'items': [{'skin_id': first.id, 'qty': 2}]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            add_to_basket(self.user.id, [(first.id, 1)]),
+            first.realPrice * MAX_ITEM_QUANTITY
+        )
+
+
+    def test_missing_skin_adds_nothing(self):
+        with self.assertRaises(Skins.DoesNotExist):
+            add_to_basket(self.user.id, [(self.skins[0].id, 1), (999999, 1)])
+        self.assertFalse(SkinsBasket.objects.filter(user=self.user).exists())
+
+
+class CheckoutTestCase(TransactionTestCase):
+    """Tests for set-based checkout."""
+
+    def setUp(self):
+        self.user = Client.objects.create(
+            username='buyer',
+            email='buyer@example.com',
+            password='testpassword',
+            cash=1000
+        )
+        self.skin = Skins.objects.create(
+            title='Skin 1',
+            name='Skin Name',
+            grade='Grade A',
+            rating=0,
+            category=1,
+            priceWithoutSale=300,
+            sale=0,
+            realPrice=300
+        )
+        self.basket = SkinsBasket.objects.create(user=self.user)
+        BasketItem.objects.create(
+            basket=self.basket,
+            skin=self.skin,
+            quantity=2,
+            price=300,
+            totalPrice=600
+        )
+
+
+    def test_checkout_adds_to_owned_skins(self):
+        UserSkins.objects.create(user=self.user, skin=self.skin, quantity=1)
+
+        self.assertEqual(checkout(self.user.id), 600)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.cash, 400)
+        self.assertEqual(
+            UserSkins.objects.get(user=self.user, skin=self.skin).quantity,
+            3
+        )
+        self.assertFalse(SkinsBasket.objects.filter(user=self.user).exists())
+
+
+    def test_insufficient_funds(self):
+        Client.objects.filter(id=self.user.id).update(cash=100)
+
+        with self.assertRaises(InsufficientFunds):
+            checkout(self.user.id)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.cash, 100)
+        self.assertTrue(SkinsBasket.objects.filter(user=self.user).exists())
+        self.assertFalse(UserSkins.objects.filter(user=self.user).exists())
+
+
+    def test_concurrent_checkout_pays_once(self):
+        results = []
+        barrier = threading.Barrier(5)
+
+        def buy():
+            barrier.wait()
+            try:
+                results.append(checkout(self.user.id))
+            except (SkinsBasket.DoesNotExist, InsufficientFunds) as e:
+                results.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=buy) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([result for result in results if result == 600], [600])
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.cash, 400)
+        self.assertEqual(
+            UserSkins.objects.get(user=self.user, skin=self.skin).quantity,
+            2
+        )
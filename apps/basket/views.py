@@ -11,19 +11,26 @@ from rest_framework_simplejwt.authentication import JWTAuthentication
 # Django
 from django.db import transaction
 from django.shortcuts import get_object_or_404
-from django.core.cache import cache
 
 # Local
 from .models import (
     SkinsBasket,
     BasketItem,
 )
-from .serializers import BasketSerializer
+from .serializers import BasketSerializer, AddItemsSerializer
 from skins.serializers import SkinsSerializer
-from skins.models import Skins, UserSkins
-from .utils import get_random_indexes
+from skins.models import Skins
+from skins.catalog import get_skins_by_ids
+from skins.recommendations import get_recommended_ids
+from .services import (
+    add_to_basket,
+    checkout,
+    InsufficientFunds,
+    QuantityLimitExceeded,
+)
 from abstract.mixins import ResponseMixin
 from abstract.paginators import AbstractPaginator
+from abstract.prefetch import PrefetchPlan
 
 
 @permission_classes([IsAuthenticated])
@@ -31,6 +38,7 @@ class SkinsBasketView(ResponseMixin, APIView):
     """ViewSet for toy basket."""
 
     paginator_class = AbstractPaginator()
+    prefetch_plan = PrefetchPlan.for_serializer(BasketSerializer)
     authentication_classes = [JWTAuthentication]
 
     def get(self, request: Request) -> Response:
@@ -39,7 +47,9 @@ class SkinsBasketView(ResponseMixin, APIView):
         user = request.user
 
         try:
-            basket = SkinsBasket.objects.get(user=user)
+            basket = self.prefetch_plan.apply(
+                SkinsBasket.objects.filter(user=user)
+            ).get()
             serializer = BasketSerializer(basket)
             return self.get_json_response(
                 key_name='basket',
@@ -48,7 +58,7 @@ class SkinsBasketView(ResponseMixin, APIView):
             )
 
         except SkinsBasket.DoesNotExist:
-            skins = get_random_indexes(40)
+            skins = get_skins_by_ids(get_recommended_ids(user.id))
             serializer = SkinsSerializer(
                 skins,
                 many=True
@@ -64,33 +74,8 @@ class SkinsBasketView(ResponseMixin, APIView):
 
         user = request.user
         try:
-            basket = SkinsBasket.objects.get(user=user)
-            total_price = basket.total_price
-
-            if user.cash < total_price:
-                return self.get_json_response(
-                    key_name='error',
-                    data='you dont have money for this',
-                    status='400'
-                )
+            checkout(user.id)
 
-            with transaction.atomic():
-                for item in basket.basket_items.all():
-                    user_skin, created = \
-                        UserSkins.objects.get_or_create(
-                            user=user,
-                            skin=item.skin,
-                            defaults={'quantity': item.quantity}
-                        )
-                    if not created:
-                        user_skin.quantity += item.quantity
-                        user_skin.save(update_fields=['quantity'])
-                        
-                user.cash -= total_price
-                user.save(update_fields=['cash'])
-                basket.delete()
-
-            cache.delete(key=f'{user.username}_skins')
             return self.get_json_response(
                 key_name='success',
                 data='Items purchased successfully',
@@ -102,44 +87,31 @@ class SkinsBasketView(ResponseMixin, APIView):
                 message='basket not found'
             )
 
+        except InsufficientFunds:
+            return self.get_json_response(
+                key_name='error',
+                data='you dont have money for this',
+                status='400'
+            )
+
         except Exception as e:
             return self.response_with_critical(
                 message=e
             )
 
     def put(self, request: Request) -> Response:
-        """PUT Method for add skin to basket."""
+        """PUT Method for add skin or set of skins to basket,
+        body is {"skin_id": id} or {"items": [{"skin_id", "qty"}]}."""
 
         user = request.user
-        skin_id = request.data.get('skin_id')
-
-        try:
-            skin = Skins.objects.get(id=skin_id)
-
-            basket, created = SkinsBasket.objects.get_or_create(
-                user=user
+        serializer = AddItemsSerializer(data=request.data)
+        if not serializer.is_valid():
+            return self.response_with_error(
+                message=serializer.errors
             )
 
-            basket_item, item_created = \
-                BasketItem.objects.get_or_create(
-                    basket=basket,
-                    skin=skin,
-                    price=skin.realPrice
-                )
-
-            if not item_created:
-                basket_item.quantity += 1
-                basket_item.totalPrice = \
-                    basket_item.price * basket_item.quantity
-                basket_item.save(
-                    update_fields=['totalPrice', 'quantity']
-                )
-            else:
-                basket_item.totalPrice = \
-                    basket_item.price * basket_item.quantity
-                basket_item.save(
-                    update_fields=['totalPrice', 'quantity']
-                )
+        try:
+            add_to_basket(user.id, serializer.validated_data['items'])
             return self.get_json_response(
                 key_name='success',
                 data={'message': 'Товар добавлен в корзину.'},
@@ -151,21 +123,33 @@ class SkinsBasketView(ResponseMixin, APIView):
                 message=e
             )
 
+        except QuantityLimitExceeded:
+            return self.get_json_response(
+                key_name='error',
+                data='too many items of one skin in basket',
+                status='400'
+            )
+
         except Exception as e:
             return self.response_with_exception(
                 message=e
             )
 
+    @transaction.atomic
     def patch(self, request: Request) -> Response:
         """PATCH Method for change items 
-        count in basket, or remove item."""
+        count in basket, or remove item.
+        Item and basket total change in one transaction."""
 
         user = request.user
         skin_id = request.data.get('skin_id')
         action = request.data.get('action')
         basket = BasketItem.objects.filter(basket__user=user)
 
-        basket_item = get_object_or_404(basket, skin_id=skin_id)
+        basket_item = get_object_or_404(
+            basket.select_for_update(of=('self',)),
+            skin_id=skin_id
+        )
 
         if action == 'remove':
             basket_item.delete()
@@ -0,0 +1,177 @@
+# Django
+from django.conf import settings
+
+# Third-Party
+import rsa
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+# Python
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Optional, Sequence
+import os
+import threading
+
+# Local
+from .utils import read_keys_from_file
+
+
+VERSION_PREFIX = 'v2:'
+NONCE_SIZE = 12
+PLAINTEXT_CACHE_SIZE = 10_000
+DECRYPT_WORKERS = 4
+PARALLEL_DECRYPT_MIN = 16
+
+_plaintexts: OrderedDict = OrderedDict()
+_plaintexts_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+@lru_cache(maxsize=None)
+def get_public_key() -> rsa.PublicKey:
+    """Public key parsed once per process."""
+
+    key = read_keys_from_file(settings.PUBLIC_PATH).strip()
+    return rsa.PublicKey.load_pkcs1(key.encode('utf-8'))
+
+
+@lru_cache(maxsize=None)
+def get_private_key() -> rsa.PrivateKey:
+    """Private key parsed once per process."""
+
+    key = read_keys_from_file(settings.PRIVATE_PATH).strip()
+    return rsa.PrivateKey.load_pkcs1(key.encode('utf-8'))
+
+
+def wrap_key(data_key: bytes) -> str:
+    """Encrypt chat data key with RSA public key."""
+
+    return rsa.encrypt(data_key, get_public_key()).hex()
+
+
+@lru_cache(maxsize=1024)
+def unwrap_key(wrapped_key: str) -> AESGCM:
+    """Decrypt chat data key, one RSA operation per chat
+    and process while it stays in this cache."""
+
+    data_key = rsa.decrypt(bytes.fromhex(wrapped_key), get_private_key())
+    return AESGCM(data_key)
+
+
+def get_chat_cipher(chat: Any) -> AESGCM:
+    """AEAD cipher of chat, data key is created on first use."""
+
+    if not chat.data_key:
+        wrapped_key = wrap_key(AESGCM.generate_key(bit_length=256))
+        updated = type(chat).objects.filter(
+            pk=chat.pk,
+            data_key__isnull=True
+        ).update(data_key=wrapped_key)
+        if updated:
+            chat.data_key = wrapped_key
+        else:
+            chat.refresh_from_db(fields=['data_key'])
+    return unwrap_key(chat.data_key)
+
+
+def encrypt(chat: Any, message: str) -> str:
+    """Encrypt message with chat key, chat id is bound
+    as associated data so rows can't be moved between chats."""
+
+    nonce = os.urandom(NONCE_SIZE)
+    ciphertext = get_chat_cipher(chat).encrypt(
+        nonce,
+        message.encode('utf-8'),
+        str(chat.pk).encode('ascii')
+    )
+    return VERSION_PREFIX + b64encode(nonce + ciphertext).decode('ascii')
+
+
+def decrypt(chat: Any, content: str) -> str:
+    """Decrypt message, rows without version prefix
+    are old hex encoded RSA ciphertexts."""
+
+    if not content.startswith(VERSION_PREFIX):
+        return rsa.decrypt(
+            bytes.fromhex(content),
+            get_private_key()
+        ).decode('utf-8')
+
+    payload = b64decode(content[len(VERSION_PREFIX):])
+    plaintext = get_chat_cipher(chat).decrypt(
+        payload[:NONCE_SIZE],
+        payload[NONCE_SIZE:],
+        str(chat.pk).encode('ascii')
+    )
+    return plaintext.decode('utf-8')
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Decryption pool, created on first use."""
+
+    global _executor
+    with _plaintexts_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=DECRYPT_WORKERS,
+                thread_name_prefix='decrypt'
+            )
+    return _executor
+
+
+def get_cached_plaintexts(message_ids: list[int]) -> dict[int, str]:
+    with _plaintexts_lock:
+        found = {}
+        for message_id in message_ids:
+            if message_id in _plaintexts:
+                _plaintexts.move_to_end(message_id)
+                found[message_id] = _plaintexts[message_id]
+        return found
+
+
+def cache_plaintexts(plaintexts: dict[int, str]) -> None:
+    with _plaintexts_lock:
+        _plaintexts.update(plaintexts)
+        while len(_plaintexts) > PLAINTEXT_CACHE_SIZE:
+            _plaintexts.popitem(last=False)
+
+
+def clear_plaintexts() -> None:
+    with _plaintexts_lock:
+        _plaintexts.clear()
+
+
+def decrypt_messages(chat: Any, messages: Sequence[Any]) -> list[str]:
+    """Decrypt one page of messages of chat. Plaintexts are
+    kept in LRU by message id, misses of a big page are
+    decrypted in thread pool."""
+
+    plaintexts = get_cached_plaintexts([message.id for message in messages])
+    missing = [
+        message for message in messages if message.id not in plaintexts
+    ]
+    if missing:
+        if any(message.content.startswith(VERSION_PREFIX)
+               for message in missing):
+            # Unwrap the key once, not in every worker.
+            get_chat_cipher(chat)
+
+        contents = [message.content for message in missing]
+        if len(missing) >= PARALLEL_DECRYPT_MIN:
+            decrypted = list(get_executor().map(
+                lambda content: decrypt(chat, content),
+                contents
+            ))
+        else:
+            decrypted = [decrypt(chat, content) for content in contents]
+
+        new_plaintexts = {
+            message.id: plaintext
+            for message, plaintext in zip(missing, decrypted)
+        }
+        cache_plaintexts(new_plaintexts)
+        plaintexts.update(new_plaintexts)
+
+    return [plaintexts[message.id] for message in messages]
@@ -0,0 +1,60 @@
+# Django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+
+# Third-Party
+import rsa
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+# Python
+from time import perf_counter
+from types import SimpleNamespace
+from typing import Any
+
+# Local
+from messenger import crypto
+from messenger.utils import read_keys_from_file
+
+
+class Command(BaseCommand):
+    """Benchmark message decryption."""
+
+    help = 'Decrypt N messages with per-call RSA and with chat AEAD keys.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--messages', type=int, default=10_000)
+
+    def legacy_decrypt(self, message: str) -> str:
+        """Old MessageManager.decrypt_message."""
+
+        key = read_keys_from_file(settings.PRIVATE_PATH)
+        private_key = rsa.PrivateKey.load_pkcs1(key.strip().encode('utf-8'))
+        return rsa.decrypt(bytes.fromhex(message), private_key).decode('utf-8')
+
+    def report(self, name: str, count: int, elapsed: float) -> None:
+        print(f'{name:<7} {count} messages in {elapsed:.2f} s, '
+              f'{count / elapsed:.0f} msg/s')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """Handles benchmark run."""
+
+        count = options['messages']
+        text = 'Привет! Обменяемся скинами на Void Spirit?'
+
+        legacy_rows = [
+            rsa.encrypt(text.encode('utf-8'), crypto.get_public_key()).hex()
+        ] * count
+        started = perf_counter()
+        for row in legacy_rows:
+            self.legacy_decrypt(row)
+        self.report('legacy', count, perf_counter() - started)
+
+        chat = SimpleNamespace(
+            pk=1,
+            data_key=crypto.wrap_key(AESGCM.generate_key(bit_length=256))
+        )
+        rows = [crypto.encrypt(chat, text) for _ in range(count)]
+        started = perf_counter()
+        for row in rows:
+            crypto.decrypt(chat, row)
+        self.report('aead', count, perf_counter() - started)
@@ -1,18 +1,14 @@
 # Django
 from django.db import models
-from django.conf import settings
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+
+# Python
+from typing import Any
 
 # Local
 from auths.models import Client
-from .utils import read_keys_from_file
-
-# Third-Party
-import rsa
-
-
-private_path = settings.PRIVATE_PATH
-public_path = settings.PUBLIC_PATH
+from . import crypto
 
 
 class ChatRoom(models.Model):
@@ -32,11 +28,23 @@ class ChatRoom(models.Model):
         verbose_name='создан',
         auto_now_add=True
     )
+    data_key = models.TextField(
+        verbose_name='ключ шифрования',
+        null=True,
+        blank=True,
+        editable=False
+    )
 
     class Meta:
         ordering = ('id',)
         verbose_name = ('чат')
         verbose_name_plural = ('чаты')
+        indexes = [
+            GinIndex(
+                fields=['members'],
+                name='chatroom_members_gin'
+            ),
+        ]
 
     def __str__(self) -> str:
         return f'{self.title} | {self.created_at}'
@@ -47,41 +55,23 @@ class MessageManager(models.Manager):
 
     def encrypt_message(
         self,
-        message: str, 
+        message: str,
+        chat: Any,
     ) -> str:
-        key = read_keys_from_file(public_path)
-        public_key_str = key.strip()
-        public_key = rsa.PublicKey.load_pkcs1(
-            public_key_str.encode('utf-8')
-        )
-        encrypted_message = rsa.encrypt(
-            message.encode('utf-8'), 
-            public_key
-        )
-        encoded_message = encrypted_message.hex()
-        return encoded_message
+        return crypto.encrypt(chat, message)
 
     def decrypt_message(
         self,
-        message: str, 
+        message: str,
+        chat: Any = None,
     ) -> str:
-        key = read_keys_from_file(private_path)
-        private_key_str = key.strip()
-        private_key = rsa.PrivateKey.load_pkcs1(
-            private_key_str.encode('utf-8')
-            )
-        encrypted_message = bytes.fromhex(message)
-        decrypted_message = rsa.decrypt(
-            encrypted_message, 
-            private_key
-        )
-        return decrypted_message.decode('utf-8')
+        return crypto.decrypt(chat, message)
     
     def send_message(self, sender, chat, content):
         message = self.create(
             sender=sender,
             chat=chat,
-            content=self.encrypt_message(content),
+            content=self.encrypt_message(content, chat),
             sended=True
         )
         return message
@@ -128,6 +118,16 @@ class Messages(models.Model):
         ordering = ('created_at',)
         verbose_name = 'сообщение'
         verbose_name_plural = 'сообщения'
+        indexes = [
+            models.Index(
+                fields=['chat', 'created_at'],
+                name='messages_chat_created'
+            ),
+            models.Index(
+                fields=['chat', 'id'],
+                name='messages_chat_id'
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"{self.sender} в чате {self.chat}"
\ No newline at end of file
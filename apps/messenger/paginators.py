@@ -0,0 +1,101 @@
+# Django Rest Framework
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.utils.serializer_helpers import ReturnList
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+# Django
+from django.db.models import QuerySet
+
+# Python
+from typing import Any, Optional
+
+# Local
+from abstract.paginators import AbstractPaginator
+
+
+class MessagesPaginator(AbstractPaginator):
+    """Paginator for chat history, newest messages first.
+
+    Pages by message id: `before` gives older messages,
+    `after` gives newer ones, no params give the latest."""
+
+    before_query_param: str = 'before'
+    after_query_param: str = 'after'
+    max_page_size: int = 100
+    page_size: int = 50
+
+    def get_message_id(self, request: Any, name: str) -> Optional[int]:
+        value = request.query_params.get(name)
+        if value in (None, ''):
+            return None
+        try:
+            return int(value)
+        except ValueError:
+            raise NotFound('Invalid cursor.')
+
+    def paginate_queryset(
+        self,
+        queryset: QuerySet,
+        request: Any,
+        view: Any = None
+    ) -> list:
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        before = self.get_message_id(request, self.before_query_param)
+        after = self.get_message_id(request, self.after_query_param)
+
+        if after is not None:
+            page = list(
+                queryset.filter(id__gt=after).order_by('id')[:page_size + 1]
+            )
+            has_newer, has_older = len(page) > page_size, True
+            page = page[:page_size]
+            page.reverse()
+        else:
+            if before is not None:
+                queryset = queryset.filter(id__lt=before)
+            page = list(queryset.order_by('-id')[:page_size + 1])
+            has_newer, has_older = before is not None, \
+                len(page) > page_size
+            page = page[:page_size]
+
+        self.older_id = page[-1].id if page and has_older else None
+        self.newer_id = page[0].id if page and has_newer else None
+        return page
+
+    def get_message_link(self, name: str, message_id: Optional[int]):
+        if message_id is None:
+            return None
+        url = self.request.build_absolute_uri()
+        for param in (self.before_query_param, self.after_query_param):
+            url = remove_query_param(url, param)
+        return replace_query_param(url, name, message_id)
+
+    def get_pagination(self) -> dict[str, Any]:
+        return {
+            'next': self.get_message_link(
+                self.before_query_param,
+                self.older_id
+            ),
+            'previous': self.get_message_link(
+                self.after_query_param,
+                self.newer_id
+            ),
+            'count': None
+        }
+
+    def get_paginated_response(
+        self,
+        data: ReturnList,
+        status
+    ) -> Response:
+
+        return Response(
+            {
+                'pagination': self.get_pagination(),
+                'items': data,
+            },
+            status=status
+        )
@@ -1,15 +1,39 @@
 # Rest Framework
-from rest_framework.serializers import ModelSerializer, SerializerMethodField
+from rest_framework.serializers import (
+    ListSerializer,
+    ModelSerializer,
+    SerializerMethodField,
+)
 
 # Local 
 from .models import Messages, ChatRoom
 from auths.models import Client
 from auths.serializers import (
+    FRIENDS_PLAN,
     OneFriendSerializer, 
     UserSerializerForReviews,
 )
 
 
+def get_members_data(member_ids) -> dict:
+    """Serialized members by id, one query for all ids."""
+
+    members = FRIENDS_PLAN.apply(Client.objects.filter(id__in=member_ids))
+    data = OneFriendSerializer(members, many=True).data
+    return {member['id']: member for member in data}
+
+
+class ChatsListSerializer(ListSerializer):
+    """Loads members of all chats on page with one query."""
+
+    def to_representation(self, data):
+        chats = list(data)
+        self.child.members_data = get_members_data({
+            member for chat in chats for member in chat.members
+        })
+        return super().to_representation(chats)
+
+
 class ListChatsSerializer(ModelSerializer):
     """Serializer for view chats."""
 
@@ -17,12 +41,17 @@ class ListChatsSerializer(ModelSerializer):
 
     def get_members(self, chatroom):
 
-        members_ids = chatroom.members
-        members = Client.objects.filter(id__in=members_ids)
-        return OneFriendSerializer(members, many=True).data
+        members_data = getattr(self, 'members_data', None)
+        if members_data is None:
+            members_data = get_members_data(chatroom.members)
+        return [
+            members_data[member] for member in chatroom.members
+            if member in members_data
+        ]
 
     class Meta:
         model = ChatRoom
+        list_serializer_class = ChatsListSerializer
         fields = (
             'id',
             'title',
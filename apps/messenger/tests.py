@@ -1,3 +1,192 @@
-from django.test import TestCase
+# Django Rest Framework
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
 
-# Create your tests here.
+# Django
+from django.test import TestCase, override_settings
+
+# Third-Party
+import rsa
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+# Python
+from types import SimpleNamespace
+from unittest import mock
+import os
+import tempfile
+
+# Local
+from auths.models import Client
+from . import crypto
+from .models import ChatRoom, Messages
+from .paginators import MessagesPaginator
+
+
+class MessageCryptoTestCase(TestCase):
+    """Tests for chat message encryption."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.keys_dir = tempfile.TemporaryDirectory()
+        public_key, private_key = rsa.newkeys(1024)
+        cls.public_path = os.path.join(cls.keys_dir.name, 'public.txt')
+        cls.private_path = os.path.join(cls.keys_dir.name, 'private.txt')
+        with open(cls.public_path, 'wb') as public:
+            public.write(public_key.save_pkcs1())
+        with open(cls.private_path, 'wb') as private:
+            private.write(private_key.save_pkcs1())
+
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.keys_dir.cleanup()
+        super().tearDownClass()
+
+
+    def setUp(self):
+        self.settings_override = override_settings(
+            PUBLIC_PATH=self.public_path,
+            PRIVATE_PATH=self.private_path
+        )
+        self.settings_override.enable()
+        crypto.get_public_key.cache_clear()
+        crypto.get_private_key.cache_clear()
+        crypto.unwrap_key.cache_clear()
+        crypto.clear_plaintexts()
+        self.chat = SimpleNamespace(
+            pk=1,
+            data_key=crypto.wrap_key(AESGCM.generate_key(bit_length=256))
+        )
+
+
+    def tearDown(self):
+        self.settings_override.disable()
+        crypto.get_public_key.cache_clear()
+        crypto.get_private_key.cache_clear()
+        crypto.unwrap_key.cache_clear()
+        crypto.clear_plaintexts()
+
+
+    def test_roundtrip_long_message(self):
+        message = 'скин ' * 500
+        content = crypto.encrypt(self.chat, message)
+
+        self.assertTrue(content.startswith(crypto.VERSION_PREFIX))
+        self.assertEqual(crypto.decrypt(self.chat, content), message)
+
+
+    def test_legacy_rsa_rows(self):
+        content = rsa.encrypt(
+            'old message'.encode('utf-8'),
+            crypto.get_public_key()
+        ).hex()
+
+        self.assertEqual(crypto.decrypt(self.chat, content), 'old message')
+
+
+    def test_message_bound_to_chat(self):
+        content = crypto.encrypt(self.chat, 'hello')
+        other_chat = SimpleNamespace(pk=2, data_key=self.chat.data_key)
+
+        with self.assertRaises(InvalidTag):
+            crypto.decrypt(other_chat, content)
+
+
+    def test_decrypt_messages_keeps_order_and_caches(self):
+        messages = [
+            SimpleNamespace(
+                id=num,
+                content=crypto.encrypt(self.chat, f'message {num}')
+            )
+            for num in range(40)
+        ]
+
+        plaintexts = crypto.decrypt_messages(self.chat, messages)
+        with mock.patch.object(crypto, 'decrypt') as decrypt:
+            cached = crypto.decrypt_messages(self.chat, messages)
+
+        self.assertEqual(plaintexts, [f'message {num}' for num in range(40)])
+        self.assertEqual(cached, plaintexts)
+        decrypt.assert_not_called()
+
+
+class MessagesPaginatorTestCase(TestCase):
+    """Tests for chat history pagination."""
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.paginator = MessagesPaginator()
+        self.sender = sender = Client.objects.create_user(
+            username='sender',
+            email='sender@example.com',
+            password='password',
+            cash=0
+        )
+        self.chat = chat = ChatRoom.objects.create(
+            title='chat',
+            members=[sender.id]
+        )
+        self.messages = Messages.objects.bulk_create(
+            Messages(chat=chat, sender=sender, content=str(num))
+            for num in range(7)
+        )
+        self.ids = [message.id for message in self.messages]
+        self.queryset = Messages.objects.filter(chat=chat)
+
+
+    def paginate(self, **params):
+        request = Request(self.factory.get('/api/v1/chats/1/', params))
+        page = self.paginator.paginate_queryset(self.queryset, request)
+        pagination = self.paginator.get_paginated_response(
+            [], 200
+        ).data['pagination']
+        return [message.id for message in page], pagination
+
+
+    def test_latest_page(self):
+        page, pagination = self.paginate(size=3)
+
+        self.assertEqual(page, self.ids[:3:-1])
+        self.assertIsNone(pagination['previous'])
+        self.assertIn(f'before={self.ids[4]}', pagination['next'])
+
+
+    def test_before_and_after(self):
+        older, pagination = self.paginate(size=3, before=self.ids[4])
+        newer, _ = self.paginate(size=3, after=self.ids[1])
+
+        self.assertEqual(older, self.ids[3::-1][:3])
+        self.assertIn(f'after={self.ids[3]}', pagination['previous'])
+        self.assertEqual(newer, self.ids[4:1:-1])
+
+
+    def test_oldest_page_has_no_next(self):
+        page, pagination = self.paginate(size=3, before=self.ids[2])
+
+        self.assertEqual(page, [self.ids[1], self.ids[0]])
+        self.assertIsNone(pagination['next'])
+
+
+    def test_chat_view_keeps_chat_key(self):
+        client = APIClient()
+        client.force_authenticate(self.sender)
+        with mock.patch.object(
+            crypto,
+            'decrypt_messages',
+            side_effect=lambda chat, page: [m.content for m in page]
+        ):
+            response = client.get(
+                f'/api/v1/chats/{self.chat.id}/',
+                {'size': 3}
+            )
+
+        self.assertEqual(
+            [message['id'] for message in response.data['chat']],
+            self.ids[:3:-1]
+        )
+        self.assertIn(
+            f'before={self.ids[4]}',
+            response.data['pagination']['next']
+        )
@@ -21,7 +21,10 @@ from channels.layers import get_channel_layer
 # Local
 from abstract.mixins import ResponseMixin
 from abstract.paginators import AbstractPaginator
+from abstract.prefetch import PrefetchPlan
 from .models import ChatRoom, Messages
+from .paginators import MessagesPaginator
+from . import crypto
 from .serializers import (
     ListChatsSerializer, 
     MessageListSerializer,
@@ -38,15 +41,25 @@ class ChatsViewSet(ResponseMixin, ViewSet):
 
     queryset = ChatRoom.objects.all()
     paginator_class = AbstractPaginator()
+    messages_paginator_class = MessagesPaginator()
+    prefetch_plan = PrefetchPlan.for_serializer(
+        ListChatsSerializer,
+        only=('members',)
+    )
+    messages_prefetch_plan = PrefetchPlan.for_serializer(
+        MessageListSerializer
+    )
     authentication_classes = [JWTAuthentication]
 
     def list(self, request: Request) -> Response:
         """GET method for view all chats."""
 
         user = request.user
-        chats = self.queryset.filter(members__contains=[user.id])
+        chats = self.prefetch_plan.apply(
+            self.queryset.filter(members__contains=[user.id])
+        )
         if chats.exists():
-            paginator = self.paginator_class
+            paginator = self.get_paginator(self.paginator_class)
             objects = paginator.paginate_queryset(
                 chats, 
                 request=request
@@ -72,26 +85,26 @@ class ChatsViewSet(ResponseMixin, ViewSet):
         """GET method for view one chat."""
 
         chat = get_object_or_404(self.queryset, id=pk)
-        messages = Messages.objects.filter(chat=chat).order_by('-created_at')
+        messages = self.messages_prefetch_plan.apply(
+            Messages.objects.filter(chat=chat)
+        )
 
-        decrypted_messages = []
-        for message in messages:
-            decrypted_content = Messages.objects.decrypt_message(message.content)
-            decrypted_message = {
-                'id': message.id,
-                'sender': message.sender,
-                'content': decrypted_content,
-                'created_at': message.created_at,
-            }
-            decrypted_messages.append(decrypted_message)
+        paginator = self.get_paginator(self.messages_paginator_class)
+        page = paginator.paginate_queryset(messages, request=request)
+        plaintexts = crypto.decrypt_messages(chat, page)
+        for message, plaintext in zip(page, plaintexts):
+            message.content = plaintext
 
-        serializer = MessageListSerializer(decrypted_messages, many=True)
+        serializer = MessageListSerializer(page, many=True)
 
-        return self.get_json_response(
+        # Messages stay under `chat` key, links are added next to it.
+        response = self.get_json_response(
             key_name='chat',
             data=serializer.data,
             status='200'
         )
+        response.data['pagination'] = paginator.get_pagination()
+        return response
 
     def create(self, request: Request) -> Response:
 
@@ -42,6 +42,12 @@ class Payments(models.Model):
         ordering = ('id',)
         verbose_name = 'платеж'
         verbose_name_plural = 'платежи'
+        indexes = [
+            models.Index(
+                fields=['created_at'],
+                name='payments_created_at'
+            ),
+        ]
 
     def __str__(self) -> str:
         return f'{self.transaction_id} | {self.status} \
@@ -1,5 +1,7 @@
 # Django
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
 
 # Local
 from .models import (
@@ -7,7 +9,21 @@ from .models import (
     UserSkins, 
     Reviews, 
     Categories,
+    PriceChanges,
+    SaleCampaigns,
 )
+from .pricing import reprice
+
+
+class SaleActionForm(ActionForm):
+    """Action bar field with sale for repricing."""
+
+    sale = forms.IntegerField(
+        label='Скидка, %',
+        min_value=0,
+        max_value=100,
+        required=False
+    )
 
 
 class SkinsAdmin(admin.ModelAdmin):
@@ -26,7 +42,9 @@ class SkinsAdmin(admin.ModelAdmin):
         'priceWithoutSale',
         'video',
         'kind',
-        'realPrice'
+        'realPrice',
+        'rating_average',
+        'reviews_count',
     )
     search_fields = (
         'name',
@@ -36,6 +54,33 @@ class SkinsAdmin(admin.ModelAdmin):
         'category',
         'title',
     )
+    list_filter = ('category',)
+    action_form = SaleActionForm
+    actions = ('set_sale', 'recalculate_prices')
+
+    @admin.action(description='Установить скидку выбранным скинам')
+    def set_sale(self, request, queryset):
+        form = SaleActionForm(request.POST)
+        if not form.is_valid() or form.cleaned_data['sale'] is None:
+            self.message_user(
+                request,
+                'Укажите скидку от 0 до 100',
+                messages.ERROR
+            )
+            return
+        categories = set(queryset.values_list('category', flat=True))
+        count = reprice(
+            queryset,
+            sale=form.cleaned_data['sale'],
+            user=request.user,
+            category=categories.pop() if len(categories) == 1 else None
+        )
+        self.message_user(request, f'Цены обновлены: {count}')
+
+    @admin.action(description='Пересчитать итоговые цены')
+    def recalculate_prices(self, request, queryset):
+        count = reprice(queryset, user=request.user)
+        self.message_user(request, f'Цены обновлены: {count}')
 
 
 class RewiewAdmin(admin.ModelAdmin):
@@ -70,8 +115,47 @@ class UserSkinsAdmin(admin.ModelAdmin):
     )
 
 
+class PriceChangesAdmin(admin.ModelAdmin):
+    """Admin panel for repricing audit."""
+
+    model = PriceChanges
+    list_display = (
+        'created_at',
+        'user',
+        'category',
+        'sale',
+        'skins_count',
+    )
+    list_filter = ('category',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+class SaleCampaignsAdmin(admin.ModelAdmin):
+    """Admin panel for sales."""
+
+    model = SaleCampaigns
+    list_display = (
+        'title',
+        'starts_at',
+        'ends_at',
+        'discount_type',
+        'discount',
+        'categories',
+        'started_at',
+        'finished_at',
+    )
+    search_fields = ('title',)
+
+
 admin.site.register(Skins, SkinsAdmin)
 admin.site.register(UserSkins, UserSkinsAdmin)
 admin.site.register(Reviews, RewiewAdmin)
 admin.site.register(Categories)
+admin.site.register(PriceChanges, PriceChangesAdmin)
+admin.site.register(SaleCampaigns, SaleCampaignsAdmin)
 
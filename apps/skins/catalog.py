@@ -0,0 +1,193 @@
+# Python
+from array import array
+from typing import Any, Iterable, Optional
+import hashlib
+import logging
+import threading
+
+# Local
+from .models import Skins
+from abstract.cache import (
+    CATALOG_TAG,
+    TAG_VERSION_KEY,
+    get_tag_versions,
+    invalidate_tags,
+)
+
+
+logger = logging.getLogger(__name__)
+
+CATALOG_VERSION_KEY = TAG_VERSION_KEY.format(CATALOG_TAG)
+LISTING_PAGE_TIMEOUT = 60 * 60
+LISTING_PARAMS = (
+    'category',
+    'search',
+    'sortBy',
+    'order',
+    'page',
+    'size',
+    'cursor',
+    'count',
+)
+NO_PRICE = -1
+
+
+def get_catalog_version() -> int:
+    """Return current catalog version, start it if missing."""
+
+    return get_tag_versions([CATALOG_TAG])[CATALOG_TAG]
+
+
+def bump_catalog_version() -> None:
+    """Mark every worker's catalog snapshot and every
+    entry tagged catalog as outdated."""
+
+    invalidate_tags(CATALOG_TAG)
+
+
+def get_listing_page_key(
+    version: int,
+    host: str,
+    params: dict[str, Any]
+) -> str:
+    """Cache key for one rendered page of the skins listing.
+    Missing param differs from empty one, `?cursor=` switches
+    paginator to cursor mode."""
+
+    raw = '|'.join(
+        name if params.get(name) is None else f'{name}={params[name]}'
+        for name in LISTING_PARAMS
+    )
+    digest = hashlib.md5(
+        f'{host}|{raw}'.encode('utf-8')
+    ).hexdigest()
+    return f'skins_page_v{version}_{digest}'
+
+
+class CatalogIndex:
+    """Column snapshot of skins used by the public listing."""
+
+    __slots__ = (
+        'version',
+        'ids',
+        'categories',
+        'prices',
+        'ratings',
+        'reviews_counts',
+        'names',
+        'orders',
+    )
+
+    def __init__(
+        self,
+        version: int,
+        rows: Iterable[tuple[int, int, Optional[int], float, int, str]]
+    ) -> None:
+
+        self.version = version
+        self.ids = array('q')
+        self.categories = array('l')
+        self.prices = array('q')
+        self.ratings = array('d')
+        self.reviews_counts = array('q')
+        self.names: list[str] = []
+
+        for skin_id, category, price, rating, reviews, name in rows:
+            self.ids.append(skin_id)
+            self.categories.append(category)
+            self.prices.append(NO_PRICE if price is None else price)
+            self.ratings.append(rating or 0)
+            self.reviews_counts.append(reviews or 0)
+            self.names.append((name or '').lower())
+
+        # Same place for NULL prices as PostgreSQL:
+        # last on ascending order, first on descending.
+        prices = self.prices
+        positions = range(len(self.ids))
+        self.orders = {
+            'realPrice': array('l', sorted(
+                positions,
+                key=lambda pos: (prices[pos] == NO_PRICE, prices[pos])
+            )),
+            'rating': array('l', sorted(
+                positions, key=self.ratings.__getitem__
+            )),
+            'reviews_count': array('l', sorted(
+                positions, key=self.reviews_counts.__getitem__
+            )),
+        }
+
+    @classmethod
+    def build(cls, version: int) -> 'CatalogIndex':
+        """Load snapshot from database with one query."""
+
+        rows = Skins.objects.order_by('id').values_list(
+            'id',
+            'category',
+            'realPrice',
+            'rating_average',
+            'reviews_count',
+            'name',
+        )
+        index = cls(version, rows.iterator(chunk_size=2000))
+        logger.info(
+            f'Catalog index v{version} built, {len(index)} skins'
+        )
+        return index
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(
+        self,
+        category: Any = None,
+        search: Optional[str] = None,
+        sort_by: Optional[str] = None,
+        order: Optional[str] = None
+    ) -> list[int]:
+        """Return skin ids matching the listing filters."""
+
+        positions: Iterable[int] = range(len(self.ids))
+        if sort_by in self.orders:
+            if order == 'asc':
+                positions = self.orders[sort_by]
+            elif order == 'desc':
+                positions = reversed(self.orders[sort_by])
+
+        category = int(category) if category else None
+        search = search.lower() if search else None
+        categories = self.categories
+        names = self.names
+        ids = self.ids
+
+        return [
+            ids[pos] for pos in positions
+            if (category is None or categories[pos] == category)
+            and (search is None or search in names[pos])
+        ]
+
+
+_index: Optional[CatalogIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_catalog_index() -> CatalogIndex:
+    """Return worker snapshot, rebuild it if version changed."""
+
+    global _index
+
+    version = get_catalog_version()
+    index = _index
+    if index is None or index.version != version:
+        with _index_lock:
+            if _index is None or _index.version != version:
+                _index = CatalogIndex.build(version)
+            index = _index
+    return index
+
+
+def get_skins_by_ids(skin_ids: list[int]) -> list[Skins]:
+    """Fetch skins for one page, keep order of ids."""
+
+    skins = Skins.objects.in_bulk(skin_ids)
+    return [skins[pk] for pk in skin_ids if pk in skins]
@@ -0,0 +1,188 @@
+# Django
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Model, Q
+
+# Python
+from functools import reduce
+from itertools import islice
+from operator import or_
+from typing import IO, Any, Iterable, Iterator
+import csv
+import json
+
+# Local
+from .models import Skins, Categories
+from .search import update_search_vector
+from .utils import calculate_total_price
+
+
+IMPORT_BATCH = 5000
+FORMATS = ('ndjson', 'csv')
+
+
+class CatalogFormat:
+    """Fields and natural key of one exported model."""
+
+    def __init__(
+        self,
+        model: type[Model],
+        key: tuple[str, ...],
+        fields: tuple[str, ...],
+        integer_fields: tuple[str, ...],
+        aliases: dict[str, str],
+        computed: tuple[str, ...] = ()
+    ):
+        self.model = model
+        self.key = key
+        self.fields = fields
+        self.integer_fields = integer_fields
+        self.aliases = aliases
+        self.computed = computed
+
+    @property
+    def export_fields(self) -> tuple[str, ...]:
+        return self.fields + self.computed
+
+    @property
+    def update_fields(self) -> list[str]:
+        return [
+            field for field in self.fields + self.computed
+            if field not in self.key
+        ]
+
+    def clean(self, row: dict) -> dict:
+        """Row of file to model kwargs, keys of holy_shit.py
+        style fixtures are accepted too."""
+
+        data = {}
+        for name, value in row.items():
+            field = self.aliases.get(name, name)
+            if field not in self.fields:
+                continue
+            if value == '':
+                value = None
+            if field in self.integer_fields and value is not None:
+                value = int(value)
+            data[field] = value
+        missing = [field for field in self.key if data.get(field) is None]
+        if missing:
+            raise ValueError(f'Row without {", ".join(missing)}: {row}')
+        return data
+
+
+SKINS_FORMAT = CatalogFormat(
+    model=Skins,
+    key=('name', 'title'),
+    fields=(
+        'name', 'title', 'kind', 'grade', 'category',
+        'priceWithoutSale', 'sale', 'content', 'version',
+        'history', 'icon', 'image', 'video',
+    ),
+    integer_fields=('category', 'priceWithoutSale', 'sale'),
+    aliases={'price': 'priceWithoutSale'},
+    computed=('realPrice',),
+)
+CATEGORIES_FORMAT = CatalogFormat(
+    model=Categories,
+    key=('number',),
+    fields=('number', 'name', 'image'),
+    integer_fields=('number',),
+    aliases={'img': 'image'},
+)
+CATALOG_FORMATS = {
+    'skins': SKINS_FORMAT,
+    'categories': CATEGORIES_FORMAT,
+}
+
+
+def read_rows(file: IO[str], file_format: str) -> Iterator[dict]:
+    """Rows of NDJSON or CSV file, one at a time."""
+
+    if file_format == 'csv':
+        yield from csv.DictReader(file)
+        return
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def write_rows(
+    file: IO[str],
+    file_format: str,
+    fields: tuple[str, ...],
+    rows: Iterable[tuple]
+) -> int:
+    """Write value tuples as NDJSON or CSV, return rows count."""
+
+    count = 0
+    if file_format == 'csv':
+        writer = csv.writer(file)
+        writer.writerow(fields)
+        for count, row in enumerate(rows, start=1):
+            writer.writerow(row)
+        return count
+
+    for count, row in enumerate(rows, start=1):
+        file.write(json.dumps(
+            dict(zip(fields, row)),
+            cls=DjangoJSONEncoder,
+            ensure_ascii=False
+        ))
+        file.write('\n')
+    return count
+
+
+def iter_batches(rows: Iterable, size: int) -> Iterator[list]:
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def build_objects(catalog_format: CatalogFormat, rows: list[dict]) -> list:
+    """Model instances of batch, last row wins on repeated key."""
+
+    objects = {}
+    for row in rows:
+        obj = catalog_format.model(**catalog_format.clean(row))
+        if catalog_format.model is Skins:
+            obj.sale = obj.sale or 0
+            obj.rating = 0
+            obj.realPrice = calculate_total_price(obj)
+        objects[tuple(getattr(obj, field) for field in catalog_format.key)] \
+            = obj
+    return list(objects.values())
+
+
+def upsert_batch(catalog_format: CatalogFormat, rows: list[dict]) -> int:
+    """Insert or update batch with one statement."""
+
+    objects = build_objects(catalog_format, rows)
+    with transaction.atomic():
+        catalog_format.model.objects.bulk_create(
+            objects,
+            update_conflicts=True,
+            unique_fields=list(catalog_format.key),
+            update_fields=catalog_format.update_fields,
+        )
+        if catalog_format.model is Skins:
+            # Exact (name, title) pairs, rows sharing only one of
+            # them with the batch keep their vectors.
+            update_search_vector(Skins.objects.filter(reduce(or_, (
+                Q(name=obj.name, title=obj.title) for obj in objects
+            ))))
+    return len(objects)
+
+
+def export_rows(catalog_format: CatalogFormat) -> Iterator[tuple]:
+    """Values of all rows, fetched by chunks."""
+
+    return catalog_format.model.objects.order_by('pk').values_list(
+        *catalog_format.export_fields
+    ).iterator(chunk_size=IMPORT_BATCH)
+
+
+def get_file_format(path: str, file_format: Any = None) -> str:
+    if file_format:
+        return file_format
+    return 'csv' if path.lower().endswith('.csv') else 'ndjson'
@@ -0,0 +1,199 @@
+# Django
+from django.conf import settings
+
+# Third-Party
+import requests
+
+# Python
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, Any, Iterator, Optional
+from urllib.parse import urlparse
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+DOWNLOAD_TIMEOUT = 30
+DOWNLOAD_ATTEMPTS = 3
+
+
+class HttpSource:
+    """Streams media by URL, one session per thread."""
+
+    def __init__(self, chunk_size: int = CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.local = threading.local()
+
+    def get_session(self) -> requests.Session:
+        if not hasattr(self.local, 'session'):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def open(self, url: str) -> Iterator[bytes]:
+        with self.get_session().get(
+            url,
+            stream=True,
+            timeout=DOWNLOAD_TIMEOUT
+        ) as response:
+            response.raise_for_status()
+            yield from response.iter_content(self.chunk_size)
+
+
+class LocalSource:
+    """Reads media from local directory for offline runs.
+    URL path is looked up under directory, then file name."""
+
+    def __init__(self, directory: str, chunk_size: int = CHUNK_SIZE):
+        self.directory = directory
+        self.chunk_size = chunk_size
+
+    def get_path(self, url: str) -> str:
+        url_path = urlparse(url).path.lstrip('/')
+        path = os.path.join(self.directory, url_path)
+        if os.path.isfile(path):
+            return path
+        return os.path.join(self.directory, os.path.basename(url_path))
+
+    def open(self, url: str) -> Iterator[bytes]:
+        with open(self.get_path(url), 'rb') as file:
+            while chunk := file.read(self.chunk_size):
+                yield chunk
+
+
+class Manifest:
+    """Downloaded URLs and stored names, saved after every
+    file so an interrupted run continues where it stopped."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.files: dict[str, str] = {}
+        if os.path.isfile(path):
+            with open(path, encoding='utf-8') as file:
+                self.files = json.load(file).get('files', {})
+
+    def get(self, url: str) -> Optional[str]:
+        return self.files.get(url)
+
+    def add(self, url: str, name: str) -> None:
+        with self.lock:
+            self.files[url] = name
+            folder = os.path.dirname(self.path) or '.'
+            with tempfile.NamedTemporaryFile(
+                'w',
+                dir=folder,
+                delete=False,
+                encoding='utf-8'
+            ) as file:
+                json.dump({'files': self.files}, file, ensure_ascii=False)
+            os.replace(file.name, self.path)
+
+
+class MediaStore:
+    """Content addressed files under MEDIA_ROOT,
+    identical files are stored once."""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or settings.MEDIA_ROOT
+
+    def write_temp(self, chunks: Iterator[bytes]) -> tuple[IO, str]:
+        os.makedirs(self.root, exist_ok=True)
+        digest = hashlib.sha256()
+        temp = tempfile.NamedTemporaryFile(dir=self.root, delete=False)
+        try:
+            with temp:
+                for chunk in chunks:
+                    digest.update(chunk)
+                    temp.write(chunk)
+        except BaseException:
+            os.remove(temp.name)
+            raise
+        return temp, digest.hexdigest()
+
+    def save(
+        self,
+        chunks: Iterator[bytes],
+        upload_to: str,
+        extension: str
+    ) -> str:
+        """Stream chunks to disk, return name for FileField."""
+
+        temp, digest = self.write_temp(chunks)
+        name = f'{upload_to}/{digest}{extension}'
+        path = os.path.join(self.root, name)
+        if os.path.isfile(path):
+            os.remove(temp.name)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(temp.name, path)
+        return name
+
+    def exists(self, name: str) -> bool:
+        return os.path.isfile(os.path.join(self.root, name))
+
+
+class MediaIngestor:
+    """Bounded concurrent downloader, same URL is fetched once."""
+
+    def __init__(
+        self,
+        source: Any,
+        store: MediaStore,
+        manifest: Manifest,
+        workers: int = 8
+    ):
+        self.source = source
+        self.store = store
+        self.manifest = manifest
+        self.workers = workers
+        self.failed: list[str] = []
+
+    def get_extension(self, url: str, default: str) -> str:
+        extension = os.path.splitext(urlparse(url).path)[1].lower()
+        return extension or default
+
+    def fetch(self, url: str, upload_to: str, default: str) -> str:
+        name = self.manifest.get(url)
+        if name and self.store.exists(name):
+            return name
+
+        extension = self.get_extension(url, default)
+        for attempt in range(1, DOWNLOAD_ATTEMPTS + 1):
+            try:
+                name = self.store.save(
+                    self.source.open(url),
+                    upload_to,
+                    extension
+                )
+                break
+            except FileNotFoundError as error:
+                logger.warning(f'Media {url} not found: {error}')
+                self.failed.append(url)
+                return ''
+            except (OSError, requests.RequestException) as error:
+                logger.warning(f'Download of {url} failed: {error}')
+                if attempt == DOWNLOAD_ATTEMPTS:
+                    self.failed.append(url)
+                    return ''
+
+        self.manifest.add(url, name)
+        return name
+
+    def ingest(self, files: list[tuple[str, str, str]]) -> dict[str, str]:
+        """Download (url, upload_to, default extension) files,
+        return stored name by URL, empty for failed ones."""
+
+        unique = {url: (upload_to, default)
+                  for url, upload_to, default in files if url}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            names = executor.map(
+                lambda url: self.fetch(url, *unique[url]),
+                unique
+            )
+            return dict(zip(unique, names))
@@ -0,0 +1,91 @@
+# Django
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection, transaction
+from django.utils import timezone
+
+# Python
+from datetime import datetime, timedelta
+from time import perf_counter
+from typing import Any
+import random
+
+# Local
+from skins.models import SaleCampaigns, Skins
+from skins.pricing import refresh_sale_prices
+
+
+BENCH_CATEGORY = 99
+
+
+class Command(BaseCommand):
+    """Benchmark activation of category-wide sale."""
+
+    help = 'Activate a sale on N skins of one category.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--rows', type=int, default=100_000)
+        parser.add_argument(
+            '--legacy-rows',
+            type=int,
+            default=1000,
+            help='Skins edited one by one, result is extrapolated.'
+        )
+
+    def generate_skins(self, rows: int) -> None:
+        batch = 10_000
+        for start in range(0, rows, batch):
+            Skins.objects.bulk_create(
+                Skins(
+                    title=f'Bench sale {num}',
+                    name='Bench',
+                    grade='Mythical',
+                    rating=0,
+                    category=BENCH_CATEGORY,
+                    priceWithoutSale=random.randint(100, 5000),
+                    sale=0,
+                )
+                for num in range(start, min(start + batch, rows))
+            )
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Skins._meta.db_table}')
+
+    def legacy_sale(self, rows: int, limit: int) -> None:
+        """Old way: edit sale of every skin, signals do the rest."""
+
+        skins = Skins.objects.filter(category=BENCH_CATEGORY)[:limit]
+        started = perf_counter()
+        for skin in skins:
+            skin.sale = 20
+            skin.save()
+        elapsed = perf_counter() - started
+        count = min(limit, rows)
+        print(f'per-row: {count} skins in {elapsed:.2f} s, '
+              f'~{elapsed / count * rows:.0f} s for {rows}')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """Handles benchmark run."""
+
+        start: datetime = datetime.now()
+        rows = options['rows']
+        with transaction.atomic():
+            self.generate_skins(rows)
+            print(
+                f'Generated {rows} rows in: '
+                f'{(datetime.now()-start).total_seconds()} seconds.'
+            )
+            now = timezone.now()
+            SaleCampaigns.objects.bulk_create([SaleCampaigns(
+                title='Bench sale',
+                starts_at=now - timedelta(minutes=1),
+                ends_at=now + timedelta(days=1),
+                categories=[BENCH_CATEGORY],
+                discount=20
+            )])
+
+            started = perf_counter()
+            changed = refresh_sale_prices(now)
+            print(f'campaign: {changed} skins in '
+                  f'{perf_counter() - started:.2f} s')
+
+            self.legacy_sale(rows, options['legacy_rows'])
+            transaction.set_rollback(True)
@@ -0,0 +1,104 @@
+# Django
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection, transaction
+
+# Python
+from datetime import datetime
+from statistics import quantiles
+from time import perf_counter
+from typing import Any, Callable
+import random
+
+# Local
+from skins.models import Skins
+from skins.search import PostgresSearchBackend, update_search_vector
+from settings.config.holy_shit import items
+
+
+QUERIES = (
+    'void',
+    'spirit',
+    'reaper',
+    'mythical',
+    'набор',
+    'предметы',
+    'antimage',
+    'treant protecter',
+)
+
+
+class Command(BaseCommand):
+    """Benchmark full-text search against name__icontains."""
+
+    help = 'Compare search latency on a generated catalog.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--rows', type=int, default=500_000)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--size', type=int, default=25)
+
+    def generate_skins(self, rows: int) -> None:
+        """Insert synthetic skins based on real catalog items."""
+
+        batch = 10_000
+        for start in range(0, rows, batch):
+            Skins.objects.bulk_create(
+                Skins(
+                    title=f'{item["title"]} {num}',
+                    name=item['name'],
+                    grade=item['grade'],
+                    kind=item['kind'],
+                    content=item['content'],
+                    rating=0,
+                    category=item['category'],
+                    priceWithoutSale=item['price'],
+                    sale=item['sale'],
+                    realPrice=item['price'],
+                )
+                for num in range(start, min(start + batch, rows))
+                for item in (random.choice(items),)
+            )
+        update_search_vector(Skins.objects.all())
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Skins._meta.db_table}')
+
+    def measure(self, name: str, run: Callable, repeat: int) -> None:
+        """Print p50/p99 latency of run over all queries."""
+
+        timings = []
+        for _ in range(repeat):
+            for query in QUERIES:
+                started = perf_counter()
+                run(query)
+                timings.append((perf_counter() - started) * 1000)
+
+        cuts = quantiles(timings, n=100)
+        print(f'{name:<10} p50 {cuts[49]:.2f} ms, p99 {cuts[98]:.2f} ms')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """Handles benchmark run."""
+
+        start: datetime = datetime.now()
+        size = options['size']
+        backend = PostgresSearchBackend()
+        with transaction.atomic():
+            self.generate_skins(options['rows'])
+            print(
+                f'Generated {options["rows"]} rows in: '
+                f'{(datetime.now()-start).total_seconds()} seconds.'
+            )
+            self.measure(
+                'icontains',
+                lambda query: list(
+                    Skins.objects.filter(name__icontains=query)[:size]
+                ),
+                options['repeat']
+            )
+            self.measure(
+                'fulltext',
+                lambda query: backend.load_page(
+                    backend.search(query)[:size]
+                ),
+                options['repeat']
+            )
+            transaction.set_rollback(True)
@@ -0,0 +1,54 @@
+# Django
+from django.core.management.base import BaseCommand, CommandParser
+
+# Python
+from datetime import datetime
+from typing import Any
+import sys
+
+# Local
+from skins.catalog_io import (
+    CATALOG_FORMATS,
+    FORMATS,
+    export_rows,
+    get_file_format,
+    write_rows,
+)
+
+
+class Command(BaseCommand):
+    """Dump skins or categories to NDJSON or CSV."""
+
+    help = 'Stream catalog rows to file.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('model', choices=list(CATALOG_FORMATS))
+        parser.add_argument('path', help='File path, - for stdout.')
+        parser.add_argument('--format', choices=FORMATS)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """Handles catalog export."""
+
+        start: datetime = datetime.now()
+        catalog_format = CATALOG_FORMATS[options['model']]
+        file_format = get_file_format(options['path'], options['format'])
+        to_stdout = options['path'] == '-'
+        file = sys.stdout if to_stdout \
+            else open(options['path'], 'w', encoding='utf-8', newline='')
+
+        try:
+            total = write_rows(
+                file,
+                file_format,
+                catalog_format.export_fields,
+                export_rows(catalog_format)
+            )
+        finally:
+            if not to_stdout:
+                file.close()
+
+        print(
+            f'Exported {total} {options["model"]} in: '
+            f'{(datetime.now()-start).total_seconds()} seconds.',
+            file=sys.stderr if to_stdout else sys.stdout
+        )
@@ -1,15 +1,25 @@
 # Python
-import requests
 from typing import Any
 from datetime import datetime
 import os
 
 # Django
-from django.core.management.base import BaseCommand
-from django.core.files.base import ContentFile
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
 
 # Local
 from skins.models import Skins, Categories
+from skins.catalog import bump_catalog_version
+from skins.ingestion import (
+    HttpSource,
+    LocalSource,
+    Manifest,
+    MediaIngestor,
+    MediaStore,
+)
+from skins.search import update_search_vector
+from skins.utils import calculate_total_price
 from settings.config.holy_shit import items as for_generate
 from settings.config.another_shit import categories
 
@@ -17,105 +27,97 @@ from settings.config.another_shit import categories
 class Command(BaseCommand):
     """Class to create data."""
 
-    def fill_skins_table(self):
-        """Generate data."""
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument(
+            '--source',
+            help='Local directory with media instead of downloading.'
+        )
+        parser.add_argument(
+            '--manifest',
+            default=os.path.join(settings.MEDIA_ROOT, 'ingest_manifest.json'),
+            help='Downloaded files, a rerun skips them.'
+        )
 
-        Skins.objects.all().delete()
+    def build_skin(self, item: dict, media: dict[str, str]) -> Skins:
+        skin = Skins(
+            title=item['title'],
+            name=item['name'],
+            rating=0,
+            grade=item['grade'],
+            category=item['category'],
+            content=item['content'],
+            version=item['version'],
+            history=item['history'],
+            kind=item['kind'],
+            priceWithoutSale=item['price'],
+            sale=item['sale'],
+            icon=media.get(item['icon'], ''),
+            image=media.get(item['image'], ''),
+            video=media.get(item['video'], ''),
+        )
+        skin.realPrice = calculate_total_price(skin)
+        return skin
 
-        for item in for_generate:
-            skin = Skins(
-                title=item['title'],
-                name=item['name'],
-                rating=0,
-                grade=item['grade'],
-                category=item['category'],
-                content=item['content'],
-                version=item['version'],
-                history=item['history'],
-                kind=item['kind'],
-                priceWithoutSale=item['price'],
-                sale=item['sale'],
-            )
-            if item['sale'] > 0:
-                skin.realPrice = item['price'] - (
-                    (item['price'] * item['sale']) / 100
-                )
-            if item['sale'] == 0:
-                skin.realPrice = item['price']
-            icon_url = item['icon']
-            if icon_url:
-                icon_content = requests.get(
-                    icon_url, 
-                    stream=True
-                ).content
-                skin.icon.save(
-                    f"{item['name']}.png", 
-                    ContentFile(icon_content), 
-                    save=True
-                )
+    def download_media(self, ingestor: MediaIngestor) -> dict[str, str]:
+        """Download media of all skins and categories."""
 
-            img_url = item['image']
-            if img_url:
-                img_content = requests.get(
-                    img_url, 
-                    stream=True
-                ).content
-                skin.image.save(
-                    f"{item['name']}.png", 
-                    ContentFile(img_content), 
-                    save=True
-                )
+        files = []
+        for item in for_generate:
+            files.append((item['icon'], 'skins/icons', '.png'))
+            files.append((item['image'], 'skins/images', '.png'))
+            files.append((item['video'], 'skins/videos', '.mp4'))
+        for category in categories:
+            files.append((category['img'], 'media/categories', '.png'))
+        return ingestor.ingest(files)
 
-            video_url = item['video']
-            if video_url:
-                video_name = os.urandom(20).hex()[:10]
-                video_content = requests.get(
-                    video_url, 
-                    stream=True
-                ).content
-                skin.video.save(
-                    f"{video_name}.mp4", 
-                    ContentFile(video_content), 
-                    save=True
-                )
+    def fill_skins_table(self, media: dict[str, str]):
+        """Generate data."""
 
-            skin.save()
-            print(f"Skin named {item['name']} created!!!")
-        
+        Skins.objects.all().delete()
+        Skins.objects.bulk_create(
+            self.build_skin(item, media) for item in for_generate
+        )
+        # bulk_create skips post_save signals.
+        update_search_vector(Skins.objects.all())
+        print(f'Skins created: {len(for_generate)}')
 
-    def fill_categories(self):
+    def fill_categories(self, media: dict[str, str]):
 
         Categories.objects.all().delete()
-
-        for category in categories:
-            obj = Categories(
+        Categories.objects.bulk_create(
+            Categories(
                 name=category['name'],
-                number=category['number']
+                number=category['number'],
+                image=media.get(category['img'], '')
             )
-
-            icon_url = category['img']
-            if icon_url:
-                icon_content = requests.get(
-                    icon_url,
-                    stream=True
-                ).content
-                obj.image.save(
-                    f'{category["name"]}.png',
-                    ContentFile(icon_content),
-                    save=True
-                )
-            obj.save()
-            print(f'Category named {category["name"]} created!!!')
-
+            for category in categories
+        )
+        print(f'Categories created: {len(categories)}')
 
     def handle(self, *args: Any, **kwargs: Any) -> None:
         """Handles data filling."""
 
         start: datetime = datetime.now()
-        self.fill_skins_table()
-        self.fill_categories()
+        source = LocalSource(kwargs['source']) if kwargs['source'] \
+            else HttpSource()
+        ingestor = MediaIngestor(
+            source=source,
+            store=MediaStore(),
+            manifest=Manifest(kwargs['manifest']),
+            workers=kwargs['workers']
+        )
+        media = self.download_media(ingestor)
+        print(
+            f'Media ready: {len(media) - len(ingestor.failed)} files, '
+            f'failed: {len(ingestor.failed)}'
+        )
+
+        with transaction.atomic():
+            self.fill_skins_table(media)
+            self.fill_categories(media)
+            transaction.on_commit(bump_catalog_version)
         print(
             f'Generated in: \
                 {(datetime.now()-start).total_seconds()} seconds.'
         )
-
@@ -0,0 +1,64 @@
+# Django
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandParser
+
+# Python
+from datetime import datetime
+from time import perf_counter
+from typing import Any
+import sys
+
+# Local
+from skins.catalog import bump_catalog_version
+from skins.catalog_io import (
+    CATALOG_FORMATS,
+    FORMATS,
+    IMPORT_BATCH,
+    get_file_format,
+    iter_batches,
+    read_rows,
+    upsert_batch,
+)
+
+
+class Command(BaseCommand):
+    """Load skins or categories from NDJSON or CSV."""
+
+    help = 'Stream catalog file and upsert rows in batches.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('model', choices=list(CATALOG_FORMATS))
+        parser.add_argument('path', help='File path, - for stdin.')
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--batch', type=int, default=IMPORT_BATCH)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """Handles catalog import."""
+
+        start: datetime = datetime.now()
+        catalog_format = CATALOG_FORMATS[options['model']]
+        file_format = get_file_format(options['path'], options['format'])
+        file = sys.stdin if options['path'] == '-' \
+            else open(options['path'], encoding='utf-8', newline='')
+
+        total = 0
+        started = perf_counter()
+        try:
+            for batch in iter_batches(
+                read_rows(file, file_format),
+                options['batch']
+            ):
+                total += upsert_batch(catalog_format, batch)
+                elapsed = perf_counter() - started
+                print(f'{total} rows, {total / elapsed:.0f} rows/s')
+        finally:
+            if file is not sys.stdin:
+                file.close()
+            if total:
+                bump_catalog_version()
+                cache.delete_pattern('skin_*_info')
+
+        print(
+            f'Imported {total} {options["model"]} in: '
+            f'{(datetime.now()-start).total_seconds()} seconds.'
+        )
@@ -0,0 +1,86 @@
+# Django
+from django.core.management.base import BaseCommand, CommandParser
+from django.test import RequestFactory
+
+# Python
+from datetime import datetime
+from typing import Any
+
+# Local
+from skins.models import Categories
+from skins.views import SkinsViewSet
+
+
+class Command(BaseCommand):
+    """Command to fill cache with first pages of skins listing."""
+
+    help = 'Render top N listing pages for every category into cache.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            '--pages',
+            type=int,
+            default=5,
+            help='How many pages to render for each category.'
+        )
+        parser.add_argument(
+            '--size',
+            type=int,
+            default=None,
+            help='Page size, paginator default if not set.'
+        )
+        parser.add_argument(
+            '--host',
+            default='localhost',
+            help='Host used in pagination links of cached pages.'
+        )
+
+    def prewarm_category(
+        self,
+        category: Any,
+        pages: int,
+        size: Any,
+        host: str
+    ) -> int:
+        """Render pages of one category until the last one."""
+
+        factory = RequestFactory()
+        view = SkinsViewSet.as_view({'get': 'list'})
+        rendered = 0
+        for page in range(1, pages + 1):
+            params = {'page': page}
+            if category is not None:
+                params['category'] = category
+            if size:
+                params['size'] = size
+
+            request = factory.get(
+                '/api/v1/items/',
+                params,
+                HTTP_HOST=host
+            )
+            response = view(request)
+            if response.status_code != 200:
+                break
+            rendered += 1
+        return rendered
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """Handles cache prewarming."""
+
+        start: datetime = datetime.now()
+        categories = [None] + list(
+            Categories.objects.values_list('number', flat=True)
+        )
+        total = 0
+        for category in categories:
+            total += self.prewarm_category(
+                category=category,
+                pages=options['pages'],
+                size=options['size'],
+                host=options['host']
+            )
+        print(
+            f'Prewarmed {total} pages in: '
+            f'{(datetime.now()-start).total_seconds()} seconds.'
+        )
@@ -0,0 +1,44 @@
+# Django
+from django.core.management.base import BaseCommand, CommandParser
+
+# Python
+from datetime import datetime
+from typing import Any
+
+# Local
+from skins.models import Skins
+from skins.search import update_search_vector
+
+
+class Command(BaseCommand):
+    """Command to recompute stored search vectors."""
+
+    help = 'Recompute search vectors of all skins in batches.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--batch', type=int, default=5000)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """Handles search index rebuild."""
+
+        start: datetime = datetime.now()
+        batch = options['batch']
+        last_id = 0
+        updated = 0
+        while True:
+            ids = list(
+                Skins.objects.filter(id__gt=last_id)
+                .order_by('id')
+                .values_list('id', flat=True)[:batch]
+            )
+            if not ids:
+                break
+            updated += update_search_vector(
+                Skins.objects.filter(id__in=ids)
+            )
+            last_id = ids[-1]
+
+        print(
+            f'Updated {updated} search vectors in: '
+            f'{(datetime.now()-start).total_seconds()} seconds.'
+        )
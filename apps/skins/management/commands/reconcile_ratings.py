@@ -0,0 +1,73 @@
+# Django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+
+# Python
+from datetime import datetime
+from typing import Any
+
+# Local
+from skins.models import Skins
+from skins.ratings import (
+    COUNTER_FIELDS,
+    DIRTY_KEY,
+    RATING_KEY,
+    STATS_FIELDS,
+    ReviewStats,
+    aggregate_ratings,
+    flush_ratings,
+)
+
+
+class Command(BaseCommand):
+    """Command to recompute skin ratings from reviews."""
+
+    help = 'Compare rating counters with reviews, --fix to rewrite them.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Reset counters and ratings from reviews table.'
+        )
+        parser.add_argument('--batch', type=int, default=1000)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """Handles ratings reconcile."""
+
+        start: datetime = datetime.now()
+        redis = settings.REDIS
+        exact = aggregate_ratings()
+        skins = Skins.objects.order_by('id').only(*STATS_FIELDS)
+
+        drift = 0
+        checked = 0
+        for skin in skins.iterator(chunk_size=options['batch']):
+            checked += 1
+            stats = exact.get(skin.id, ReviewStats())
+            stored = redis.hmget(
+                RATING_KEY.format(skin.id),
+                *COUNTER_FIELDS
+            )
+            counters = ReviewStats.from_counters(stored).to_counters()
+            if not stats.matches(skin) \
+                    or None in stored or counters != stats.to_counters():
+                drift += 1
+                print(f'Skin {skin.id}: rating {skin.rating}, '
+                      f'count {skin.reviews_count}, counters {stored}, '
+                      f'reviews {stats.to_counters()}')
+                if options['fix']:
+                    redis.hset(
+                        RATING_KEY.format(skin.id),
+                        mapping=stats.to_counters()
+                    )
+                    redis.sadd(DIRTY_KEY, skin.id)
+
+        if options['fix']:
+            while flush_ratings(options['batch']):
+                pass
+
+        print(
+            f'Checked {checked} skins, {drift} drifted, in: '
+            f'{(datetime.now()-start).total_seconds()} seconds.'
+        )
@@ -1,4 +1,7 @@
 # Django
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import (
     MinValueValidator, 
     MaxValueValidator,
@@ -13,6 +16,13 @@ from dirtyfields import DirtyFieldsMixin
 from auths.models import Client
 
 
+RATING_VALUES = range(1, 6)
+
+
+def get_empty_histogram() -> list[int]:
+    return [0] * len(RATING_VALUES)
+
+
 class Skins(DirtyFieldsMixin, models.Model):
     """Class for Skins."""
 
@@ -38,6 +48,24 @@ class Skins(DirtyFieldsMixin, models.Model):
         null=False,
         validators=[MaxValueValidator(5)]
     )
+    # Stats of rated reviews, written by flush_ratings.
+    rating_average = models.FloatField(
+        verbose_name='средняя оценка',
+        default=0,
+        editable=False
+    )
+    reviews_count = models.PositiveIntegerField(
+        verbose_name='количество оценок',
+        default=0,
+        editable=False
+    )
+    rating_histogram = ArrayField(
+        models.PositiveIntegerField(),
+        size=len(RATING_VALUES),
+        default=get_empty_histogram,
+        editable=False,
+        verbose_name='оценки по звёздам'
+    )
     category = models.PositiveSmallIntegerField(
         verbose_name='категория',
         null=False
@@ -94,11 +122,67 @@ class Skins(DirtyFieldsMixin, models.Model):
         verbose_name='дата создания',
         default=timezone.now
     )
+    search_vector = SearchVectorField(
+        verbose_name='поисковый вектор',
+        null=True,
+        editable=False
+    )
+    sale_campaign = models.ForeignKey(
+        to='SaleCampaigns',
+        related_name='skins',
+        verbose_name='акция',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False
+    )
 
     class Meta:
         ordering = ('id',)
         verbose_name = 'скин'
         verbose_name_plural = 'скины'
+        indexes = [
+            GinIndex(
+                fields=['search_vector'],
+                name='skins_search_vector_gin'
+            ),
+            GinIndex(
+                fields=['name'],
+                name='skins_name_trgm',
+                opclasses=['gin_trgm_ops']
+            ),
+            GinIndex(
+                fields=['title'],
+                name='skins_title_trgm',
+                opclasses=['gin_trgm_ops']
+            ),
+            models.Index(
+                fields=['category', 'realPrice', 'id'],
+                name='skins_category_price'
+            ),
+            models.Index(
+                fields=['realPrice', 'id'],
+                name='skins_real_price'
+            ),
+            models.Index(
+                fields=['created_at'],
+                name='skins_created_at'
+            ),
+            models.Index(
+                fields=['rating_average', 'id'],
+                name='skins_rating_average'
+            ),
+            models.Index(
+                fields=['reviews_count', 'id'],
+                name='skins_reviews_count'
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=('name', 'title'),
+                name='unique_skin_name_title'
+            ),
+        ]
 
     def changed_fields(self):
         """Method for get changed fields."""
@@ -134,6 +218,12 @@ class UserSkins(models.Model):
         ordering = ('id',)
         verbose_name = 'скин пользователя'
         verbose_name_plural = 'скины пользователя'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'skin'),
+                name='unique_user_skin'
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.user.username
@@ -172,6 +262,20 @@ class Reviews(models.Model):
         verbose_name = 'отзыв'
         verbose_name_plural = 'отзывы'
         unique_together = ('user', 'skin')
+        indexes = [
+            models.Index(
+                fields=['skin', 'id'],
+                name='reviews_skin_id'
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember stored rating for incremental skin rating."""
+
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_rating = instance.__dict__.get('rating')
+        return instance
 
     def __str__(self) -> str:
         return f"{self.user.username}|{self.rating}" 
@@ -202,3 +306,134 @@ class Categories(models.Model):
     def __str__(self) -> str:
         return self.name
     
+
+
+class SaleCampaigns(models.Model):
+    """Sale on categories or chosen skins for a time window."""
+
+    PERCENT = 'percent'
+    ABSOLUTE = 'absolute'
+    DISCOUNT_TYPES = (
+        (PERCENT, 'процент'),
+        (ABSOLUTE, 'сумма'),
+    )
+
+    title = models.CharField(
+        verbose_name='название',
+        max_length=200
+    )
+    starts_at = models.DateTimeField(
+        verbose_name='начало'
+    )
+    ends_at = models.DateTimeField(
+        verbose_name='окончание'
+    )
+    categories = ArrayField(
+        models.PositiveSmallIntegerField(),
+        verbose_name='категории',
+        default=list,
+        blank=True
+    )
+    skin_ids = ArrayField(
+        models.BigIntegerField(),
+        verbose_name='скины',
+        default=list,
+        blank=True
+    )
+    discount_type = models.CharField(
+        verbose_name='тип скидки',
+        max_length=10,
+        choices=DISCOUNT_TYPES,
+        default=PERCENT
+    )
+    discount = models.PositiveIntegerField(
+        verbose_name='скидка'
+    )
+    started_at = models.DateTimeField(
+        verbose_name='применена',
+        null=True,
+        blank=True,
+        editable=False
+    )
+    finished_at = models.DateTimeField(
+        verbose_name='снята',
+        null=True,
+        blank=True,
+        editable=False
+    )
+
+    class Meta:
+        ordering = ('-starts_at',)
+        verbose_name = 'акция'
+        verbose_name_plural = 'акции'
+        indexes = [
+            models.Index(
+                fields=['starts_at', 'ends_at'],
+                name='sale_campaigns_window'
+            ),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(ends_at__gt=models.F('starts_at')),
+                name='sale_campaign_window'
+            ),
+            models.CheckConstraint(
+                check=~models.Q(discount_type='percent')
+                | models.Q(discount__lte=100),
+                name='sale_campaign_percent'
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember stored targets, prices of dropped
+        ones must be recomputed too."""
+
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_targets = (
+            list(instance.__dict__.get('categories') or []),
+            list(instance.__dict__.get('skin_ids') or []),
+        )
+        return instance
+
+    def __str__(self) -> str:
+        return self.title
+
+
+class PriceChanges(models.Model):
+    """Audit entry of one bulk repricing."""
+
+    user = models.ForeignKey(
+        to=Client,
+        related_name='price_changes',
+        verbose_name='пользователь',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True
+    )
+    category = models.PositiveSmallIntegerField(
+        verbose_name='категория',
+        null=True,
+        blank=True
+    )
+    sale = models.PositiveSmallIntegerField(
+        verbose_name='скидка',
+        null=True,
+        blank=True,
+        validators=[MaxValueValidator(100)]
+    )
+    skins_count = models.PositiveIntegerField(
+        verbose_name='количество скинов'
+    )
+    created_at = models.DateTimeField(
+        verbose_name='дата изменения',
+        auto_now_add=True
+    )
+
+    class Meta:
+        ordering = ('-created_at',)
+        verbose_name = 'изменение цен'
+        verbose_name_plural = 'изменения цен'
+
+    def __str__(self) -> str:
+        return f'{self.skins_count} скинов|{self.sale}%'
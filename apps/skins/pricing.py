@@ -0,0 +1,214 @@
+# Django
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import (
+    ExpressionWrapper,
+    F,
+    PositiveBigIntegerField,
+    Q,
+    QuerySet,
+    Value,
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+# Python
+from datetime import datetime
+from typing import Any, Iterable, Optional
+import logging
+
+# Local
+from .models import PriceChanges, SaleCampaigns, Skins
+from .catalog import bump_catalog_version
+
+
+logger = logging.getLogger(__name__)
+
+INVALIDATE_BATCH = 1000
+
+
+def get_real_price_expression(sale: Optional[int] = None) -> Any:
+    """realPrice as SQL, same result as calculate_total_price:
+    integer division truncates like int() does for prices.
+    With sale given it is used instead of stored column."""
+
+    sale_value = Value(sale) if sale is not None \
+        else Coalesce(F('sale'), Value(0))
+    return ExpressionWrapper(
+        F('priceWithoutSale') * (Value(100) - sale_value) / Value(100),
+        output_field=PositiveBigIntegerField()
+    )
+
+
+def invalidate_skins(skin_ids: list[int]) -> None:
+    """Drop cached details of skins and listing pages."""
+
+    for start in range(0, len(skin_ids), INVALIDATE_BATCH):
+        cache.delete_many([
+            f'skin_{skin_id}_info'
+            for skin_id in skin_ids[start:start + INVALIDATE_BATCH]
+        ])
+    bump_catalog_version()
+
+
+def reprice(
+    queryset: QuerySet,
+    sale: Optional[int] = None,
+    user: Any = None,
+    category: Optional[int] = None
+) -> int:
+    """Set sale (when given) and recompute realPrice of skins
+    with one UPDATE, without per-row signals. Running sales
+    are applied on top with one more UPDATE."""
+
+    with transaction.atomic():
+        skin_ids = list(
+            queryset.select_for_update().values_list('id', flat=True)
+        )
+        if not skin_ids:
+            return 0
+
+        fields = {'realPrice': get_real_price_expression(sale)}
+        if sale is not None:
+            fields['sale'] = sale
+        queryset.order_by().update(**fields)
+        if get_active_campaigns().exists():
+            apply_campaign_prices(skin_ids=skin_ids)
+
+        PriceChanges.objects.create(
+            user=user if getattr(user, 'pk', None) else None,
+            category=category,
+            sale=sale,
+            skins_count=len(skin_ids)
+        )
+        transaction.on_commit(lambda: invalidate_skins(skin_ids))
+
+    logger.info(f'Repriced {len(skin_ids)} skins, sale {sale}')
+    return len(skin_ids)
+
+
+def set_category_sale(category: int, sale: int, user: Any = None) -> int:
+    """Sale in percents on all skins of category."""
+
+    return reprice(
+        Skins.objects.filter(category=category),
+        sale=sale,
+        user=user,
+        category=category
+    )
+
+
+def get_active_campaigns(now: Optional[datetime] = None) -> QuerySet:
+    now = now or timezone.now()
+    return SaleCampaigns.objects.filter(starts_at__lte=now, ends_at__gt=now)
+
+
+def apply_campaign_prices(
+    categories: Optional[Iterable[int]] = None,
+    skin_ids: Optional[Iterable[int]] = None,
+    now: Optional[datetime] = None
+) -> list[int]:
+    """Materialize effective prices into realPrice with one UPDATE.
+
+    Price is the cheapest of own sale price and offers of running
+    campaigns aimed at skin category or skin itself. Without
+    categories and skin_ids all skins are recomputed.
+    Return ids of skins whose price changed."""
+
+    qn = connection.ops.quote_name
+    skins = qn(Skins._meta.db_table)
+    campaigns = qn(SaleCampaigns._meta.db_table)
+    params = {'now': now or timezone.now()}
+    if categories is None and skin_ids is None:
+        scope = 'TRUE'
+    else:
+        scope = 'category = ANY(%(categories)s::integer[]) ' \
+            'OR id = ANY(%(skin_ids)s::bigint[])'
+        params['categories'] = list(categories or [])
+        params['skin_ids'] = list(skin_ids or [])
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'''
+            WITH targets AS (
+                SELECT id, category,
+                    "priceWithoutSale" AS full_price,
+                    "priceWithoutSale"
+                        * (100 - COALESCE(sale, 0)) / 100 AS base_price
+                FROM {skins}
+                WHERE {scope}
+            ),
+            offers AS (
+                SELECT DISTINCT ON (t.id) t.id, c.id AS campaign_id,
+                    CASE WHEN c.discount_type = %(percent)s
+                        THEN t.full_price * (100 - c.discount) / 100
+                        ELSE GREATEST(t.full_price - c.discount, 0)
+                    END AS price
+                FROM targets t
+                JOIN {campaigns} c
+                    ON c.starts_at <= %(now)s AND c.ends_at > %(now)s
+                    AND (t.category = ANY(c.categories)
+                         OR t.id = ANY(c.skin_ids))
+                ORDER BY t.id, price, c.id
+            ),
+            prices AS (
+                SELECT t.id,
+                    CASE WHEN o.price < t.base_price
+                        THEN o.price ELSE t.base_price END AS price,
+                    CASE WHEN o.price < t.base_price
+                        THEN o.campaign_id END AS campaign_id
+                FROM targets t
+                LEFT JOIN offers o ON o.id = t.id
+            )
+            UPDATE {skins} s
+            SET "realPrice" = p.price, sale_campaign_id = p.campaign_id
+            FROM prices p
+            WHERE s.id = p.id
+                AND (s."realPrice" IS DISTINCT FROM p.price
+                     OR s.sale_campaign_id IS DISTINCT FROM p.campaign_id)
+            RETURNING s.id
+            ''',
+            {**params, 'percent': SaleCampaigns.PERCENT}
+        )
+        changed = [row[0] for row in cursor.fetchall()]
+        if changed:
+            transaction.on_commit(lambda: invalidate_skins(changed))
+    return changed
+
+
+def refresh_sale_prices(now: Optional[datetime] = None) -> int:
+    """Apply campaigns whose window started or ended since
+    last run, return count of repriced skins."""
+
+    now = now or timezone.now()
+    with transaction.atomic():
+        due = list(
+            SaleCampaigns.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(starts_at__lte=now, started_at__isnull=True)
+                | Q(ends_at__lte=now, finished_at__isnull=True)
+            )
+        )
+        if not due:
+            return 0
+
+        categories, skin_ids = set(), set()
+        for campaign in due:
+            categories.update(campaign.categories)
+            skin_ids.update(campaign.skin_ids)
+            campaign.started_at = campaign.started_at or now
+            if campaign.ends_at <= now:
+                campaign.finished_at = now
+
+        changed = apply_campaign_prices(categories, skin_ids, now)
+        SaleCampaigns.objects.bulk_update(
+            due,
+            ['started_at', 'finished_at']
+        )
+        PriceChanges.objects.create(skins_count=len(changed))
+
+    logger.info(
+        f'Sales {[campaign.id for campaign in due]} applied, '
+        f'{len(changed)} skins repriced'
+    )
+    return len(changed)
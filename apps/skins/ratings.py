@@ -0,0 +1,264 @@
+# Django
+from django.conf import settings
+from django.db.models import Count, Q, Sum
+
+# Python
+from typing import Optional
+import logging
+
+# Local
+from .models import RATING_VALUES, Reviews, Skins, get_empty_histogram
+from .catalog import bump_catalog_version
+from abstract.cache import invalidate_tags, skin_tag
+
+
+logger = logging.getLogger(__name__)
+
+RATING_KEY = 'skin_rating:{}'
+DIRTY_KEY = 'skin_rating:dirty'
+CATALOG_STALE_KEY = 'skin_rating:catalog_stale'
+CATALOG_BUMP_KEY = 'skin_rating:catalog_bumped'
+# Listing pages and catalog index are rebuilt at most this
+# often because of ratings, flush itself runs every few seconds.
+CATALOG_BUMP_INTERVAL = 60
+FLUSH_BATCH = 1000
+STATS_FIELDS = [
+    'rating',
+    'rating_average',
+    'reviews_count',
+    'rating_histogram',
+]
+
+HISTOGRAM_FIELDS = tuple(f'r{value}' for value in RATING_VALUES)
+COUNTER_FIELDS = ('sum', 'count') + HISTOGRAM_FIELDS
+
+# Applies delta only to seeded counters, so a skin never gets
+# a partial sum of its reviews. Counters seeded before the
+# histogram was added have no r1 field and are seeded again.
+APPLY_DELTA_SCRIPT = """
+if redis.call('HEXISTS', KEYS[1], 'r1') == 0 then
+    return 0
+end
+redis.call('HINCRBY', KEYS[1], 'sum', ARGV[2])
+redis.call('HINCRBY', KEYS[1], 'count', ARGV[3])
+if ARGV[4] ~= '' then
+    redis.call('HINCRBY', KEYS[1], ARGV[4], -1)
+end
+if ARGV[5] ~= '' then
+    redis.call('HINCRBY', KEYS[1], ARGV[5], 1)
+end
+redis.call('SADD', KEYS[2], ARGV[1])
+return 1
+"""
+SEED_SCRIPT = """
+if redis.call('HEXISTS', KEYS[1], 'r1') == 0 then
+    redis.call('HSET', KEYS[1], unpack(ARGV, 2))
+end
+redis.call('SADD', KEYS[2], ARGV[1])
+return 1
+"""
+
+
+class ReviewStats:
+    """Sum, count and 1-5 histogram of rated reviews."""
+
+    __slots__ = ('rating_sum', 'rating_count', 'histogram')
+
+    def __init__(
+        self,
+        rating_sum: int = 0,
+        rating_count: int = 0,
+        histogram: Optional[list[int]] = None
+    ):
+        self.rating_sum = rating_sum
+        self.rating_count = rating_count
+        self.histogram = histogram or get_empty_histogram()
+
+    @classmethod
+    def from_counters(cls, values: list) -> 'ReviewStats':
+        """Stats from HMGET of COUNTER_FIELDS."""
+
+        rating_sum, rating_count, *histogram = [
+            int(value or 0) for value in values
+        ]
+        return cls(rating_sum, rating_count, histogram)
+
+    def to_counters(self) -> dict[str, int]:
+        return {
+            'sum': self.rating_sum,
+            'count': self.rating_count,
+            **dict(zip(HISTOGRAM_FIELDS, self.histogram)),
+        }
+
+    @property
+    def average(self) -> float:
+        if not self.rating_count:
+            return 0
+        return self.rating_sum / self.rating_count
+
+    def apply_to(self, skin: Skins) -> Skins:
+        skin.rating = get_average(self.rating_sum, self.rating_count)
+        skin.rating_average = self.average
+        skin.reviews_count = self.rating_count
+        skin.rating_histogram = self.histogram
+        return skin
+
+    def matches(self, skin: Skins) -> bool:
+        """Stored columns of skin agree with stats."""
+
+        return (
+            skin.rating,
+            skin.rating_average,
+            skin.reviews_count,
+            list(skin.rating_histogram),
+        ) == (
+            get_average(self.rating_sum, self.rating_count),
+            self.average,
+            self.rating_count,
+            self.histogram,
+        )
+
+
+def get_rating_delta(
+    old: Optional[int],
+    new: Optional[int]
+) -> tuple[int, int]:
+    """Change of (sum, count) when review rating goes old -> new.
+    None means no rating, it is skipped like in Avg."""
+
+    sum_delta = (new or 0) - (old or 0)
+    count_delta = (new is not None) - (old is not None)
+    return sum_delta, count_delta
+
+
+def get_average(rating_sum: int, rating_count: int) -> int:
+    """Skin rating from counters."""
+
+    if not rating_count:
+        return 0
+    return round(rating_sum / rating_count)
+
+
+def aggregate_ratings(
+    skin_ids: Optional[list[int]] = None
+) -> dict[int, ReviewStats]:
+    """Exact stats per skin from reviews table, one query."""
+
+    reviews = Reviews.objects.all()
+    if skin_ids is not None:
+        reviews = reviews.filter(skin_id__in=skin_ids)
+    rows = reviews.order_by().values('skin_id').annotate(
+        rating_sum=Sum('rating'),
+        rating_count=Count('rating'),
+        **{
+            field: Count('id', filter=Q(rating=value))
+            for field, value in zip(HISTOGRAM_FIELDS, RATING_VALUES)
+        }
+    )
+    return {
+        row['skin_id']: ReviewStats(
+            row['rating_sum'] or 0,
+            row['rating_count'],
+            [row[field] for field in HISTOGRAM_FIELDS]
+        )
+        for row in rows
+    }
+
+
+def seed_rating(skin_id: int) -> None:
+    """Start counters of skin from database."""
+
+    stats = aggregate_ratings([skin_id]).get(skin_id, ReviewStats())
+    settings.REDIS.eval(
+        SEED_SCRIPT,
+        2,
+        RATING_KEY.format(skin_id),
+        DIRTY_KEY,
+        skin_id,
+        *[item for pair in stats.to_counters().items() for item in pair]
+    )
+
+
+def get_bucket(rating: Optional[int]) -> str:
+    return f'r{rating}' if rating else ''
+
+
+def apply_rating_delta(
+    skin_id: int,
+    old_rating: Optional[int],
+    new_rating: Optional[int]
+) -> None:
+    """Update running counters and mark skin for flush."""
+
+    if old_rating == new_rating:
+        return
+    sum_delta, count_delta = get_rating_delta(old_rating, new_rating)
+    applied = settings.REDIS.eval(
+        APPLY_DELTA_SCRIPT,
+        2,
+        RATING_KEY.format(skin_id),
+        DIRTY_KEY,
+        skin_id,
+        sum_delta,
+        count_delta,
+        get_bucket(old_rating),
+        get_bucket(new_rating)
+    )
+    if not applied:
+        # Called after commit, so database already
+        # contains this change.
+        seed_rating(skin_id)
+
+
+def reset_rating(skin_id: int) -> None:
+    """Drop counters, next flush starts them from database."""
+
+    settings.REDIS.delete(RATING_KEY.format(skin_id))
+    seed_rating(skin_id)
+
+
+def flush_ratings(batch: int = FLUSH_BATCH) -> int:
+    """Write ratings of changed skins with one bulk UPDATE."""
+
+    redis = settings.REDIS
+    skin_ids = [int(pk) for pk in redis.spop(DIRTY_KEY, batch) or []]
+    if not skin_ids:
+        bump_catalog_if_due()
+        return 0
+
+    try:
+        pipe = redis.pipeline(transaction=False)
+        for skin_id in skin_ids:
+            pipe.hmget(RATING_KEY.format(skin_id), *COUNTER_FIELDS)
+        counters = pipe.execute()
+
+        skins = [
+            ReviewStats.from_counters(values).apply_to(Skins(id=skin_id))
+            for skin_id, values in zip(skin_ids, counters)
+        ]
+        Skins.objects.bulk_update(skins, STATS_FIELDS)
+    except Exception:
+        redis.sadd(DIRTY_KEY, *skin_ids)
+        raise
+
+    invalidate_tags(*[skin_tag(skin_id) for skin_id in skin_ids])
+    redis.set(CATALOG_STALE_KEY, 1)
+    bump_catalog_if_due()
+
+    logger.info(f'Ratings of {len(skin_ids)} skins flushed')
+    return len(skin_ids)
+
+
+def bump_catalog_if_due() -> bool:
+    """Bump catalog version if ratings changed since last
+    bump and CATALOG_BUMP_INTERVAL passed, changes made in
+    between are bumped by a later flush."""
+
+    redis = settings.REDIS
+    if not redis.exists(CATALOG_STALE_KEY):
+        return False
+    if not redis.set(CATALOG_BUMP_KEY, 1, nx=True, ex=CATALOG_BUMP_INTERVAL):
+        return False
+    redis.delete(CATALOG_STALE_KEY)
+    bump_catalog_version()
+    return True
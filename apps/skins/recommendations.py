@@ -0,0 +1,273 @@
+# Django
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count
+
+# Python
+from array import array
+from collections import Counter, defaultdict
+from itertools import groupby, zip_longest
+from operator import itemgetter
+from typing import Iterable, Optional
+import heapq
+import random
+
+# Local
+from .models import Skins, UserSkins
+
+
+RECOMMENDED_COUNT = 40
+CATEGORY_LIST_SIZE = 100
+NEIGHBOURS_COUNT = 50
+MIN_REVIEWS = 3
+# Collectors own most of the catalog, their pairs say little
+# and grow quadratically, so they are left out of co-purchases.
+MAX_COLLECTION_SIZE = 500
+STORE_TIMEOUT = 2 * 60 * 60
+WRITE_BATCH = 1000
+USER_KEY = 'recommend:user:{}'
+CATEGORY_KEY = 'recommend:category:{}'
+POPULAR_KEY = 'recommend:popular'
+POOL_KEY = 'recommend:pool'
+ID_TYPECODE = 'q'
+
+
+def pack_ids(ids: Iterable[int]) -> bytes:
+    """Ids as 8 byte integers, compact to store and read."""
+
+    return array(ID_TYPECODE, ids).tobytes()
+
+
+def unpack_ids(data: Optional[bytes]) -> list[int]:
+    ids = array(ID_TYPECODE)
+    if data:
+        ids.frombytes(data)
+    return ids.tolist()
+
+
+def merge_ids(*lists: list[int], limit: int) -> list[int]:
+    """Round robin over lists without repeats, up to limit."""
+
+    merged = {}
+    for row in zip_longest(*lists):
+        for skin_id in row:
+            if skin_id is not None:
+                merged.setdefault(skin_id)
+        if len(merged) >= limit:
+            break
+    return list(merged)[:limit]
+
+
+def get_co_purchases(
+    neighbours: int = NEIGHBOURS_COUNT,
+    max_collection: int = MAX_COLLECTION_SIZE
+) -> dict[int, list[int]]:
+    """Skins most often owned together with each skin,
+    most frequent first."""
+
+    qn = connection.ops.quote_name
+    table = qn(UserSkins._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'''
+            WITH owners AS (
+                SELECT user_id FROM {table}
+                GROUP BY user_id
+                HAVING COUNT(*) BETWEEN 2 AND %s
+            ), pairs AS (
+                SELECT a.skin_id, b.skin_id AS other_id,
+                       COUNT(*) AS together
+                FROM {table} a
+                JOIN {table} b
+                    ON b.user_id = a.user_id AND b.skin_id <> a.skin_id
+                WHERE a.user_id IN (SELECT user_id FROM owners)
+                GROUP BY a.skin_id, b.skin_id
+            ), ranked AS (
+                SELECT skin_id, other_id, ROW_NUMBER() OVER (
+                    PARTITION BY skin_id
+                    ORDER BY together DESC, other_id
+                ) AS position
+                FROM pairs
+            )
+            SELECT skin_id, other_id FROM ranked
+            WHERE position <= %s
+            ORDER BY skin_id, position
+            ''',
+            [max_collection, neighbours]
+        )
+        return {
+            skin_id: [other_id for _, other_id in rows]
+            for skin_id, rows in groupby(cursor.fetchall(), itemgetter(0))
+        }
+
+
+class CatalogLists:
+    """Popular and top rated skins, overall and per category."""
+
+    def __init__(self, size: int = CATEGORY_LIST_SIZE):
+        self.size = size
+        self.owners = dict(
+            UserSkins.objects.values_list('skin_id')
+            .annotate(owners=Count('id'))
+            .order_by()
+        )
+        self.category_of: dict[int, int] = {}
+        self.categories: dict[int, list[int]] = {}
+        self.popular: list[int] = []
+        self.load()
+
+    def load(self) -> None:
+        rows = defaultdict(list)
+        for skin_id, category, average, reviews_count in (
+            Skins.objects.order_by('id').values_list(
+                'id', 'category', 'rating_average', 'reviews_count'
+            ).iterator()
+        ):
+            self.category_of[skin_id] = category
+            rows[category].append((skin_id, average, reviews_count))
+
+        for category, skins in rows.items():
+            self.categories[category] = merge_ids(
+                self.get_popular(skin_id for skin_id, _, _ in skins),
+                [skin_id for skin_id, _, _ in heapq.nlargest(
+                    self.size,
+                    [skin for skin in skins if skin[2] >= MIN_REVIEWS],
+                    key=lambda skin: (skin[1], skin[2], -skin[0])
+                )],
+                limit=self.size
+            )
+        self.popular = self.get_popular(self.category_of)
+
+    def get_popular(self, skin_ids: Iterable[int]) -> list[int]:
+        return heapq.nlargest(
+            self.size,
+            [skin_id for skin_id in skin_ids if skin_id in self.owners],
+            key=lambda skin_id: (self.owners[skin_id], -skin_id)
+        )
+
+    @property
+    def skin_ids(self) -> list[int]:
+        return list(self.category_of)
+
+    def get_fallback(self, owned: list[int]) -> list[int]:
+        """Lists of categories user buys most, then popular."""
+
+        categories = Counter(
+            self.category_of[skin_id] for skin_id in owned
+            if skin_id in self.category_of
+        )
+        return merge_ids(
+            *[self.categories[category]
+              for category, _ in categories.most_common()],
+            self.popular,
+            limit=self.size + len(owned)
+        )
+
+
+def rank_for_user(
+    owned: list[int],
+    neighbours: dict[int, list[int]],
+    fallback: list[int],
+    count: int = RECOMMENDED_COUNT
+) -> list[int]:
+    """Skins co-purchased with owned ones, closer neighbours
+    weigh more, filled up from fallback. Owned are left out."""
+
+    scores = Counter()
+    for skin_id in owned:
+        for position, other_id in enumerate(neighbours.get(skin_id, ())):
+            scores[other_id] += 1 / (position + 1)
+    excluded = set(owned)
+    ranked = [
+        skin_id for skin_id in sorted(
+            scores, key=lambda skin_id: (-scores[skin_id], skin_id)
+        ) if skin_id not in excluded
+    ][:count]
+    excluded.update(ranked)
+    ranked += [
+        skin_id for skin_id in fallback if skin_id not in excluded
+    ][:count - len(ranked)]
+    return ranked
+
+
+def build_recommendations(
+    count: int = RECOMMENDED_COUNT
+) -> dict[str, int]:
+    """Write per user, per category, popular and pool id arrays.
+    Keys live for two runs, so one failed run serves old lists."""
+
+    neighbours = get_co_purchases()
+    lists = CatalogLists()
+    pipeline = settings.REDIS.pipeline(transaction=False)
+    for category, skin_ids in lists.categories.items():
+        pipeline.set(
+            CATEGORY_KEY.format(category),
+            pack_ids(skin_ids),
+            ex=STORE_TIMEOUT
+        )
+    pipeline.set(POPULAR_KEY, pack_ids(lists.popular), ex=STORE_TIMEOUT)
+    pipeline.set(POOL_KEY, pack_ids(lists.skin_ids), ex=STORE_TIMEOUT)
+    pipeline.execute()
+
+    users = 0
+    owned_skins = UserSkins.objects.order_by('user_id', 'skin_id') \
+        .values_list('user_id', 'skin_id').iterator(chunk_size=WRITE_BATCH)
+    for user_id, rows in groupby(owned_skins, itemgetter(0)):
+        owned = [skin_id for _, skin_id in rows]
+        pipeline.set(
+            USER_KEY.format(user_id),
+            pack_ids(rank_for_user(
+                owned, neighbours, lists.get_fallback(owned), count
+            )),
+            ex=STORE_TIMEOUT
+        )
+        users += 1
+        if users % WRITE_BATCH == 0:
+            pipeline.execute()
+    pipeline.execute()
+
+    return {
+        'users': users,
+        'categories': len(lists.categories),
+        'skins': len(lists.category_of),
+    }
+
+
+def refresh_pool() -> list[int]:
+    """Pool of all skin ids, before first build finished."""
+
+    skin_ids = list(Skins.objects.order_by('id').values_list('id', flat=True))
+    settings.REDIS.set(POOL_KEY, pack_ids(skin_ids), ex=STORE_TIMEOUT)
+    return skin_ids
+
+
+def pick_random(
+    pool: list[int],
+    count: int,
+    excluded: Iterable[int] = ()
+) -> list[int]:
+    """Up to count distinct ids of pool, none of excluded."""
+
+    excluded = set(excluded)
+    sample = random.sample(pool, min(len(pool), count + len(excluded)))
+    return [skin_id for skin_id in sample if skin_id not in excluded][:count]
+
+
+def get_recommended_ids(
+    user_id: int,
+    count: int = RECOMMENDED_COUNT
+) -> list[int]:
+    """Recommended skin ids of user in one read: own list,
+    popular for new users, random picks from pool to fill up."""
+
+    user_ids, popular, pool = settings.REDIS.mget(
+        USER_KEY.format(user_id), POPULAR_KEY, POOL_KEY
+    )
+    skin_ids = (unpack_ids(user_ids) or unpack_ids(popular))[:count]
+    if len(skin_ids) < count:
+        skin_ids += pick_random(
+            unpack_ids(pool) or refresh_pool(),
+            count - len(skin_ids),
+            excluded=skin_ids
+        )
+    return skin_ids
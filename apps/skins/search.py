@@ -0,0 +1,228 @@
+# Django
+from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchHeadline,
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    TrigramWordSimilarity,
+)
+from django.db import connection
+from django.db.models import F, Q, QuerySet
+from django.db.models.functions import Greatest
+
+# Python
+from typing import Any, Iterable, Optional, Sequence
+import re
+
+# Local
+from .models import Skins
+from .catalog import get_skins_by_ids
+
+
+SEARCH_CONFIGS = ('english', 'russian')
+SEARCH_WEIGHTS = {
+    'A': ('name', 'title'),
+    'B': ('kind', 'grade'),
+    'C': ('content',),
+}
+SEARCH_FIELDS = tuple(
+    field for fields in SEARCH_WEIGHTS.values() for field in fields
+)
+HIGHLIGHT_FIELDS = ('title', 'content')
+HIGHLIGHT_START = '<mark>'
+HIGHLIGHT_STOP = '</mark>'
+TYPO_SIMILARITY = 0.3
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text: Optional[str]) -> list[str]:
+    """Split text to lowercase words."""
+
+    return TOKEN_RE.findall((text or '').lower())
+
+
+def build_search_vector() -> SearchVector:
+    """Weighted vector over searchable fields in all configs."""
+
+    vector = None
+    for config in SEARCH_CONFIGS:
+        for weight, fields in SEARCH_WEIGHTS.items():
+            part = SearchVector(*fields, weight=weight, config=config)
+            vector = part if vector is None else vector + part
+    return vector
+
+
+def update_search_vector(queryset: QuerySet) -> int:
+    """Recompute stored vectors with one UPDATE."""
+
+    if connection.vendor != 'postgresql':
+        return 0
+    return queryset.update(search_vector=build_search_vector())
+
+
+class PostgresSearchBackend:
+    """Search by stored tsvector with prefix matching,
+    trigram word similarity covers typos in names."""
+
+    def get_query(self, tokens: list[str]) -> SearchQuery:
+        raw = ' & '.join(f'{token}:*' for token in tokens)
+        query = None
+        for config in SEARCH_CONFIGS:
+            part = SearchQuery(raw, config=config, search_type='raw')
+            query = part if query is None else query | part
+        return query
+
+    def search(self, text: str) -> QuerySet:
+        """Ranked QuerySet of matching skins."""
+
+        tokens = tokenize(text)
+        query = self.get_query(tokens)
+        phrase = ' '.join(tokens)
+        headlines = {
+            f'headline_{field}': SearchHeadline(
+                field,
+                query,
+                config=SEARCH_CONFIGS[-1],
+                start_sel=HIGHLIGHT_START,
+                stop_sel=HIGHLIGHT_STOP,
+            )
+            for field in HIGHLIGHT_FIELDS
+        }
+        return Skins.objects.annotate(
+            similarity=Greatest(
+                TrigramWordSimilarity(phrase, 'name'),
+                TrigramWordSimilarity(phrase, 'title'),
+            ),
+            rank=SearchRank(F('search_vector'), query) + F('similarity'),
+            **headlines
+        ).filter(
+            Q(search_vector=query)
+            | Q(name__trigram_word_similar=phrase)
+            | Q(title__trigram_word_similar=phrase)
+        ).order_by('-rank', 'id')
+
+    def load_page(self, page: Iterable[Skins]) -> list[Skins]:
+        """Attach highlights to skins of one page."""
+
+        skins = list(page)
+        for skin in skins:
+            skin.highlight = {
+                field: getattr(skin, f'headline_{field}')
+                for field in HIGHLIGHT_FIELDS
+            }
+        return skins
+
+
+def trigrams(word: str) -> set[str]:
+    """Trigrams of a word, padded like pg_trgm does."""
+
+    padded = f'  {word} '
+    return {padded[pos:pos + 3] for pos in range(len(padded) - 2)}
+
+
+def similarity(first: str, second: str) -> float:
+    """Trigram similarity of two words."""
+
+    first_set, second_set = trigrams(first), trigrams(second)
+    return len(first_set & second_set) / len(first_set | second_set)
+
+
+class LocalSearchBackend:
+    """In-process search used where PostgreSQL is not available.
+    Ranks like the database one: field weights, prefix and
+    trigram typo matches, every query word must match."""
+
+    weights = {'A': 1.0, 'B': 0.4, 'C': 0.2}
+
+    def __init__(self, documents: Optional[Iterable[dict]] = None):
+        if documents is None:
+            documents = Skins.objects.values('id', *SEARCH_FIELDS)
+        self.documents = [
+            (
+                document,
+                [
+                    (self.weights[weight], tokenize(document.get(field)))
+                    for weight, fields in SEARCH_WEIGHTS.items()
+                    for field in fields
+                ],
+            )
+            for document in documents
+        ]
+
+    def match(self, token: str, word: str) -> float:
+        """Score of one query word against one document word."""
+
+        if word == token:
+            return 1.0
+        if word.startswith(token):
+            return 0.8
+        score = similarity(token, word)
+        return score * 0.6 if score >= TYPO_SIMILARITY else 0.0
+
+    def score(self, tokens: list[str], fields: list) -> float:
+        total = 0.0
+        for token in tokens:
+            best = max(
+                (
+                    weight * self.match(token, word)
+                    for weight, words in fields
+                    for word in words
+                ),
+                default=0.0
+            )
+            if not best:
+                return 0.0
+            total += best
+        return total
+
+    def highlight(self, text: Optional[str], tokens: list[str]) -> str:
+        """Wrap matched words of text into highlight tags."""
+
+        return TOKEN_RE.sub(
+            lambda word: f'{HIGHLIGHT_START}{word.group()}{HIGHLIGHT_STOP}'
+            if any(self.match(token, word.group().lower())
+                   for token in tokens)
+            else word.group(),
+            text or ''
+        )
+
+    def search(self, text: str) -> list[tuple[int, dict]]:
+        """Ranked list of (skin id, document)."""
+
+        self.tokens = tokenize(text)
+        hits = []
+        for document, fields in self.documents:
+            rank = self.score(self.tokens, fields)
+            if rank:
+                hits.append((-rank, document['id'], document))
+
+        hits.sort(key=lambda hit: (hit[0], hit[1]))
+        return [(skin_id, document) for _, skin_id, document in hits]
+
+    def load_page(self, page: Sequence[tuple[int, dict]]) -> list[Skins]:
+        """Fetch skins of one page and attach highlights."""
+
+        documents = dict(page)
+        skins = get_skins_by_ids(list(documents))
+        for skin in skins:
+            skin.highlight = {
+                field: self.highlight(
+                    documents[skin.id].get(field),
+                    self.tokens
+                )
+                for field in HIGHLIGHT_FIELDS
+            }
+        return skins
+
+
+def get_search_backend() -> Any:
+    """PostgreSQL backend if database supports it."""
+
+    backend = getattr(settings, 'SKINS_SEARCH_BACKEND', None)
+    if backend == 'local' or (
+        backend is None and connection.vendor != 'postgresql'
+    ):
+        return LocalSearchBackend()
+    return PostgresSearchBackend()
@@ -8,6 +8,7 @@ from .models import (
     UserSkins, 
     Categories,
 )
+from .search import tokenize
 from auths.serializers import UserSerializerForReviews
 
 
@@ -21,7 +22,7 @@ class FiltersSerializer(serializers.Serializer):
         required=False
     )
     sortBy = serializers.ChoiceField(
-        choices=['realPrice'], 
+        choices=['realPrice', 'rating', 'reviews_count'], 
         required=False
     )
 
@@ -46,6 +47,9 @@ class SkinsSerializer(serializers.ModelSerializer):
             'name',
             'grade',
             'rating',
+            'rating_average',
+            'reviews_count',
+            'rating_histogram',
             'category',
             'image',
             'priceWithoutSale',
@@ -54,6 +58,34 @@ class SkinsSerializer(serializers.ModelSerializer):
         )
 
 
+class SearchQuerySerializer(serializers.Serializer):
+    """Serializer for validation search query."""
+
+    q = serializers.CharField(
+        max_length=200,
+        trim_whitespace=True
+    )
+
+    def validate_q(self, value: str) -> str:
+        if not tokenize(value):
+            raise serializers.ValidationError(
+                'Search query must contain letters or digits.'
+            )
+        return value
+
+
+class SkinSearchSerializer(SkinsSerializer):
+    """Serializer for search results with highlights."""
+
+    highlight = serializers.SerializerMethodField()
+
+    class Meta(SkinsSerializer.Meta):
+        fields = SkinsSerializer.Meta.fields + ('highlight',)
+
+    def get_highlight(self, obj: Skins) -> dict:
+        return getattr(obj, 'highlight', {})
+
+
 class CollectionSerializer(serializers.ModelSerializer):
     """Serializer for my items collection."""
 
@@ -138,6 +170,9 @@ class SkinRetrieveSerial(serializers.ModelSerializer):
             'name',
             'grade',
             'rating',
+            'rating_average',
+            'reviews_count',
+            'rating_histogram',
             'category',
             'image',
             'video',
@@ -2,15 +2,22 @@
 from django.db.models.signals import (
     post_save,
     post_delete,
+    pre_migrate,
 )
+from django.db import connections, transaction
 from django.dispatch import receiver
 
 # Local
-from .models import Reviews, Skins
-from .tasks import (
-    update_rating, 
-    update_total_price,
+from .models import Reviews, Skins, Categories, SaleCampaigns, UserSkins
+from .catalog import bump_catalog_version
+from .search import SEARCH_FIELDS, update_search_vector
+from .ratings import (
+    apply_rating_delta,
+    reset_rating,
 )
+from .pricing import apply_campaign_prices
+from .tasks import update_total_price
+from abstract.cache import invalidate_tags, skin_tag, user_tag
 
 # Python
 from typing import Any
@@ -21,21 +28,48 @@ logger = logging.getLogger(__name__)
 
 
 @receiver(
-    [post_delete, post_save],
+    post_save,
     sender=Reviews
 )
 def change_rating(
+    sender: Reviews,
+    instance: Reviews,
+    created: bool,
+    **kwargs: Any
+) -> None:
+    """Change skin rating with new or edited review."""
+
+    skin_id = instance.skin_id
+    if not created and not hasattr(instance, '_loaded_rating'):
+        transaction.on_commit(lambda: reset_rating(skin_id))
+        return
+
+    old_rating = None if created else instance._loaded_rating
+    new_rating = instance.rating
+    instance._loaded_rating = new_rating
+    transaction.on_commit(
+        lambda: apply_rating_delta(skin_id, old_rating, new_rating)
+    )
+    logger.info(f'Rating on skin {skin_id} changed successful')
+
+
+@receiver(
+    post_delete,
+    sender=Reviews
+)
+def remove_rating(
     sender: Reviews,
     instance: Reviews,
     **kwargs: Any
 ) -> None:
-    """Change skin rating with new review."""
+    """Change skin rating with removed review."""
 
-    update_rating.apply_async(
-        args=(instance.skin.id,)
+    skin_id = instance.skin_id
+    old_rating = getattr(instance, '_loaded_rating', instance.rating)
+    transaction.on_commit(
+        lambda: apply_rating_delta(skin_id, old_rating, None)
     )
-    logger.info(f'Rating on skin {instance.skin} changed successful')
-    return 
+    logger.info(f'Rating on skin {skin_id} changed successful')
 
 
 @receiver(
@@ -45,15 +79,126 @@ def change_rating(
 def update_total_price_signal(
     sender: Skins, 
     instance: Skins, 
+    created: bool = False,
     **kwargs
 ):
-    """Signal for update skin total price."""
+    """Signal for update skin total price.
+    New skin has no price yet, dirty fields of it show only id."""
     
     changed_fields: dict = instance.changed_fields()
     print(f'ИЗМЕНЕНЫ ПОЛЯ: {changed_fields}')
-    if 'priceWithoutSale' in changed_fields\
+    if created or 'priceWithoutSale' in changed_fields\
         or 'sale' in changed_fields:
         print('ПОШЛА ЖАРА')
         update_total_price(instance.id)
         logger.info('total_price has been updated')
 
+
+@receiver(
+    [post_delete, post_save],
+    sender=Skins
+)
+@receiver(
+    [post_delete, post_save],
+    sender=Categories
+)
+def refresh_catalog_index(
+    sender: Any,
+    instance: Any,
+    **kwargs: Any
+) -> None:
+    """Signal for rebuild catalog index and drop cached 
+    listing pages after skin or category change."""
+
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(
+    post_save,
+    sender=Skins
+)
+def update_search_vector_signal(
+    sender: Skins,
+    instance: Skins,
+    update_fields: Any = None,
+    **kwargs: Any
+) -> None:
+    """Signal for recompute skin search vector."""
+
+    if update_fields is not None \
+        and not set(update_fields) & set(SEARCH_FIELDS):
+        return
+    update_search_vector(Skins.objects.filter(id=instance.id))
+
+
+@receiver(pre_migrate)
+def create_search_extensions(
+    sender: Any,
+    using: str = 'default',
+    **kwargs: Any
+) -> None:
+    """Signal for enable pg_trgm before trigram indexes migrate."""
+
+    connection = connections[using]
+    if sender.label != 'skins' or connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+
+@receiver(
+    [post_delete, post_save],
+    sender=SaleCampaigns
+)
+def apply_sale_campaign(
+    sender: SaleCampaigns,
+    instance: SaleCampaigns,
+    **kwargs: Any
+) -> None:
+    """Signal for recompute prices of skins aimed by
+    changed campaign, old targets included."""
+
+    old_categories, old_skin_ids = getattr(
+        instance, '_loaded_targets', ([], [])
+    )
+    categories = set(old_categories) | set(instance.categories)
+    skin_ids = set(old_skin_ids) | set(instance.skin_ids)
+    instance._loaded_targets = (
+        list(instance.categories),
+        list(instance.skin_ids)
+    )
+    if categories or skin_ids:
+        transaction.on_commit(
+            lambda: apply_campaign_prices(categories, skin_ids)
+        )
+
+
+@receiver(
+    [post_delete, post_save],
+    sender=Reviews
+)
+def invalidate_reviews_cache(
+    sender: Reviews,
+    instance: Reviews,
+    **kwargs: Any
+) -> None:
+    """Signal for drop cached reviews of skin."""
+
+    tag = skin_tag(instance.skin_id)
+    transaction.on_commit(lambda: invalidate_tags(tag))
+
+
+@receiver(
+    [post_delete, post_save],
+    sender=UserSkins
+)
+def invalidate_collection_cache(
+    sender: UserSkins,
+    instance: UserSkins,
+    **kwargs: Any
+) -> None:
+    """Signal for drop cached collection of owner."""
+
+    tag = user_tag(instance.user_id)
+    transaction.on_commit(lambda: invalidate_tags(tag))
+
@@ -1,29 +1,44 @@
-# Django
-from django.core.mail import send_mail
-from django.conf import settings
-from django.db.models import Avg
-
 # Python
 from datetime import datetime, timedelta
 
 # Local
 from settings.celery import app
-from .models import Skins, Reviews
-from .utils import calculate_total_price
-from auths.models import Client
+from .models import Skins
+from .ratings import flush_ratings
+from .recommendations import build_recommendations
+from .pricing import apply_campaign_prices, refresh_sale_prices
+from auths.models import Mailings
+from auths.tasks import start_mailing
 
 
-@app.task
-def update_rating(skin_id):
-    """Task for update skin rating with every new review."""
+@app.task(
+    name='flush-ratings'
+)
+def flush_skin_ratings():
+    """Task for write changed skin ratings in one UPDATE.
+    It works every few seconds."""
+
+    flush_ratings()
+
 
-    skin = Skins.objects.get(id=skin_id)
-    reviews = Reviews.objects.filter(skin=skin)
+@app.task(
+    name='refresh-sale-prices'
+)
+def refresh_skin_sale_prices():
+    """Task for apply sales which started or ended.
+    It works every 30 seconds."""
+
+    refresh_sale_prices()
 
-    rating = reviews.aggregate(Avg('rating'))['rating__avg'] or 0
 
-    skin.rating = rating
-    skin.save(update_fields=['rating'])
+@app.task(
+    name='build-recommendations'
+)
+def build_skin_recommendations():
+    """Task for precompute recommended skins of users.
+    It works every 30 minutes."""
+
+    print(f'MESSAGE: recommendations built {build_recommendations()}')
 
 
 @app.task(
@@ -46,15 +61,12 @@ def send_mail_about_new_skins():
     )
 
     if new_skins.exists():
-        emails = Client.objects.values_list('email', flat=True)
-        send_mail(
+        mailing = Mailings.objects.create(
             subject='New Skins',
-            message='We have a new skins, come and get it.',
-            from_email=settings.EMAIL_HOST_USER,
-            recipient_list=emails,
-            fail_silently=False
+            message='We have a new skins, come and get it.'
         )
-        print('MESSAGE: mail was sent')
+        start_mailing.delay(mailing.id)
+        print('MESSAGE: mailing was started')
     else:
         print('MESSAGE: No new skins found.')
 
@@ -63,8 +75,6 @@ def send_mail_about_new_skins():
 def update_total_price(skin_id):
     """Task for update skin total price."""
     
-    skin = Skins.objects.get(id=skin_id)
-    skin.realPrice = calculate_total_price(skin)
-    skin.save(update_fields=['realPrice'])
+    apply_campaign_prices(skin_ids=[skin_id])
 
     
\ No newline at end of file
@@ -1,9 +1,65 @@
 # Django
+from django.conf import settings
 from django.test import TestCase
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+# Python
+from datetime import timedelta
+from unittest import mock
+import io
+import os
+import tempfile
 
 # Local
-from .models import Skins, Client, UserSkins, Reviews
+from .models import (
+    Skins,
+    Client,
+    UserSkins,
+    Reviews,
+    PriceChanges,
+    SaleCampaigns,
+)
+from .catalog import CatalogIndex, get_listing_page_key
+from .search import LocalSearchBackend
+from .ratings import (
+    CATALOG_BUMP_KEY,
+    CATALOG_STALE_KEY,
+    DIRTY_KEY,
+    RATING_KEY,
+    ReviewStats,
+    aggregate_ratings,
+    flush_ratings,
+    get_average,
+    get_rating_delta,
+    reset_rating,
+)
+from .catalog_io import (
+    CATEGORIES_FORMAT,
+    SKINS_FORMAT,
+    export_rows,
+    read_rows,
+    upsert_batch,
+    write_rows,
+)
+from .recommendations import (
+    POOL_KEY,
+    POPULAR_KEY,
+    CatalogLists,
+    build_recommendations,
+    get_co_purchases,
+    get_recommended_ids,
+    pack_ids,
+    pick_random,
+    rank_for_user,
+    unpack_ids,
+)
+from .pricing import refresh_sale_prices, reprice, set_category_sale
+from .utils import calculate_total_price
+from .ingestion import LocalSource, Manifest, MediaIngestor, MediaStore
+from abstract.cache import get_tag_versions, skin_tag
 
 
 class SkinsModelTestCase(TestCase):
@@ -95,13 +151,31 @@ class UserSkinsModelTestCase(TestCase):
 
 
     def test_skin_quantity_default_value(self):
+        other_skin = Skins.objects.create(
+            title='Skin 2',
+            name='Skin Name',
+            grade='Grade A',
+            rating=4,
+            category=1,
+            priceWithoutSale=1000,
+            sale=0,
+            realPrice=1000
+        )
         user_skins = UserSkins.objects.create(
             user=self.client, 
-            skin=self.skin
+            skin=other_skin
         )
         self.assertEqual(user_skins.quantity, 1)
 
 
+    def test_user_skin_is_unique(self):
+        with self.assertRaises(IntegrityError):
+            UserSkins.objects.create(
+                user=self.client,
+                skin=self.skin
+            )
+
+
 class ReviewsModelTest(TestCase):
     """Tests for reviews."""
 
@@ -146,4 +220,682 @@ class ReviewsModelTest(TestCase):
                 rating=6
             )
 
-            
\ No newline at end of file
+            
+
+class CatalogIndexTestCase(TestCase):
+    """Tests for in-memory catalog index."""
+
+    def setUp(self):
+        self.index = CatalogIndex(
+            version=1,
+            rows=[
+                (1, 1, 500, 4.5, 2, 'Void Spirit'),
+                (2, 1, 100, 3.0, 7, 'Anti-Mage'),
+                (3, 2, None, 0, 0, 'Treant Protector'),
+                (4, 2, 300, 5.0, 1, 'Anti-Mage'),
+            ]
+        )
+
+
+    def test_default_order_by_id(self):
+        self.assertEqual(self.index.search(), [1, 2, 3, 4])
+
+
+    def test_category_filter(self):
+        self.assertEqual(self.index.search(category='2'), [3, 4])
+
+
+    def test_search_is_case_insensitive(self):
+        self.assertEqual(self.index.search(search='anti'), [2, 4])
+
+
+    def test_sort_by_price(self):
+        self.assertEqual(
+            self.index.search(sort_by='realPrice', order='asc'),
+            [2, 4, 1, 3]
+        )
+        self.assertEqual(
+            self.index.search(sort_by='realPrice', order='desc'),
+            [3, 1, 4, 2]
+        )
+
+
+    def test_sort_by_rating_and_reviews_count(self):
+        self.assertEqual(
+            self.index.search(sort_by='rating', order='desc'),
+            [4, 1, 2, 3]
+        )
+        self.assertEqual(
+            self.index.search(sort_by='reviews_count', order='asc'),
+            [3, 4, 1, 2]
+        )
+
+
+    def test_filters_combined(self):
+        self.assertEqual(
+            self.index.search(
+                category='1',
+                search='mage',
+                sort_by='realPrice',
+                order='desc'
+            ),
+            [2]
+        )
+
+
+class ListingPageKeyTestCase(TestCase):
+    """Tests for cached listing page keys."""
+
+    def test_key_depends_on_params_and_version(self):
+        params = {'category': '1', 'page': 1, 'size': 25}
+        key = get_listing_page_key(1, 'localhost', params)
+
+        self.assertEqual(
+            key, 
+            get_listing_page_key(1, 'localhost', dict(params))
+        )
+        self.assertNotEqual(
+            key, 
+            get_listing_page_key(2, 'localhost', params)
+        )
+        self.assertNotEqual(
+            key,
+            get_listing_page_key(1, 'localhost', {**params, 'page': 2})
+        )
+
+
+    def test_empty_cursor_differs_from_page_mode(self):
+        params = {'category': '1', 'page': 1, 'size': 25, 'cursor': None}
+
+        self.assertNotEqual(
+            get_listing_page_key(1, 'localhost', params),
+            get_listing_page_key(1, 'localhost', {**params, 'cursor': ''})
+        )
+
+
+class LocalSearchBackendTestCase(TestCase):
+    """Tests for local search fallback."""
+
+    def setUp(self):
+        self.backend = LocalSearchBackend(documents=[
+            {
+                'id': 1,
+                'name': 'Void Spirit',
+                'title': 'Sublime Equilibrium',
+                'kind': 'Набор',
+                'grade': 'Mythical',
+                'content': 'Содержит все предметы из набора.',
+            },
+            {
+                'id': 2,
+                'name': 'Anti-Mage',
+                'title': 'Brands of the Reaper',
+                'kind': 'Набор',
+                'grade': 'Mythical',
+                'content': None,
+            },
+            {
+                'id': 3,
+                'name': 'Treant Protector',
+                'title': 'Grudges of the Gallows Tree',
+                'kind': 'Набор',
+                'grade': 'Immortal',
+                'content': 'Хорошо сочетается с Brands of the Reaper.',
+            },
+        ])
+
+
+    def ids(self, query):
+        return [skin_id for skin_id, _ in self.backend.search(query)]
+
+
+    def test_prefix_match(self):
+        self.assertEqual(self.ids('sublim'), [1])
+
+
+    def test_typo_match(self):
+        self.assertEqual(self.ids('void spirt'), [1])
+
+
+    def test_all_words_must_match(self):
+        self.assertEqual(self.ids('mythical reaper'), [2])
+        self.assertEqual(self.ids('void grudges'), [])
+
+
+    def test_title_ranks_higher_than_content(self):
+        self.assertEqual(self.ids('reaper'), [2, 3])
+
+
+    def test_highlight(self):
+        self.assertEqual(
+            self.backend.highlight('Brands of the Reaper', ['reap']),
+            'Brands of the <mark>Reaper</mark>'
+        )
+
+
+class RatingCountersTestCase(TestCase):
+    """Tests for incremental rating counters."""
+
+    def test_rating_delta(self):
+        self.assertEqual(get_rating_delta(None, 4), (4, 1))
+        self.assertEqual(get_rating_delta(4, 2), (-2, 0))
+        self.assertEqual(get_rating_delta(5, None), (-5, -1))
+        self.assertEqual(get_rating_delta(None, None), (0, 0))
+
+
+    def test_average(self):
+        self.assertEqual(get_average(0, 0), 0)
+        self.assertEqual(get_average(9, 2), 4)
+        self.assertEqual(get_average(14, 3), 5)
+
+
+    def test_review_stats(self):
+        skin = Skins.objects.create(
+            title='Skin',
+            name='Skin',
+            grade='Mythical',
+            rating=0,
+            category=1,
+            priceWithoutSale=100,
+            sale=0,
+            realPrice=100
+        )
+        for num, rating in enumerate([5, 4, 4, None]):
+            user = Client.objects.create_user(
+                username=f'reviewer{num}',
+                email=f'reviewer{num}@example.com',
+                password='password',
+                cash=0
+            )
+            Reviews.objects.create(user=user, skin=skin, rating=rating)
+
+        stats = aggregate_ratings([skin.id])[skin.id]
+        self.assertEqual(stats.histogram, [0, 0, 0, 2, 1])
+        self.assertEqual(stats.rating_count, 3)
+        self.assertAlmostEqual(stats.average, 13 / 3)
+
+        counters = stats.to_counters()
+        restored = ReviewStats.from_counters(list(counters.values()))
+        stats.apply_to(skin)
+        self.assertTrue(restored.matches(skin))
+        self.assertEqual(skin.rating, 4)
+        self.assertEqual(skin.reviews_count, 3)
+
+
+    def test_catalog_bump_is_rate_limited(self):
+        redis = settings.REDIS
+        skin = Skins.objects.create(
+            title='Skin',
+            name='Skin',
+            grade='Mythical',
+            rating=0,
+            category=1,
+            priceWithoutSale=100,
+            sale=0,
+            realPrice=100
+        )
+        keys = [
+            CATALOG_STALE_KEY,
+            CATALOG_BUMP_KEY,
+            DIRTY_KEY,
+            RATING_KEY.format(skin.id),
+        ]
+        redis.delete(*keys)
+        self.addCleanup(redis.delete, *keys)
+
+        with mock.patch('skins.ratings.bump_catalog_version') as bump:
+            for _ in range(2):
+                reset_rating(skin.id)
+                self.assertEqual(flush_ratings(), 1)
+            self.assertEqual(bump.call_count, 1)
+
+            redis.delete(CATALOG_BUMP_KEY)
+            self.assertEqual(flush_ratings(), 0)
+            self.assertEqual(flush_ratings(), 0)
+            self.assertEqual(bump.call_count, 2)
+
+
+    def test_flush_invalidates_skin_tag(self):
+        redis = settings.REDIS
+        skin = Skins.objects.create(
+            title='Skin',
+            name='Skin',
+            grade='Mythical',
+            rating=0,
+            category=1,
+            priceWithoutSale=100,
+            sale=0,
+            realPrice=100
+        )
+        keys = [DIRTY_KEY, RATING_KEY.format(skin.id)]
+        redis.delete(*keys)
+        self.addCleanup(redis.delete, *keys)
+
+        tag = skin_tag(skin.id)
+        version = get_tag_versions([tag])[tag]
+        reset_rating(skin.id)
+        with mock.patch('skins.ratings.bump_catalog_if_due'):
+            self.assertEqual(flush_ratings(), 1)
+        self.assertNotEqual(get_tag_versions([tag])[tag], version)
+
+
+class MediaIngestorTestCase(TestCase):
+    """Tests for media ingestion of generate_data."""
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.source_dir = os.path.join(self.folder.name, 'source')
+        self.media_root = os.path.join(self.folder.name, 'media')
+        self.manifest_path = os.path.join(self.folder.name, 'manifest.json')
+        os.makedirs(os.path.join(self.source_dir, 'heroes'))
+        for name, content in (
+            ('heroes/1.jpeg', b'icon'),
+            ('heroes/2.jpeg', b'icon'),
+            ('video.webm', b'video' * 50_000),
+        ):
+            with open(os.path.join(self.source_dir, name), 'wb') as file:
+                file.write(content)
+
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+
+    def ingest(self, source):
+        ingestor = MediaIngestor(
+            source=source,
+            store=MediaStore(self.media_root),
+            manifest=Manifest(self.manifest_path),
+            workers=4
+        )
+        return ingestor, ingestor.ingest([
+            ('https://shop.ru/heroes/1.jpeg', 'skins/icons', '.png'),
+            ('https://shop.ru/heroes/2.jpeg', 'skins/icons', '.png'),
+            ('https://shop.ru/heroes/1.jpeg', 'skins/icons', '.png'),
+            ('https://shop.ru/items/video.webm', 'skins/videos', '.mp4'),
+            ('https://shop.ru/missing.png', 'skins/images', '.png'),
+            ('', 'skins/images', '.png'),
+        ])
+
+
+    def test_identical_files_stored_once(self):
+        ingestor, media = self.ingest(LocalSource(self.source_dir, 1024))
+
+        first = media['https://shop.ru/heroes/1.jpeg']
+        self.assertEqual(first, media['https://shop.ru/heroes/2.jpeg'])
+        self.assertTrue(first.startswith('skins/icons/'))
+        self.assertTrue(first.endswith('.jpeg'))
+        self.assertEqual(len(os.listdir(
+            os.path.join(self.media_root, 'skins/icons')
+        )), 1)
+        self.assertTrue(
+            media['https://shop.ru/items/video.webm'].endswith('.webm')
+        )
+        self.assertEqual(media['https://shop.ru/missing.png'], '')
+        self.assertEqual(ingestor.failed, ['https://shop.ru/missing.png'])
+
+
+    def test_rerun_skips_finished_files(self):
+        _, media = self.ingest(LocalSource(self.source_dir))
+        ingestor, resumed = self.ingest(
+            LocalSource(os.path.join(self.folder.name, 'empty'))
+        )
+
+        self.assertEqual(resumed, media)
+        self.assertEqual(ingestor.failed, ['https://shop.ru/missing.png'])
+
+
+class CatalogImportTestCase(TestCase):
+    """Tests for catalog import and export."""
+
+    def setUp(self):
+        self.rows = [
+            {
+                'name': 'Void Spirit',
+                'title': 'Sublime Equilibrium',
+                'price': 1000,
+                'sale': 20,
+                'grade': 'Mythical',
+                'category': 1,
+                'rating': 5,
+            },
+            {
+                'name': 'Anti-Mage',
+                'title': 'Brands of the Reaper',
+                'priceWithoutSale': 500,
+                'sale': 0,
+                'grade': 'Mythical',
+                'category': 2,
+            },
+        ]
+
+
+    def test_import_computes_real_price(self):
+        upsert_batch(SKINS_FORMAT, self.rows)
+
+        skin = Skins.objects.get(name='Void Spirit')
+        self.assertEqual(skin.realPrice, 800)
+        self.assertEqual(skin.rating, 0)
+
+
+    def test_import_updates_by_natural_key(self):
+        upsert_batch(SKINS_FORMAT, self.rows)
+        skin = Skins.objects.get(name='Void Spirit')
+        skin.rating = 4
+        skin.save(update_fields=['rating'])
+
+        self.rows[0]['sale'] = 50
+        upsert_batch(SKINS_FORMAT, self.rows[:1])
+
+        skin.refresh_from_db()
+        self.assertEqual(Skins.objects.count(), 2)
+        self.assertEqual(skin.realPrice, 500)
+        self.assertEqual(skin.rating, 4)
+
+
+    def test_search_vector_of_batch_rows_only(self):
+        crossed = Skins.objects.create(
+            name='Void Spirit',
+            title='Brands of the Reaper',
+            grade='Mythical',
+            rating=0,
+            category=1,
+            priceWithoutSale=100,
+            sale=0
+        )
+        Skins.objects.update(search_vector=None)
+
+        upsert_batch(SKINS_FORMAT, self.rows)
+
+        self.assertEqual(
+            Skins.objects.filter(search_vector__isnull=False).count(),
+            2
+        )
+        crossed.refresh_from_db()
+        self.assertIsNone(crossed.search_vector)
+
+
+    def test_csv_roundtrip(self):
+        upsert_batch(SKINS_FORMAT, self.rows)
+        upsert_batch(CATEGORIES_FORMAT, [{'number': 1, 'name': 'TI'}])
+        file = io.StringIO()
+
+        count = write_rows(
+            file,
+            'csv',
+            SKINS_FORMAT.export_fields,
+            export_rows(SKINS_FORMAT)
+        )
+        file.seek(0)
+        rows = list(read_rows(file, 'csv'))
+
+        self.assertEqual(count, 2)
+        self.assertEqual(rows[0]['title'], 'Sublime Equilibrium')
+        self.assertEqual(rows[0]['realPrice'], '800')
+        self.assertEqual(
+            SKINS_FORMAT.clean(rows[1])['priceWithoutSale'],
+            500
+        )
+
+
+class RepricingTestCase(TestCase):
+    """Tests for bulk repricing."""
+
+    def setUp(self):
+        self.prices = [(999, 15), (1499, 33), (7, 50), (1000, 0), (333, 99)]
+        for num, (price, sale) in enumerate(self.prices):
+            Skins.objects.create(
+                title=f'Skin {num}',
+                name='Skin',
+                grade='Mythical',
+                rating=0,
+                category=1 if num < 3 else 2,
+                priceWithoutSale=price,
+                sale=sale
+            )
+
+
+    def test_sql_price_matches_python_formula(self):
+        Skins.objects.update(realPrice=None)
+
+        reprice(Skins.objects.all())
+
+        for skin in Skins.objects.all():
+            self.assertEqual(skin.realPrice, calculate_total_price(skin))
+
+
+    def test_category_sale_with_one_update_and_audit(self):
+        with CaptureQueriesContext(connection) as captured:
+            count = set_category_sale(category=1, sale=25)
+
+        updates = [
+            query for query in captured.captured_queries
+            if query['sql'].startswith('UPDATE')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(count, 3)
+        for skin in Skins.objects.filter(category=1):
+            self.assertEqual(skin.sale, 25)
+            self.assertEqual(skin.realPrice, calculate_total_price(skin))
+        self.assertFalse(Skins.objects.filter(category=2, sale=25).exists())
+        change = PriceChanges.objects.get()
+        self.assertEqual((change.category, change.sale), (1, 25))
+        self.assertEqual(change.skins_count, 3)
+
+
+class SaleCampaignsTestCase(TestCase):
+    """Tests for scheduled sales."""
+
+    def setUp(self):
+        self.now = timezone.now()
+        self.skins = [
+            Skins.objects.create(
+                title=f'Skin {num}',
+                name='Skin',
+                grade='Mythical',
+                rating=0,
+                category=category,
+                priceWithoutSale=1000,
+                sale=sale
+            )
+            for num, (category, sale) in enumerate(
+                [(1, 0), (1, 50), (2, 0)]
+            )
+        ]
+        SaleCampaigns.objects.bulk_create([
+            SaleCampaigns(
+                title='Category sale',
+                starts_at=self.now + timedelta(hours=1),
+                ends_at=self.now + timedelta(hours=3),
+                categories=[1],
+                discount=20
+            ),
+            SaleCampaigns(
+                title='Skin sale',
+                starts_at=self.now + timedelta(hours=2),
+                ends_at=self.now + timedelta(hours=3),
+                skin_ids=[self.skins[0].id, self.skins[2].id],
+                discount_type=SaleCampaigns.ABSOLUTE,
+                discount=300
+            ),
+        ])
+
+
+    def get_prices(self):
+        return [
+            (skin.realPrice, skin.sale_campaign and skin.sale_campaign.title)
+            for skin in Skins.objects.select_related('sale_campaign')
+            .order_by('id')
+        ]
+
+
+    def test_nothing_before_window(self):
+        self.assertEqual(refresh_sale_prices(self.now), 0)
+        self.assertEqual(
+            self.get_prices(),
+            [(1000, None), (500, None), (1000, None)]
+        )
+
+
+    def test_cheapest_offer_wins_inside_window(self):
+        refresh_sale_prices(self.now + timedelta(hours=1))
+        self.assertEqual(
+            self.get_prices(),
+            [(800, 'Category sale'), (500, None), (1000, None)]
+        )
+
+        refresh_sale_prices(self.now + timedelta(hours=2))
+        self.assertEqual(
+            self.get_prices(),
+            [(700, 'Skin sale'), (500, None), (700, 'Skin sale')]
+        )
+
+
+    def test_prices_restored_after_window(self):
+        refresh_sale_prices(self.now + timedelta(hours=2))
+
+        refresh_sale_prices(self.now + timedelta(hours=3))
+
+        self.assertEqual(
+            self.get_prices(),
+            [(1000, None), (500, None), (1000, None)]
+        )
+        self.assertFalse(
+            SaleCampaigns.objects.filter(finished_at__isnull=True).exists()
+        )
+        self.assertEqual(PriceChanges.objects.count(), 2)
+
+
+class RecommendationsTestCase(TestCase):
+    """Tests for precomputed recommendations."""
+
+    def setUp(self):
+        self.skins = [
+            Skins.objects.create(
+                title=f'Skin {num}',
+                name=f'Skin {num}',
+                grade='Mythical',
+                rating=0,
+                category=num % 2,
+                priceWithoutSale=100,
+                sale=0,
+                realPrice=100
+            ) for num in range(4)
+        ]
+        self.users = []
+        owned = {
+            'first': [0, 1, 2],
+            'second': [0, 1],
+            'third': [1, 3],
+        }
+        for username, indexes in owned.items():
+            user = Client.objects.create_user(
+                username=username,
+                email=f'{username}@example.com',
+                password='password',
+                cash=0
+            )
+            for index in indexes:
+                UserSkins.objects.create(user=user, skin=self.skins[index])
+            self.users.append(user)
+        self.delete_keys()
+
+
+    def tearDown(self):
+        self.delete_keys()
+
+
+    def delete_keys(self):
+        keys = list(settings.REDIS.scan_iter('recommend:*'))
+        if keys:
+            settings.REDIS.delete(*keys)
+
+
+    def test_pack_ids(self):
+        ids = [3, 2 ** 40, 1]
+        self.assertEqual(unpack_ids(pack_ids(ids)), ids)
+        self.assertEqual(unpack_ids(None), [])
+
+
+    def test_co_purchases(self):
+        ids = [skin.id for skin in self.skins]
+        neighbours = get_co_purchases()
+
+        self.assertEqual(neighbours[ids[0]], [ids[1], ids[2]])
+        self.assertEqual(neighbours[ids[1]], [ids[0], ids[2], ids[3]])
+        self.assertEqual(get_co_purchases(neighbours=1)[ids[3]], [ids[1]])
+
+
+    def test_catalog_lists(self):
+        ids = [skin.id for skin in self.skins]
+        lists = CatalogLists()
+
+        self.assertEqual(lists.popular, [ids[1], ids[0], ids[2], ids[3]])
+        self.assertEqual(lists.categories[1], [ids[1], ids[3]])
+        self.assertEqual(
+            lists.get_fallback([ids[2]])[:2],
+            [ids[0], ids[1]]
+        )
+
+
+    def test_rank_for_user(self):
+        neighbours = {1: [3, 2, 4], 2: [4, 1]}
+
+        self.assertEqual(
+            rank_for_user([1, 2], neighbours, [9, 3, 8], count=4),
+            [4, 3, 9, 8]
+        )
+        self.assertEqual(rank_for_user([5], neighbours, [5, 7]), [7])
+
+
+    def test_pick_random(self):
+        picked = pick_random([1, 2, 3, 4, 5], 3, excluded=[1, 2])
+
+        self.assertEqual(sorted(picked), [3, 4, 5])
+        self.assertEqual(len(pick_random([1, 2], 40)), 2)
+
+
+    def test_build_and_read(self):
+        ids = [skin.id for skin in self.skins]
+        first, second, third = self.users
+
+        self.assertEqual(
+            build_recommendations(count=2),
+            {'users': 3, 'categories': 2, 'skins': 4}
+        )
+        self.assertEqual(
+            unpack_ids(settings.REDIS.get(POPULAR_KEY)),
+            [ids[1], ids[0], ids[2], ids[3]]
+        )
+        self.assertEqual(get_recommended_ids(first.id, count=1), [ids[3]])
+        self.assertEqual(
+            get_recommended_ids(second.id, count=2),
+            [ids[2], ids[3]]
+        )
+        self.assertEqual(
+            get_recommended_ids(third.id, count=2),
+            [ids[0], ids[2]]
+        )
+
+
+    def test_new_user_gets_popular(self):
+        ids = [skin.id for skin in self.skins]
+        build_recommendations()
+
+        self.assertEqual(
+            get_recommended_ids(999_999, count=2),
+            [ids[1], ids[0]]
+        )
+
+
+    def test_pool_fallback_before_first_build(self):
+        ids = [skin.id for skin in self.skins]
+        picked = get_recommended_ids(self.users[0].id, count=3)
+
+        self.assertEqual(len(set(picked)), 3)
+        self.assertLessEqual(set(picked), set(ids))
+        self.assertEqual(unpack_ids(settings.REDIS.get(POOL_KEY)), ids)
+        self.assertEqual(
+            sorted(get_recommended_ids(self.users[0].id, count=10)),
+            ids
+        )
@@ -2,16 +2,20 @@
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.viewsets import ViewSet
-from rest_framework.decorators import permission_classes
+from rest_framework.decorators import permission_classes, action
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 
 # SimpleJWT
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
 # Django
 from django.db.models.query import QuerySet
-from django.core.cache import cache
 from django.shortcuts import get_object_or_404
+from django.http import HttpResponse
+
+# Python
+from typing import Optional
 
 # Local
 from .models import (
@@ -24,12 +28,24 @@ from .serializers import (
     SkinRetrieveSerial,
     ReviewsSerializer,
     FiltersSerializer,
+    SearchQuerySerializer,
+    SkinSearchSerializer,
     ReviewSerializer,
     CategorySerializer,
     CreateReviewSerializer,
 )
+from .catalog import (
+    LISTING_PAGE_TIMEOUT,
+    get_catalog_version,
+    get_catalog_index,
+    get_listing_page_key,
+    get_skins_by_ids,
+)
+from .search import get_search_backend
+from abstract.cache import CATALOG_TAG, CachedRows, cached, skin_tag
 from abstract.mixins import ResponseMixin
 from abstract.paginators import AbstractPaginator
+from abstract.prefetch import PrefetchPlan
 
 
 @permission_classes([AllowAny])
@@ -43,13 +59,7 @@ class SkinsViewSet(ResponseMixin, ViewSet):
     def list(self, request: Request, *args, **kwargs) -> Response:
         """GET Method for view skin list."""
 
-        cache_key = 'all_skins'
         try:
-            skins = cache.get(key=cache_key)
-            if not skins:
-                skins = self.queryset.all()
-                cache.set(key=cache_key, value=skins, timeout=600)
-
             serializer = FiltersSerializer(data=request.query_params)
             if serializer.is_valid():
                 category = serializer.validated_data.get('category')
@@ -57,32 +67,58 @@ class SkinsViewSet(ResponseMixin, ViewSet):
                 order = serializer.validated_data.get('order')
                 sortBy = serializer.validated_data.get('sortBy')
 
-                if sortBy == 'realPrice':
-                    if order == 'desc':
-                        skins = skins.order_by('-realPrice')
-                    elif order == 'asc':
-                        skins = skins.order_by('realPrice')
-                if category:
-                    skins = skins.filter(category=category)
-
-                if search:
-                    skins = skins.filter(name__icontains=search)
-
-                paginator = self.paginator_class
-                objects: list = paginator.paginate_queryset(
-                    skins,
-                    request
+                paginator = self.get_paginator(self.paginator_class)
+                cache_key = get_listing_page_key(
+                    version=get_catalog_version(),
+                    host=request.get_host(),
+                    params={
+                        **serializer.validated_data,
+                        'page': request.query_params.get(
+                            paginator.page_query_param, 1
+                        ),
+                        'size': paginator.get_page_size(request),
+                        'cursor': request.query_params.get(
+                            paginator.cursor_query_param
+                        ),
+                        'count': request.query_params.get(
+                            paginator.count_query_param
+                        ),
+                    }
                 )
-                serializer: SkinsSerializer = \
-                    SkinsSerializer(
-                        objects,
-                        many=True
+
+                def render_page() -> bytes:
+                    skin_ids: list[int] = get_catalog_index().search(
+                        category=category,
+                        search=search,
+                        sort_by=sortBy,
+                        order=order
+                    )
+                    page_ids: list = paginator.paginate_queryset(
+                        skin_ids,
+                        request
+                    )
+                    serializer: SkinsSerializer = \
+                        SkinsSerializer(
+                            get_skins_by_ids(page_ids),
+                            many=True
+                        )
+                    response = self.get_json_response(
+                        key_name='items',
+                        data=serializer.data,
+                        paginator=paginator,
+                        status='200'
                     )
-                return self.get_json_response(
-                    key_name='items',
-                    data=serializer.data,
-                    paginator=paginator,
-                    status='200'
+                    return JSONRenderer().render(response.data)
+
+                content = cached(
+                    key=cache_key,
+                    compute=render_page,
+                    timeout=LISTING_PAGE_TIMEOUT
+                )
+
+                return HttpResponse(
+                    content,
+                    content_type='application/json'
                 )
 
             else:
@@ -96,29 +132,67 @@ class SkinsViewSet(ResponseMixin, ViewSet):
                 message=e
             )
 
-    def retrieve(self, request: Request, pk: str) -> Response:
-        """GET Method for view one skin."""
+    @action(methods=['GET'], detail=False, url_path='search')
+    def search(self, request: Request) -> Response:
+        """GET Method for ranked full-text search."""
+
+        serializer = SearchQuerySerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return self.response_with_error(
+                message=serializer.errors
+            )
 
-        cache_key = f'skin_{pk}_info'
         try:
-            skin = cache.get(key=cache_key)
-            if not skin:
-                skin = self.queryset.get(id=pk)
-                cache.set(key=cache_key, value=skin)
-            serializer = SkinRetrieveSerial(skin)
-            data = serializer.data
+            backend = get_search_backend()
+            hits = backend.search(serializer.validated_data['q'])
+
+            paginator = self.get_paginator(self.paginator_class)
+            page = paginator.paginate_queryset(hits, request)
+            serializer = SkinSearchSerializer(
+                backend.load_page(page),
+                many=True
+            )
             return self.get_json_response(
-                key_name='item',
-                data=data,
+                key_name='items',
+                data=serializer.data,
+                paginator=paginator,
                 status='200'
             )
 
-        except Skins.DoesNotExist:
+        except Exception as e:
+            return self.response_with_exception(
+                message=e
+            )
+
+    def get_skin_info(self, pk: str) -> Optional[dict]:
+        """Serialized skin as plain data, it is cached
+        in every process and shared between requests."""
+
+        skin = self.queryset.filter(id=pk).first()
+        if skin is None:
+            return None
+        return dict(SkinRetrieveSerial(skin).data)
+
+    def retrieve(self, request: Request, pk: str) -> Response:
+        """GET Method for view one skin."""
+
+        data = cached(
+            key=f'skin_{pk}_info',
+            compute=lambda: self.get_skin_info(pk),
+            tags=[skin_tag(pk), CATALOG_TAG]
+        )
+        if data is None:
             error_message = f'Skin with id {pk} does not exist.'
             return self.response_with_error(
                 message=error_message
             )
 
+        return self.get_json_response(
+            key_name='item',
+            data=data,
+            status='200'
+        )
+
 
 @permission_classes([IsAuthenticated])
 class ReviewsViewSet(ResponseMixin, ViewSet):
@@ -126,6 +200,7 @@ class ReviewsViewSet(ResponseMixin, ViewSet):
 
     queryset = Reviews.objects.all()
     paginator_class = AbstractPaginator()
+    prefetch_plan = PrefetchPlan.for_serializer(ReviewSerializer)
     authentication_classes = [JWTAuthentication]
 
     # def list(self, request: Request, *args, **kwargs) -> Response:
@@ -155,23 +230,24 @@ class ReviewsViewSet(ResponseMixin, ViewSet):
     def retrieve(self, request: Request, pk: str) -> Response:
         """View reviews about skin."""
 
-        cache_key = f'skin_{pk}_reviews'
-        reviews = cache.get(key=cache_key)
-        if not reviews:
-            reviews = self.queryset.filter(skin__id=pk)
-            cache.set(key=cache_key, value=reviews)
-        paginator = self.paginator_class
+        reviews: CachedRows = cached(
+            key=f'skin_{pk}_reviews',
+            compute=lambda: CachedRows.from_serializer(
+                ReviewSerializer,
+                self.prefetch_plan.apply(
+                    self.queryset.filter(skin__id=pk)
+                )
+            ),
+            tags=[skin_tag(pk)]
+        )
+        paginator = self.get_paginator(self.paginator_class)
         objects = paginator.paginate_queryset(
-            reviews,
+            reviews.rows,
             request
         )
-        serializer = ReviewSerializer(
-            objects,
-            many=True
-        )
         return self.get_json_response(
             key_name='reviews',
-            data=serializer.data,
+            data=objects,
             status='200'
         )
         
@@ -200,11 +276,7 @@ class ReviewsViewSet(ResponseMixin, ViewSet):
             new_review.review = text_review
             new_review.rating = skin_rating
             new_review.save()
-        
-        cache.delete_many([
-            f'skin_{skin_id}_reviews', 
-            f'skin_{skin_id}_info'
-        ])
+
         return self.get_json_response(
             key_name='success',
             data={'message': 'Review has been published.'},
@@ -221,30 +293,24 @@ class CategoryViewSet(ResponseMixin, ViewSet):
 
     def list(self, request: Request) -> Response:
 
-        cache_key = 'categories'
-        categories = cache.get('categories')
+        categories: CachedRows = cached(
+            key='categories',
+            compute=lambda: CachedRows.from_serializer(
+                CategorySerializer,
+                self.queryset.all()
+            ),
+            tags=[CATALOG_TAG]
+        )
         if not categories:
-            categories = self.queryset.all()
-            if not categories.exists():
-                return self.get_json_response(
-                    key_name='error',
-                    data={'error': 'Категории не найдены'},
-                    status='400'
-                )
-
-            cache.set(
-                key=cache_key, 
-                value=categories, 
-                timeout=60*60
+            return self.get_json_response(
+                key_name='error',
+                data={'error': 'Категории не найдены'},
+                status='400'
             )
-            
-        serializer = CategorySerializer(
-            categories,
-            many=True
-        )
+
         return self.get_json_response(
             key_name='categories',
-            data=serializer.data,
+            data=categories.rows,
             status='200'
         )
         
@@ -26,7 +26,6 @@ DJANGO_APPS = [
     'corsheaders',
     'channels',
     'channels_redis',
-    'debug_toolbar',
     'django_extensions',
     'django.contrib.admin',
     'django.contrib.auth',
@@ -34,6 +33,7 @@ DJANGO_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 ]
 PROJECT_APPS = [
     'abstract.apps.AbstractConfig',
@@ -51,7 +51,7 @@ MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
+    'abstract.middleware.QueryBudgetMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -130,45 +130,42 @@ CORS_ALLOW_METHODS = ['*']
 CORS_ALLOW_HEADERS = ['*']
 
 # Logging
+LOG_FILE = 'serv_logs.jsonl'
+LOG_EXPORT_FILE = 'serv_logs.xlsx'
+LOG_EXPORT_MAX_ROWS = 50_000
+LOG_EXPORT_BACKUPS = 5
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
     'handlers': {
-        'excel': {
+        'queue': {
             'level': 'INFO',
-            'class': 'settings.logger.ExcelFileHandler',
-            'filename': 'serv_logs.xlsx',
+            'class': 'settings.logger.QueueFileHandler',
+            'filename': LOG_FILE,
         },
     },
     'root': {
-        'handlers': ['excel'],
+        'handlers': ['queue'],
         'level': 'INFO',
     },
 }
 
-DEBUG_TOOLBAR_PANELS = [
-    'debug_toolbar.panels.history.HistoryPanel',
-    'debug_toolbar.panels.versions.VersionsPanel',
-    'debug_toolbar.panels.timer.TimerPanel',
-    'debug_toolbar.panels.settings.SettingsPanel',
-    'debug_toolbar.panels.headers.HeadersPanel',
-    'debug_toolbar.panels.request.RequestPanel',
-    'debug_toolbar.panels.sql.SQLPanel',
-    'debug_toolbar.panels.staticfiles.StaticFilesPanel',
-    'debug_toolbar.panels.templates.TemplatesPanel',
-    'debug_toolbar.panels.cache.CachePanel',
-    'debug_toolbar.panels.signals.SignalsPanel',
-    'debug_toolbar.panels.redirects.RedirectsPanel',
-    'debug_toolbar.panels.profiling.ProfilingPanel',
-]
+# Query budget
+QUERY_BUDGET = 30
+QUERY_REPEAT_THRESHOLD = 5
 
 CACHES = {
     'default': {
-        'BACKEND': 'django_redis.cache.RedisCache',
+        'BACKEND': 'abstract.cache_backends.TwoTierCache',
         'LOCATION': config('CACHE_REDIS'),
         'OPTIONS': {
             'CLIENT_CLASS': 'django_redis.client.DefaultClient',
             'TIMEOUT': 3600,
+            # Hot catalog reads, also kept in process memory.
+            'LOCAL_KEYS': ['categories', 'skin_*_info', 'catalog_version'],
+            'LOCAL_MAX_ENTRIES': 4096,
+            'LOCAL_TIMEOUT': 30,
         }
     }
 }
@@ -24,6 +24,26 @@ app.conf.beat_schedule = {
     'every-day': {
         'task': 'send-mail-new-skins',
         'schedule': crontab(hour=20, minute=30)
+    },
+    'every-5-seconds': {
+        'task': 'flush-ratings',
+        'schedule': 5.0
+    },
+    'every-hour': {
+        'task': 'verify-basket-totals',
+        'schedule': crontab(minute=0)
+    },
+    'every-minute': {
+        'task': 'compact-logs',
+        'schedule': crontab()
+    },
+    'every-30-seconds': {
+        'task': 'refresh-sale-prices',
+        'schedule': 30.0
+    },
+    'every-30-minutes': {
+        'task': 'build-recommendations',
+        'schedule': crontab(minute='*/30')
     }
 }
 app.conf.timezone = 'Asia/Almaty'
@@ -1,45 +1,222 @@
 import os
+import json
+import queue
+import fcntl
+import atexit
 import logging
+import threading
 from datetime import datetime
+from logging.handlers import QueueHandler
 
 from django.conf import settings
-from openpyxl import Workbook
-
-
-class ExcelFileHandler(logging.FileHandler):
-    """Handler for logging to excel file."""
-
-    def __init__(self, filename):
-        filepath = os.path.join(settings.BASE_DIR, filename)
-        if not os.path.isfile(filepath):
-            open(filepath, 'a').close()
-        super().__init__(filepath)
-        self.setLevel(logging.INFO)
-        self.workbook = Workbook()
-        self.workbook.remove(self.workbook.active)
-        self.workbook.create_sheet(title='INFO', index=0)
-        self.workbook.create_sheet(title='WARNING', index=1)
-        self.workbook.create_sheet(title='ERROR', index=2)
-        self.workbook.create_sheet(title='CRITICAL', index=3)
-
-    def emit(self, record):
+from openpyxl import Workbook, load_workbook
+
+
+LEVEL_SHEETS = ('INFO', 'WARNING', 'ERROR', 'CRITICAL')
+
+
+def get_log_path(filename):
+    return os.path.join(settings.BASE_DIR, filename)
+
+
+def append_lines(filepath, lines):
+    """Append lines with one write, shared lock lets
+    compaction take the file only between batches."""
+
+    with open(filepath, 'a', encoding='utf-8') as file:
+        fcntl.flock(file, fcntl.LOCK_SH)
         try:
-            msg = self.format(record)
-            sheet_name = record.levelname
-            sheet = self.workbook[sheet_name]
-
-            created_datetime = datetime.fromtimestamp(record.created)
-
-            row = [
-                record.levelname, 
-                created_datetime.strftime("%Y-%m-%d"), 
-                created_datetime.strftime("%H:%M:%S"), 
-                msg
-            ]
-            sheet.append(row)
-            self.workbook.save(self.baseFilename)
-        except (KeyboardInterrupt, SystemExit):
-            raise
-        except Exception:
-            self.handleError(record)
+            file.write(''.join(lines))
+            file.flush()
+        finally:
+            fcntl.flock(file, fcntl.LOCK_UN)
+
+
+class JsonLinesWriter:
+    """Background thread, drains queue and writes records
+    to JSON lines file in batches."""
+
+    def __init__(self, log_queue, filepath, batch_size=500,
+                 flush_interval=1.0):
+        self.queue = log_queue
+        self.filepath = filepath
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.thread = threading.Thread(
+            target=self.run,
+            name='log-writer',
+            daemon=True
+        )
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.queue.put_nowait(None)
+        self.thread.join()
+
+    def to_line(self, record):
+        return json.dumps({
+            'level': record.levelname,
+            'created': record.created,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }, ensure_ascii=False) + '\n'
+
+    def run(self):
+        stopped = False
+        while not stopped:
+            try:
+                records = [self.queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while len(records) < self.batch_size:
+                try:
+                    records.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in records:
+                stopped = True
+            lines = [self.to_line(record) for record in records if record]
+            if not lines:
+                continue
+            try:
+                append_lines(self.filepath, lines)
+            except Exception:
+                logging.lastResort.handle(records[0])
+
+
+class QueueFileHandler(QueueHandler):
+    """Handler for logging to JSON lines file.
+
+    Caller only puts record into in-memory queue, writer
+    thread of the process appends them to file. Lines are
+    compacted to excel by `compact_logs`."""
+
+    def __init__(self, filename, batch_size=500, flush_interval=1.0):
+        super().__init__(queue.SimpleQueue())
+        self.filepath = get_log_path(filename)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.writer = None
+        self.pid = None
+        self.writer_lock = threading.Lock()
+        atexit.register(self.close)
+
+    def start_writer(self):
+        # Forked workers don't inherit the writer thread.
+        with self.writer_lock:
+            if self.pid != os.getpid():
+                self.queue = queue.SimpleQueue()
+                self.writer = JsonLinesWriter(
+                    self.queue,
+                    self.filepath,
+                    self.batch_size,
+                    self.flush_interval
+                )
+                self.writer.start()
+                self.pid = os.getpid()
 
+    def enqueue(self, record):
+        if self.pid != os.getpid():
+            self.start_writer()
+        self.queue.put_nowait(record)
+
+    def close(self):
+        with self.writer_lock:
+            if self.writer and self.pid == os.getpid():
+                self.writer.stop()
+            self.writer = None
+            self.pid = None
+        super().close()
+
+
+def rotate_export(filepath, backups):
+    """serv_logs.xlsx -> serv_logs.1.xlsx -> ... serv_logs.N.xlsx"""
+
+    root, ext = os.path.splitext(filepath)
+    for num in range(backups - 1, 0, -1):
+        source = f'{root}.{num}{ext}'
+        if os.path.exists(source):
+            os.replace(source, f'{root}.{num + 1}{ext}')
+    if backups > 0:
+        os.replace(filepath, f'{root}.1{ext}')
+    else:
+        os.remove(filepath)
+
+
+def open_export(filepath, max_rows, backups):
+    if os.path.isfile(filepath) and os.path.getsize(filepath):
+        workbook = load_workbook(filepath)
+        rows = sum(
+            sheet.max_row for sheet in workbook.worksheets
+            if sheet['A1'].value is not None
+        )
+        if rows < max_rows:
+            return workbook
+        rotate_export(filepath, backups)
+
+    workbook = Workbook()
+    workbook.remove(workbook.active)
+    for index, name in enumerate(LEVEL_SHEETS):
+        workbook.create_sheet(title=name, index=index)
+    return workbook
+
+
+def take_lines(filepath):
+    """Read and truncate JSON lines file under exclusive lock."""
+
+    if not os.path.isfile(filepath):
+        return []
+    with open(filepath, 'r+', encoding='utf-8') as file:
+        fcntl.flock(file, fcntl.LOCK_EX)
+        try:
+            lines = file.readlines()
+            file.truncate(0)
+        finally:
+            fcntl.flock(file, fcntl.LOCK_UN)
+    return lines
+
+
+def compact_logs(source=None, export=None, max_rows=None, backups=None):
+    """Move collected JSON lines into excel export, rotates
+    export when it has too many rows. Returns moved lines count,
+    None when another process is compacting."""
+
+    source = get_log_path(source or settings.LOG_FILE)
+    export = get_log_path(export or settings.LOG_EXPORT_FILE)
+    max_rows = max_rows or settings.LOG_EXPORT_MAX_ROWS
+    backups = settings.LOG_EXPORT_BACKUPS if backups is None else backups
+
+    with open(f'{export}.lock', 'a') as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return None
+
+        lines = take_lines(source)
+        if not lines:
+            return 0
+
+        try:
+            workbook = open_export(export, max_rows, backups)
+            for line in lines:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                created = datetime.fromtimestamp(record['created'])
+                sheet = record['level'] \
+                    if record['level'] in LEVEL_SHEETS else LEVEL_SHEETS[0]
+                workbook[sheet].append([
+                    record['level'],
+                    created.strftime("%Y-%m-%d"),
+                    created.strftime("%H:%M:%S"),
+                    record['message']
+                ])
+            workbook.save(export)
+        except Exception:
+            # Put lines back, next run will try again.
+            append_lines(source, lines)
+            raise
+    return len(lines)